@@ -0,0 +1,343 @@
+import argparse
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from benchmarks.server import serve_tree
+from benchmarks.synthetic import SyntheticTree, generate_tree, load_tree
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIB = 1024 * 1024
+
+# cold-start benchmarks: module imported in a fresh interpreter and the budget of interpreter start plus import,
+# in seconds; the dagster code location is only measured where the dagster extra is installed
+COLD_STARTS: dict[str, tuple[str, float]] = {
+    "import_common": ("imgw.common", 0.5),
+    "import_extract": ("imgw.extract", 2.0),
+}
+if importlib.util.find_spec("dagster") is not None:
+    COLD_STARTS["import_dagster"] = ("imgw.dags.dagster.definitions", 5.0)
+
+# a workload returns the number of bytes and rows it processed
+TWorkload = Callable[[], tuple[int, int]]
+
+
+class BenchmarkResult(NamedTuple):
+    """Measurements of a single benchmark."""
+
+    name: str
+    seconds: float
+    nbytes: int
+    rows: int
+    peak_rss: int
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.nbytes / MIB / self.seconds
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds
+
+    def metrics(self) -> dict[str, float]:
+        return {
+            "mb_per_s": round(self.mb_per_s, 2),
+            "rows_per_s": round(self.rows_per_s, 1),
+            "peak_rss_mb": round(self.peak_rss / MIB, 1),
+        }
+
+
+def _archive_urls(base_url: str, tree: SyntheticTree) -> list[str]:
+    return [f"{base_url}/{path}" for path in tree.archives]
+
+
+def _read_archives(tree: SyntheticTree) -> list:
+    from imgw.extract.helpers.extract import ImgwZip
+
+    archives = []
+    for path in tree.archives:
+        with open(os.path.join(tree.root, path), "rb") as f:
+            archives.append(ImgwZip(filename=os.path.basename(path), content=f.read()))
+    return archives
+
+
+def bench_find_zip_links(base_url: str, tree: SyntheticTree) -> TWorkload:
+    from imgw.extract.helpers import find_zip_links
+
+    def workload() -> tuple[int, int]:
+        links = [link for root_url in tree.root_urls for link in find_zip_links(base_url + root_url)]
+        return 0, len(links)
+
+    return workload
+
+
+def bench_fetch_zip_data(base_url: str, tree: SyntheticTree) -> TWorkload:
+    from imgw.extract.helpers import fetch_zip_data
+
+    def workload() -> tuple[int, int]:
+        nbytes = 0
+        for url in _archive_urls(base_url, tree):
+            zip_file = fetch_zip_data(url, stream=True)
+            if zip_file is not None:
+                nbytes += zip_file.nbytes
+                zip_file.close()
+        return nbytes, 0
+
+    return workload
+
+
+def _bench_unzip(unzip: Callable, tree: SyntheticTree) -> TWorkload:
+    archives = _read_archives(tree)
+
+    def workload() -> tuple[int, int]:
+        nbytes = sum(csv_file.nbytes for zip_file in archives for csv_file in unzip(zip_file))
+        return nbytes, 0
+
+    return workload
+
+
+def bench_unzip(base_url: str, tree: SyntheticTree) -> TWorkload:
+    from imgw.extract.helpers import unzip
+
+    return _bench_unzip(unzip, tree)
+
+
+def bench_unzip_alt(base_url: str, tree: SyntheticTree) -> TWorkload:
+    from imgw.extract.helpers.extract import unzip_alt
+
+    return _bench_unzip(unzip_alt, tree)
+
+
+def bench_parse_table(base_url: str, tree: SyntheticTree) -> TWorkload:
+    from imgw.extract.helpers import parse_table, unzip
+
+    csv_files = [csv_file for zip_file in _read_archives(tree) for csv_file in unzip(zip_file)]
+
+    def workload() -> tuple[int, int]:
+        nbytes = rows = 0
+        for csv_file in csv_files:
+            table, _ = parse_table(csv_file)
+            nbytes += csv_file.nbytes
+            rows += table.num_rows if table is not None else 0
+        return nbytes, rows
+
+    return workload
+
+
+def bench_imgw_historic(base_url: str, tree: SyntheticTree) -> TWorkload:
+    import dlt
+    import duckdb
+
+    from imgw.extract import imgw_historic
+
+    os.environ["SOURCES__ROOT_URLS"] = json.dumps([base_url + root_url for root_url in tree.root_urls])
+    db_file = os.path.join(os.getcwd(), "imgw.db")
+    pipeline = dlt.pipeline(
+        pipeline_name="imgw_benchmark",
+        destination=dlt.destinations.duckdb(db_file),
+        dataset_name="imgw_historic",
+        pipelines_dir=os.path.join(os.getcwd(), "pipelines"),
+    )
+
+    def workload() -> tuple[int, int]:
+        pipeline.run(imgw_historic())
+        with duckdb.connect(db_file, read_only=True) as connection:
+            tables = connection.execute(
+                "SELECT table_name FROM information_schema.tables "
+                "WHERE table_schema = 'imgw_historic' AND table_name NOT LIKE '_dlt%'"
+            ).fetchall()
+            rows = sum(
+                connection.execute(f'SELECT count(*) FROM imgw_historic."{table}"').fetchone()[0]  # noqa: S608
+                for (table,) in tables
+            )
+        return tree.csv_bytes, rows
+
+    return workload
+
+
+def _bench_import(module: str) -> Callable[[str, SyntheticTree], TWorkload]:
+    def bench(base_url: str, tree: SyntheticTree) -> TWorkload:
+        python_path = os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")]))
+        env = {**os.environ, "PYTHONPATH": python_path}
+
+        def workload() -> tuple[int, int]:
+            subprocess.run([sys.executable, "-c", f"import {module}"], env=env, check=True)  # noqa: S603
+            return 0, 1
+
+        return workload
+
+    return bench
+
+
+BENCHMARKS: dict[str, Callable[[str, SyntheticTree], TWorkload]] = {
+    "find_zip_links": bench_find_zip_links,
+    "fetch_zip_data": bench_fetch_zip_data,
+    "unzip": bench_unzip,
+    "unzip_alt": bench_unzip_alt,
+    "parse_table": bench_parse_table,
+    "imgw_historic": bench_imgw_historic,
+}
+BENCHMARKS.update({name: _bench_import(module) for name, (module, _) in COLD_STARTS.items()})
+
+
+def _peak_rss() -> int:
+    # includes finished child processes, i.e. the interpreter of a cold-start benchmark
+    peak = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_in_process(name: str, base_url: str, tree_root: str) -> BenchmarkResult:
+    """Runs a benchmark in a fresh process, so its peak RSS is not shared with other benchmarks."""
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs(".failed_files")
+        workload = BENCHMARKS[name](base_url, load_tree(tree_root))
+        started = time.perf_counter()
+        nbytes, rows = workload()
+        seconds = time.perf_counter() - started
+    return BenchmarkResult(name, seconds, nbytes, rows, _peak_rss())
+
+
+def run_benchmarks(tree: SyntheticTree, names: list[str], repeat: int = 3) -> list[BenchmarkResult]:
+    """
+    Runs benchmarks against a local HTTP mirror of a synthetic tree.
+
+    Every repetition runs in a new process; the fastest repetition of each benchmark is reported.
+
+    Args:
+        tree (SyntheticTree): The synthetic tree.
+        names (list[str]): Names of the benchmarks to run.
+        repeat (int): Number of repetitions. Defaults to 3.
+
+    Returns:
+        list[BenchmarkResult]: Results of the benchmarks.
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with serve_tree(tree.root) as base_url:
+        for name in names:
+            runs = []
+            for _ in range(repeat):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    runs.append(pool.submit(_run_in_process, name, base_url, tree.root).result())
+            results.append(min(runs, key=lambda result: result.seconds))
+    return results
+
+
+def compare(
+    results: list[BenchmarkResult],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+    budgets: Optional[dict[str, float]] = None,
+) -> list[str]:
+    """
+    Compares results with a baseline and with time budgets.
+
+    Args:
+        results (list[BenchmarkResult]): Results of the benchmarks.
+        baseline (dict[str, dict[str, float]]): Stored metrics by benchmark name.
+        tolerance (float): Allowed relative drop in throughput, or growth in peak RSS.
+        budgets (Optional[dict[str, float]]): Maximum seconds by benchmark name, checked without tolerance.
+            Defaults to None (no budgets).
+
+    Returns:
+        list[str]: Descriptions of the regressions.
+    """
+    regressions = []
+    for result in results:
+        budget = (budgets or {}).get(result.name)
+        if budget is not None and result.seconds > budget:
+            regressions.append(f"{result.name}: {result.seconds:.2f}s over the budget of {budget:.2f}s")
+        stored = baseline.get(result.name)
+        if stored is None:
+            continue
+        for metric, value in result.metrics().items():
+            reference = stored.get(metric, 0)
+            if not reference:
+                continue
+            change = value / reference - 1
+            worse = change > tolerance if metric == "peak_rss_mb" else change < -tolerance
+            if worse:
+                regressions.append(f"{result.name}: {metric} {value} vs baseline {reference} ({change:+.0%})")
+    return regressions
+
+
+def _report(results: list[BenchmarkResult], baseline: dict[str, dict[str, float]]) -> str:
+    lines = [f"{'benchmark':<18}{'seconds':>10}{'MB/s':>10}{'rows/s':>12}{'peak RSS MiB':>14}{'vs baseline':>14}"]
+    for result in results:
+        metrics = result.metrics()
+        stored = baseline.get(result.name, {})
+        key = "mb_per_s" if result.nbytes else "rows_per_s"
+        change = f"{metrics[key] / stored[key] - 1:+.0%}" if stored.get(key) else "-"
+        lines.append(
+            f"{result.name:<18}{result.seconds:>10.3f}{metrics['mb_per_s']:>10.1f}"
+            f"{metrics['rows_per_s']:>12.0f}{metrics['peak_rss_mb']:>14.1f}{change:>14}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the historic pipeline against a synthetic IMGW mirror")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run, of {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--tree", help="Directory of a tree to reuse or generate (default: a temporary directory)")
+    parser.add_argument("--years", type=int, default=1, help="Years of synthetic data")
+    parser.add_argument("--stations", type=int, default=10, help="Stations per synthetic CSV file")
+    parser.add_argument("--quick", action="store_true", help="Two months of three stations, single repetition")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per benchmark; the fastest is reported")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--check", action="store_true", help="Exit with an error if a benchmark regressed")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    if args.quick and args.save_baseline:
+        parser.error("--save-baseline cannot be combined with --quick")
+
+    months = (1, 2) if args.quick else tuple(range(1, 13))
+    stations = 3 if args.quick else args.stations
+    repeat = 1 if args.quick else args.repeat
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = args.tree or tmp_dir
+        if os.path.exists(os.path.join(root, "manifest.json")):
+            tree = load_tree(root)
+        else:
+            tree = generate_tree(root, years=range(2001, 2001 + args.years), months=months, stations=stations)
+        results = run_benchmarks(tree, args.benchmarks or list(BENCHMARKS), repeat)
+
+    # the baseline is measured on the default tree; throughput and peak RSS of the small --quick tree are not
+    # comparable with it, so a quick run only checks the cold-start budgets
+    baseline: dict[str, dict[str, float]] = {}
+    if not args.quick and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(_report(results, baseline))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({result.name: result.metrics() for result in results}, f, indent=2)
+            f.write("\n")
+        return 0
+    budgets = {name: budget for name, (_, budget) in COLD_STARTS.items()}
+    regressions = compare(results, baseline, args.tolerance, budgets)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """Serves files without logging every request to stderr."""
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+@contextmanager
+def serve_tree(root: str, host: str = "127.0.0.1") -> Iterator[str]:
+    """
+    Serves a directory over HTTP from a background thread, on a free port.
+
+    Directories are answered with their `index.html` and files carry a Last-Modified header, so conditional
+    requests behave like on the IMGW server.
+
+    Args:
+        root (str): Directory to serve.
+        host (str): Address to bind. Defaults to "127.0.0.1".
+
+    Yields:
+        str: Base URL of the server, without a trailing slash.
+    """
+    server = ThreadingHTTPServer((host, 0), partial(_QuietHandler, directory=root))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="imgw-mirror", daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
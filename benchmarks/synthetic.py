@@ -0,0 +1,257 @@
+import calendar
+import io
+import json
+import os
+import random
+import zipfile
+from collections.abc import Iterator, Sequence
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from html import escape
+
+import pyarrow as pa
+
+from imgw.common import ARROW_COLUMNS_SCHEMA
+from imgw.extract.helpers.parse_plan import CSV_ENCODING
+
+MANIFEST_FILE = "manifest.json"
+DATA_ROOT = "data/dane_pomiarowo_obserwacyjne/dane_meteorologiczne"
+
+# (directory under DATA_ROOT, archive suffix, table types in the archive, hourly)
+ARCHIVE_LAYOUT = [
+    ("dobowe/klimat", "k", ["k_d", "k_d_t"], False),
+    ("dobowe/opad", "o", ["o_d"], False),
+    ("dobowe/synop", "s", ["s_d", "s_d_t"], False),
+    ("terminowe/klimat", "k", ["k_t"], True),
+    ("terminowe/synop", "s", ["s_t"], True),
+]
+
+# Polish letters make sure the windows-1250 decoding path is exercised
+STATION_NAMES = ["BIAŁYSTOK", "ŁÓDŹ-LUBLINEK", "KRAKÓW-BALICE", "GDAŃSK-RĘBIECHOWO", "ZIELONA GÓRA", "ŚNIEŻKA"]
+STATUS_FLAGS = ["", "", "", "", "8", "9"]
+MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class SyntheticTree:
+    """Manifest of a generated tree."""
+
+    root: str
+    archives: list[str] = field(default_factory=list)
+    malformed: list[str] = field(default_factory=list)
+    archive_bytes: int = 0
+    csv_bytes: int = 0
+    rows: int = 0
+
+    @property
+    def root_urls(self) -> list[str]:
+        """Paths of the archive directories, relative to the server root."""
+        return [f"/{DATA_ROOT}/{directory}/" for directory, *_ in ARCHIVE_LAYOUT]
+
+    def save(self) -> None:
+        """Writes the manifest into the root of the tree."""
+        with open(os.path.join(self.root, MANIFEST_FILE), "w") as f:
+            json.dump(asdict(self), f, indent=2)
+
+
+def load_tree(root: str) -> SyntheticTree:
+    """
+    Reads the manifest of a generated tree.
+
+    Args:
+        root (str): Root directory of the tree.
+
+    Returns:
+        SyntheticTree: The manifest.
+    """
+    with open(os.path.join(root, MANIFEST_FILE)) as f:
+        return SyntheticTree(**json.load(f))
+
+
+def _value(data_type: pa.DataType, rng: random.Random) -> str:
+    if pa.types.is_dictionary(data_type):
+        return f'"{rng.choice(STATUS_FLAGS)}"'
+    if pa.types.is_floating(data_type):
+        return f"{rng.uniform(-30, 40):.1f}"
+    if pa.types.is_string(data_type):
+        return f'"{rng.choice("ABCX")}"'
+    if pa.types.is_int8(data_type):
+        return str(rng.randint(0, 9))
+    return str(rng.randint(0, 99))
+
+
+def _rows(
+    columns: dict[str, pa.DataType], year: int, month: int, stations: int, hourly: bool, rng: random.Random
+) -> Iterator[str]:
+    hours = range(24) if hourly else [None]
+    for station in range(stations):
+        calendar_values = {
+            "station_code": str(250150000 + station),
+            "station_name": f'"{STATION_NAMES[station % len(STATION_NAMES)]}"',
+            "year": str(year),
+            "month": str(month),
+        }
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            calendar_values["day"] = str(day)
+            for hour in hours:
+                calendar_values["hour"] = str(hour)
+                yield ",".join(
+                    calendar_values.get(name) or _value(data_type, rng) for name, data_type in columns.items()
+                )
+
+
+def render_csv(table_type: str, year: int, month: int, stations: int, hourly: bool, rng: random.Random) -> bytes:
+    """
+    Renders a headerless IMGW CSV file of a table type, encoded as windows-1250.
+
+    Args:
+        table_type (str): The table type, a key of ARROW_COLUMNS_SCHEMA.
+        year (int): Year of the data.
+        month (int): Month of the data.
+        stations (int): Number of stations.
+        hourly (bool): One row per hour instead of one row per day.
+        rng (random.Random): Source of the measurement values.
+
+    Returns:
+        bytes: The encoded CSV file.
+    """
+    lines = _rows(ARROW_COLUMNS_SCHEMA[table_type], year, month, stations, hourly, rng)
+    return ("\r\n".join(lines) + "\r\n").encode(CSV_ENCODING)
+
+
+def render_zip(members: Sequence[tuple[str, bytes]]) -> bytes:
+    """
+    Deflates members into a zip archive.
+
+    Args:
+        members (Sequence[tuple[str, bytes]]): Filenames and contents.
+
+    Returns:
+        bytes: The archive.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename, content in members:
+            archive.writestr(filename, content)
+    return buffer.getvalue()
+
+
+def render_index(path: str, entries: Sequence[tuple[str, int]]) -> str:
+    """
+    Renders an Apache-style directory listing, like the ones served by danepubliczne.imgw.pl.
+
+    Args:
+        path (str): Path of the directory, starting and ending with "/".
+        entries (Sequence[tuple[str, int]]): Names and sizes of the entries; directory names end with "/".
+
+    Returns:
+        str: The HTML of the listing.
+    """
+    modified = MODIFIED.strftime("%Y-%m-%d %H:%M")
+    parent = path.rstrip("/").rsplit("/", 1)[0] + "/"
+    rows = [
+        '<tr><td valign="top"><img src="/icons/back.gif" alt="[PARENTDIR]"></td>'
+        f'<td><a href="{escape(parent)}">Parent Directory</a></td><td>&nbsp;</td>'
+        '<td align="right">  - </td><td>&nbsp;</td></tr>'
+    ]
+    for name, size in entries:
+        icon, alt = ("folder.gif", "[DIR]") if name.endswith("/") else ("compressed.gif", "   ")
+        shown_size = "  - " if name.endswith("/") else f"{size // 1024}K"
+        rows.append(
+            f'<tr><td valign="top"><img src="/icons/{icon}" alt="{alt}"></td>'
+            f'<td><a href="{escape(name)}">{escape(name)}</a></td>'
+            f'<td align="right">{modified}  </td><td align="right">{shown_size}</td><td>&nbsp;</td></tr>'
+        )
+    return (
+        '<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 3.2 Final//EN">\n'
+        f"<html>\n <head>\n  <title>Index of {escape(path)}</title>\n </head>\n <body>\n"
+        f"<h1>Index of {escape(path)}</h1>\n  <table>\n"
+        '   <tr><th valign="top"><img src="/icons/blank.gif" alt="[ICO]"></th>'
+        '<th><a href="?C=N;O=D">Name</a></th><th><a href="?C=M;O=A">Last modified</a></th>'
+        '<th><a href="?C=S;O=A">Size</a></th><th><a href="?C=D;O=A">Description</a></th></tr>\n'
+        '   <tr><th colspan="5"><hr></th></tr>\n' + "\n".join(rows) + "\n"
+        '   <tr><th colspan="5"><hr></th></tr>\n</table>\n</body></html>\n'
+    )
+
+
+def _write_indexes(root: str) -> None:
+    for directory, subdirs, files in os.walk(root):
+        entries = [(f"{subdir}/", 0) for subdir in sorted(subdirs)]
+        entries += [(name, os.path.getsize(os.path.join(directory, name))) for name in sorted(files)]
+        entries = [entry for entry in entries if entry[0] not in ("index.html", MANIFEST_FILE)]
+        relative = os.path.relpath(directory, root).replace(os.sep, "/")
+        path = "/" if relative == "." else f"/{relative}/"
+        with open(os.path.join(directory, "index.html"), "w") as f:
+            f.write(render_index(path, entries))
+
+
+def _write_archive(tree: SyntheticTree, path: str, content: bytes) -> None:
+    full_path = os.path.join(tree.root, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "wb") as f:
+        f.write(content)
+    tree.archives.append(path)
+    tree.archive_bytes += len(content)
+
+
+def _write_malformed(tree: SyntheticTree, year: int, rng: random.Random) -> None:
+    """Adds archives with the defects seen on the IMGW server."""
+    directory = f"{DATA_ROOT}/dobowe/klimat/{year}"
+    # damaged central directory: recoverable from the local file headers only
+    content = render_csv("k_d", year, 1, 1, False, rng)
+    archive = render_zip([(f"k_d_13_{year}.csv", content)])
+    _write_archive(tree, f"{directory}/{year}_13_k.zip", archive[: archive.rindex(b"PK\x01\x02")])
+    tree.malformed.append(f"{directory}/{year}_13_k.zip")
+    # an error page served under an archive name
+    _write_archive(tree, f"{directory}/{year}_14_k.zip", b"<html><body>503 Service Unavailable</body></html>")
+    tree.malformed.append(f"{directory}/{year}_14_k.zip")
+    # a CSV file whose rows have the wrong number of columns
+    _write_archive(tree, f"{directory}/{year}_15_k.zip", render_zip([(f"k_d_15_{year}.csv", b'"1","2"\r\n')]))
+    tree.malformed.append(f"{directory}/{year}_15_k.zip")
+
+
+def generate_tree(
+    root: str,
+    years: Sequence[int] = (2001,),
+    months: Sequence[int] = tuple(range(1, 13)),
+    stations: int = 10,
+    malformed: bool = True,
+    seed: int = 0,
+) -> SyntheticTree:
+    """
+    Generates a synthetic copy of the IMGW historic data tree.
+
+    Every table type of ARROW_COLUMNS_SCHEMA gets one archive per year and month, laid out and named like on
+    danepubliczne.imgw.pl, with an Apache-style `index.html` in every directory. The manifest of the tree is
+    written to `manifest.json`.
+
+    Args:
+        root (str): Directory the tree is written to.
+        years (Sequence[int]): Years of data. Defaults to (2001,).
+        months (Sequence[int]): Months of data per year. Defaults to all months.
+        stations (int): Number of stations per file. Defaults to 10.
+        malformed (bool): Add a damaged archive, a non-archive and an unparsable CSV file per year. Defaults to True.
+        seed (int): Seed of the measurement values. Defaults to 0.
+
+    Returns:
+        SyntheticTree: The manifest of the tree.
+    """
+    rng = random.Random(seed)  # noqa: S311 - synthetic data, not cryptography
+    tree = SyntheticTree(root)
+    for year in years:
+        for directory, suffix, table_types, hourly in ARCHIVE_LAYOUT:
+            for month in months:
+                members = []
+                for table_type in table_types:
+                    content = render_csv(table_type, year, month, stations, hourly, rng)
+                    members.append((f"{table_type}_{month:02d}_{year}.csv", content))
+                    tree.csv_bytes += len(content)
+                    tree.rows += content.count(b"\n")
+                _write_archive(
+                    tree, f"{DATA_ROOT}/{directory}/{year}/{year}_{month:02d}_{suffix}.zip", render_zip(members)
+                )
+        if malformed:
+            _write_malformed(tree, year, rng)
+    _write_indexes(root)
+    tree.save()
+    return tree
@@ -1,4 +1,43 @@
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from .logging_config import get_logger as get_logger
 from .logging_config import setup_logging as setup_logging
-from .schema import ARROW_COLUMNS_SCHEMA as ARROW_COLUMNS_SCHEMA
-from .schema import DLT_COLUMNS_SCHEMA as DLT_COLUMNS_SCHEMA
+from .memory_budget import MIB as MIB
+from .memory_budget import MemoryBudget as MemoryBudget
+from .memory_budget import Reservation as Reservation
+from .memory_budget import get_memory_budget as get_memory_budget
+from .metrics import RunMetrics as RunMetrics
+from .metrics import StageMetrics as StageMetrics
+from .metrics import get_run_metrics as get_run_metrics
+
+if TYPE_CHECKING:
+    from .schema import ARROW_COLUMNS_SCHEMA as ARROW_COLUMNS_SCHEMA
+    from .schema import ARROW_DERIVED_COLUMNS as ARROW_DERIVED_COLUMNS
+    from .schema import DLT_COLUMNS_SCHEMA as DLT_COLUMNS_SCHEMA
+    from .schema import PARTITION_COLUMNS as PARTITION_COLUMNS
+    from .schema import PRIMARY_KEYS as PRIMARY_KEYS
+    from .schema import REAL_TIME_ARROW_SCHEMA as REAL_TIME_ARROW_SCHEMA
+    from .schema import REAL_TIME_PRIMARY_KEYS as REAL_TIME_PRIMARY_KEYS
+    from .schema import SORT_KEYS as SORT_KEYS
+
+# the schemas are imported on first access, they need dlt and pyarrow while logging and metrics do not
+_LAZY_IMPORTS = {
+    "ARROW_COLUMNS_SCHEMA": ".schema",
+    "ARROW_DERIVED_COLUMNS": ".schema",
+    "DLT_COLUMNS_SCHEMA": ".schema",
+    "PARTITION_COLUMNS": ".schema",
+    "PRIMARY_KEYS": ".schema",
+    "REAL_TIME_ARROW_SCHEMA": ".schema",
+    "REAL_TIME_PRIMARY_KEYS": ".schema",
+    "SORT_KEYS": ".schema",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")  # noqa: TRY003
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
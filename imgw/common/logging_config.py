@@ -1,7 +1,13 @@
+import atexit
+import json
 import logging
 import logging.config
+import logging.handlers
+import queue
 import sys
-from typing import Optional
+import threading
+import time
+from typing import Any, Optional
 
 BLACK, RED, GREEN, YELLOW, BLUE, MAGENTA, CYAN, WHITE = range(8)
 
@@ -17,20 +23,129 @@ COLORS = {
     "ERROR": RED,
 }
 
+# attributes of every LogRecord; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
 
-def setup_logging() -> None:
-    class ColoredFormatter(logging.Formatter):
-        def __init__(self, fmt: str, datefmt: Optional[str] = None, use_color: bool = True) -> None:
-            logging.Formatter.__init__(self, fmt, datefmt)
-            self.use_color = use_color
+DEFAULT_DEBUG_RATE_LIMIT = 10.0
 
-        def format(self, record: logging.LogRecord) -> str:
-            levelname = record.levelname
-            if self.use_color and levelname in COLORS:
-                levelname_color = COLOR_SEQ % (30 + COLORS[levelname]) + levelname + RESET_SEQ
-                record.levelname = levelname_color
-            return logging.Formatter.format(self, record)
+_listener: Optional[logging.handlers.QueueListener] = None
 
+
+class ColoredFormatter(logging.Formatter):
+    def __init__(self, fmt: str, datefmt: Optional[str] = None, use_color: bool = True) -> None:
+        logging.Formatter.__init__(self, fmt, datefmt)
+        self.use_color = use_color
+
+    def format(self, record: logging.LogRecord) -> str:
+        levelname = record.levelname
+        if self.use_color and levelname in COLORS:
+            # color a copy, so other handlers of the record do not get the escape sequences
+            record = logging.makeLogRecord(record.__dict__)
+            record.levelname = COLOR_SEQ % (30 + COLORS[levelname]) + levelname + RESET_SEQ
+        return logging.Formatter.format(self, record)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects, including fields passed in `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_")
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DebugRateLimitFilter(logging.Filter):
+    """
+    Passes at most `rate` DEBUG records per second for every logger and message template.
+
+    Hot paths log the same template thousands of times (e.g. one record per crawled link); the surplus
+    records are dropped before they are formatted, and the next record passed for the template reports how
+    many were suppressed. Records above DEBUG always pass.
+
+    Args:
+        rate (float): Records per second passed for every template. Defaults to DEFAULT_DEBUG_RATE_LIMIT.
+    """
+
+    def __init__(self, rate: float = DEFAULT_DEBUG_RATE_LIMIT) -> None:
+        super().__init__()
+        self.rate = rate
+        self._lock = threading.Lock()
+        # (logger, template) -> [window start, records passed, records suppressed]
+        self._windows: dict[tuple[str, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        # a filter shared by several handlers decides once per record
+        decision = getattr(record, "_rate_limit_passed", None)
+        if decision is not None:
+            return bool(decision)
+        passed = self._passes(record)
+        record._rate_limit_passed = passed
+        return passed
+
+    def _passes(self, record: logging.LogRecord) -> bool:
+        template = record.msg if isinstance(record.msg, str) else type(record.msg).__name__
+        key = (record.name, template)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= 1.0:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.rate:
+                window[1] += 1
+                return True
+            else:
+                window[2] += 1
+                return False
+        if suppressed:
+            record.msg = f"{template} ({suppressed} similar messages suppressed)"
+        return True
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def setup_logging(
+    use_queue: bool = True,
+    json_format: bool = False,
+    debug_rate_limit: Optional[float] = DEFAULT_DEBUG_RATE_LIMIT,
+) -> None:
+    """
+    Configures the root logger to log to stdout and to `log.log`.
+
+    Args:
+        use_queue (bool): Hand records to a queue served by a background thread, so worker threads never wait on
+            console or file I/O. Defaults to True.
+        json_format (bool): Log single-line JSON objects, including fields passed in `extra`, instead of text.
+            Defaults to False.
+        debug_rate_limit (Optional[float]): DEBUG records per second passed for every message template.
+            Defaults to DEFAULT_DEBUG_RATE_LIMIT; None disables the limit.
+    """
+    global _listener
+    _stop_listener()
     LOGGING_CONFIG = {
         "version": 1,
         "disable_existing_loggers": False,
@@ -45,23 +160,42 @@ def setup_logging() -> None:
                 "format": "%(asctime)s [%(levelname)s] %(name)s:%(lineno)d - %(message)s",
                 "datefmt": "%Y-%m-%d %H:%M:%S",
             },
+            "json": {
+                "()": JsonFormatter,
+                "datefmt": "%Y-%m-%dT%H:%M:%S%z",
+            },
         },
         "handlers": {
             "console": {
                 "class": "logging.StreamHandler",
                 "stream": sys.stdout,
-                "formatter": "colored",
+                "formatter": "json" if json_format else "colored",
             },
             "file": {
                 "class": "logging.FileHandler",
                 "filename": "log.log",
-                "formatter": "verbose",
+                "formatter": "json" if json_format else "verbose",
             },
         },
         "root": {"handlers": ["console", "file"], "level": "INFO"},
     }
     logging.config.dictConfig(LOGGING_CONFIG)
 
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    if use_queue:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        for handler in handlers:
+            root.removeHandler(handler)
+        handlers = [logging.handlers.QueueHandler(log_queue)]
+        root.addHandler(handlers[0])
+    if debug_rate_limit is not None:
+        rate_limit = DebugRateLimitFilter(debug_rate_limit)
+        for handler in handlers:
+            handler.addFilter(rate_limit)
+
 
 def get_logger(module_name: str) -> logging.Logger:
     return logging.getLogger(module_name)
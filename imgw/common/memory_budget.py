@@ -0,0 +1,175 @@
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from typing import Optional
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MIB = 1024 * 1024
+
+
+class MemoryBudget:
+    """
+    Byte budget shared by the stages of a pipeline run.
+
+    Entry points of the pipeline (downloads) `reserve` an estimate of the data they are about to bring in and wait
+    until it fits, while later stages account the data they hold with non-blocking `acquire` calls and `release` it
+    once it has been handed over. Only entry points block, so a stage holding data can never wait on a stage
+    downstream of it.
+
+    Args:
+        max_bytes (int): The budget in bytes.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.peak = 0
+        self._condition = threading.Condition()
+
+    def reserve(self, nbytes: int, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until `nbytes` fit into the budget next to the bytes in flight, then accounts them.
+
+        A reservation larger than the whole budget is admitted once nothing else is in flight, so it cannot wait
+        forever.
+
+        Args:
+            nbytes (int): Number of bytes.
+            timeout (Optional[float]): Maximum number of seconds to wait. Defaults to None (no limit).
+
+        Returns:
+            bool: True if the bytes were accounted, False if the timeout expired.
+        """
+
+        def fits() -> bool:
+            return self.used == 0 or self.used + nbytes <= self.max_bytes
+
+        with self._condition:
+            if not fits():
+                logger.info(
+                    "Memory budget exhausted (%d of %d MiB in flight, %d MiB requested), waiting",
+                    self.used // MIB,
+                    self.max_bytes // MIB,
+                    nbytes // MIB,
+                )
+            if not self._condition.wait_for(fits, timeout):
+                return False
+            self.acquire(nbytes)
+            return True
+
+    def acquire(self, nbytes: int) -> None:
+        """
+        Accounts bytes held by a stage. Never blocks.
+
+        Args:
+            nbytes (int): Number of bytes.
+        """
+        with self._condition:
+            self.used += nbytes
+            self.peak = max(self.peak, self.used)
+            logger.debug("Memory budget: %d of %d MiB in flight", self.used // MIB, self.max_bytes // MIB)
+
+    def release(self, nbytes: int) -> None:
+        """
+        Returns bytes accounted with `acquire` or `reserve` and wakes up waiting entry points.
+
+        Args:
+            nbytes (int): Number of bytes.
+        """
+        with self._condition:
+            self.used = max(self.used - nbytes, 0)
+            self._condition.notify_all()
+
+    @contextmanager
+    def hold(self, nbytes: int) -> Iterator[None]:
+        """
+        Accounts bytes for the duration of the context.
+
+        Args:
+            nbytes (int): Number of bytes.
+        """
+        self.acquire(nbytes)
+        try:
+            yield
+        finally:
+            self.release(nbytes)
+
+
+class Reservation:
+    """
+    Bytes reserved in a memory budget for data that is not there yet.
+
+    An entry point reserves an estimate before it fetches data, `resize`s the reservation once the actual size is
+    known and hands parts of it over to later stages, which release them from the budget. Reservations are not
+    thread-safe, each belongs to a single fetch.
+
+    Args:
+        budget (MemoryBudget): The memory budget.
+    """
+
+    def __init__(self, budget: MemoryBudget) -> None:
+        self.budget = budget
+        self.nbytes = 0
+
+    def reserve(self, nbytes: int, timeout: Optional[float] = None) -> bool:
+        """
+        Adds bytes to the reservation, blocking until they fit into the budget, see `MemoryBudget.reserve`.
+
+        Args:
+            nbytes (int): Number of bytes.
+            timeout (Optional[float]): Maximum number of seconds to wait. Defaults to None (no limit).
+
+        Returns:
+            bool: True if the bytes were reserved, False if the timeout expired.
+        """
+        if not self.budget.reserve(nbytes, timeout):
+            return False
+        self.nbytes += nbytes
+        return True
+
+    def resize(self, nbytes: int) -> None:
+        """
+        Replaces the estimate with the actual size. Never blocks.
+
+        Args:
+            nbytes (int): Number of bytes.
+        """
+        if nbytes > self.nbytes:
+            self.budget.acquire(nbytes - self.nbytes)
+        else:
+            self.budget.release(self.nbytes - nbytes)
+        self.nbytes = nbytes
+
+    def hand_over(self, nbytes: int) -> None:
+        """
+        Moves bytes out of the reservation to a later stage, which releases them from the budget. Never blocks.
+
+        Args:
+            nbytes (int): Number of bytes.
+        """
+        if nbytes > self.nbytes:
+            self.budget.acquire(nbytes - self.nbytes)
+        self.nbytes = max(self.nbytes - nbytes, 0)
+
+    def release(self) -> None:
+        """Returns the bytes left in the reservation to the budget."""
+        self.budget.release(self.nbytes)
+        self.nbytes = 0
+
+
+@cache
+def get_memory_budget(max_bytes: int) -> MemoryBudget:
+    """
+    Returns the memory budget of a given size, shared by all threads of the process.
+
+    Args:
+        max_bytes (int): The budget in bytes.
+
+    Returns:
+        MemoryBudget: The memory budget.
+    """
+    return MemoryBudget(max_bytes)
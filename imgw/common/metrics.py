@@ -0,0 +1,245 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from .logging_config import get_logger
+from .memory_budget import MIB
+
+if TYPE_CHECKING:
+    from dlt.pipeline.trace import PipelineTrace
+
+logger = get_logger(__name__)
+
+# dlt steps recorded from the pipeline trace
+DLT_STAGES = ("normalize", "load")
+
+TStageKey = tuple[str, str]
+
+
+@dataclass(slots=True)
+class StageMetrics:
+    """
+    Counters of a pipeline stage.
+
+    `seconds` is the time spent in the stage summed over all threads and processes, while `started` and
+    `finished` (epoch seconds) delimit its wall time.
+    """
+
+    seconds: float = 0.0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    rows: int = 0
+    files: int = 0
+    failures: int = 0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    def add(self, other: "StageMetrics") -> None:
+        """Adds the counters of another sample of the same stage."""
+        self.seconds += other.seconds
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.rows += other.rows
+        self.files += other.files
+        self.failures += other.failures
+        if other.started is not None:
+            self.started = other.started if self.started is None else min(self.started, other.started)
+        if other.finished is not None:
+            self.finished = other.finished if self.finished is None else max(self.finished, other.finished)
+
+    @property
+    def wall_seconds(self) -> float:
+        """Time from the start of the first to the end of the last sample."""
+        if self.started is None or self.finished is None:
+            return self.seconds
+        return self.finished - self.started
+
+    def as_dict(self) -> dict[str, Union[int, float]]:
+        """Returns the counters with throughput over the wall time of the stage."""
+        wall_seconds = self.wall_seconds
+        return {
+            "seconds": round(self.seconds, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "rows": self.rows,
+            "files": self.files,
+            "failures": self.failures,
+            "mb_per_s": round(self.bytes_in / MIB / wall_seconds, 2) if wall_seconds else 0.0,
+            "rows_per_s": round(self.rows / wall_seconds, 1) if wall_seconds else 0.0,
+        }
+
+
+class RunMetrics:
+    """
+    Thread-safe per-stage metrics of a pipeline run, keyed by stage and table type.
+
+    Stages record samples with `measure` or `record`. Every sample is also emitted as a DEBUG log record with
+    the counters in its `extra` fields, so structured log handlers can export them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: dict[TStageKey, StageMetrics] = {}
+
+    def add(self, stage: str, sample: StageMetrics, table_type: str = "") -> None:
+        """
+        Adds a sample to the counters of a stage.
+
+        Args:
+            stage (str): Name of the stage, e.g. "parse".
+            sample (StageMetrics): The sample.
+            table_type (str): Table type the sample belongs to. Defaults to "" (no table type).
+        """
+        with self._lock:
+            self._stages.setdefault((stage, table_type), StageMetrics()).add(sample)
+        logger.debug(
+            "%s %s: %.3fs, %d bytes in, %d bytes out, %d rows, %d failures",
+            stage,
+            table_type,
+            sample.seconds,
+            sample.bytes_in,
+            sample.bytes_out,
+            sample.rows,
+            sample.failures,
+            extra={"stage": stage, "table_type": table_type, "metrics": asdict(sample)},
+        )
+
+    def record(self, stage: str, table_type: str = "", **counters: Any) -> None:
+        """
+        Records a sample given as keyword counters, e.g. `record("load", "s_t", rows=10)`.
+
+        Args:
+            stage (str): Name of the stage.
+            table_type (str): Table type the sample belongs to. Defaults to "".
+            **counters (Any): Fields of StageMetrics.
+        """
+        self.add(stage, StageMetrics(**counters), table_type)
+
+    @contextmanager
+    def measure(self, stage: str, table_type: str = "") -> Iterator[StageMetrics]:
+        """
+        Times the body of the context as a sample of a stage.
+
+        The yielded sample can be updated with counters inside the body. Exceptions count as failures.
+
+        Args:
+            stage (str): Name of the stage.
+            table_type (str): Table type the sample belongs to. Defaults to "".
+
+        Yields:
+            StageMetrics: The sample.
+        """
+        sample = StageMetrics(started=time.time())
+        started = time.perf_counter()
+        try:
+            yield sample
+        except Exception:
+            sample.failures += 1
+            raise
+        finally:
+            sample.seconds += time.perf_counter() - started
+            sample.finished = time.time()
+            self.add(stage, sample, table_type)
+
+    def record_trace(self, trace: "PipelineTrace") -> None:
+        """
+        Records the normalize and load steps of a dlt pipeline run, with rows per table.
+
+        Args:
+            trace (PipelineTrace): Trace of the run, e.g. `pipeline.last_trace`.
+        """
+        for step in trace.steps:
+            if step.step not in DLT_STAGES or step.finished_at is None:
+                continue
+            self.record(
+                step.step,
+                seconds=(step.finished_at - step.started_at).total_seconds(),
+                started=step.started_at.timestamp(),
+                finished=step.finished_at.timestamp(),
+                failures=int(step.step_exception is not None),
+            )
+        normalize_info = trace.last_normalize_info
+        if normalize_info is not None:
+            for table_name, rows in normalize_info.row_counts.items():
+                if not table_name.startswith("_dlt"):
+                    self.record("load", table_name, rows=rows)
+
+    def snapshot(self) -> dict[TStageKey, StageMetrics]:
+        """Returns a copy of the counters, e.g. to send them from a worker process."""
+        with self._lock:
+            copies = {}
+            for key, metrics in self._stages.items():
+                copy = StageMetrics()
+                copy.add(metrics)
+                copies[key] = copy
+            return copies
+
+    def merge(self, snapshot: dict[TStageKey, StageMetrics]) -> None:
+        """Adds counters of a snapshot, e.g. one returned by a worker process."""
+        with self._lock:
+            for key, metrics in snapshot.items():
+                self._stages.setdefault(key, StageMetrics()).add(metrics)
+
+    def reset(self) -> None:
+        """Clears all counters, e.g. at the start of a run."""
+        with self._lock:
+            self._stages.clear()
+
+    def stages(self) -> dict[str, StageMetrics]:
+        """Returns the counters of every stage summed over table types."""
+        totals: dict[str, StageMetrics] = {}
+        for (stage, _), metrics in self.snapshot().items():
+            totals.setdefault(stage, StageMetrics()).add(metrics)
+        return totals
+
+    def summary(self) -> dict[str, Union[int, float]]:
+        """
+        Returns a flat summary of the run: per-stage totals as `<stage>/<counter>`, plus rows and failures
+        per table type as `<stage>/<table_type>/<counter>`.
+
+        Returns:
+            dict[str, Union[int, float]]: The summary.
+        """
+        summary: dict[str, Union[int, float]] = {}
+        for stage, totals in self.stages().items():
+            for counter, value in totals.as_dict().items():
+                summary[f"{stage}/{counter}"] = value
+        for (stage, table_type), metrics in sorted(self.snapshot().items()):
+            if table_type:
+                summary[f"{stage}/{table_type}/rows"] = metrics.rows
+                summary[f"{stage}/{table_type}/failures"] = metrics.failures
+        return summary
+
+    def log_summary(self) -> None:
+        """Logs one INFO record per stage, with the counters in its `extra` fields."""
+        for stage, totals in self.stages().items():
+            counters = totals.as_dict()
+            logger.info(
+                "Stage %s: %.1fs wall, %.1fs busy, %d files, %d rows, %.1f MB/s, %.0f rows/s, %d failures",
+                stage,
+                counters["wall_seconds"],
+                counters["seconds"],
+                counters["files"],
+                counters["rows"],
+                counters["mb_per_s"],
+                counters["rows_per_s"],
+                counters["failures"],
+                extra={"stage": stage, "metrics": counters},
+            )
+
+
+_run_metrics = RunMetrics()
+
+
+def get_run_metrics() -> RunMetrics:
+    """
+    Returns the run metrics of the process, shared by all threads.
+
+    Returns:
+        RunMetrics: The run metrics.
+    """
+    return _run_metrics
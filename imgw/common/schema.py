@@ -1,29 +1,33 @@
 import pyarrow as pa
 from dlt.common.schema import TTableSchemaColumns
 
+# low-cardinality text (measurement status flags, station names) is dictionary-encoded from parse onward
+DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+
 ### klimat
 K_D_T_COLUMNS = {
     "station_code": pa.int64(),
-    "station_name": pa.string(),
-    "year": pa.int64(),
-    "month": pa.int64(),
-    "day": pa.int64(),
+    "station_name": DICTIONARY_STRING,
+    "year": pa.int16(),
+    "month": pa.int8(),
+    "day": pa.int8(),
     "temp_daily_average": pa.float64(),
-    "temp_average_status": pa.string(),
+    "temp_average_status": DICTIONARY_STRING,
     "humidity_daily_average": pa.float64(),
-    "humidity_status": pa.string(),
+    "humidity_status": DICTIONARY_STRING,
     "wind_speed_daily_average": pa.float64(),
-    "wind_speed_status": pa.string(),
+    "wind_speed_status": DICTIONARY_STRING,
     "cloud_coverage_daily_average": pa.float64(),
-    "cloud_coverage_status": pa.string(),
+    "cloud_coverage_status": DICTIONARY_STRING,
 }
 
 K_D_T_COLUMNS_DLT: TTableSchemaColumns = {
     "station_code": {"data_type": "bigint"},
     "station_name": {"data_type": "text"},
-    "year": {"data_type": "bigint"},
-    "month": {"data_type": "bigint"},
-    "day": {"data_type": "bigint"},
+    "year": {"data_type": "bigint", "precision": 16},
+    "month": {"data_type": "bigint", "precision": 8},
+    "day": {"data_type": "bigint", "precision": 8},
+    "measurement_date": {"data_type": "date"},
     "temp_daily_average": {"data_type": "double"},
     "temp_daily_average_status": {"data_type": "text"},
     "humidity_daily_average": {"data_type": "double"},
@@ -36,31 +40,32 @@ K_D_T_COLUMNS_DLT: TTableSchemaColumns = {
 
 K_D_COLUMNS = {
     "station_code": pa.int64(),
-    "station_name": pa.string(),
-    "year": pa.int64(),
-    "month": pa.int64(),
-    "day": pa.int64(),
+    "station_name": DICTIONARY_STRING,
+    "year": pa.int16(),
+    "month": pa.int8(),
+    "day": pa.int8(),
     "temp_daily_max": pa.float64(),
-    "temp_daily_max_status": pa.string(),
+    "temp_daily_max_status": DICTIONARY_STRING,
     "temp_daily_min": pa.float64(),
-    "temp_daily_min_status": pa.string(),
+    "temp_daily_min_status": DICTIONARY_STRING,
     "temp_daily_average": pa.float64(),
-    "temp_daily_average_status": pa.string(),
+    "temp_daily_average_status": DICTIONARY_STRING,
     "ground_temp_min": pa.float64(),
-    "ground_temp_status": pa.string(),
+    "ground_temp_status": DICTIONARY_STRING,
     "precipitation_daily_total": pa.float64(),
-    "precipitation_status": pa.string(),
+    "precipitation_status": DICTIONARY_STRING,
     "precipitation_type": pa.string(),
     "snow_coverage_height": pa.float64(),
-    "snow_coverage_status": pa.string(),
+    "snow_coverage_status": DICTIONARY_STRING,
 }
 
 K_D_COLUMNS_DLT: TTableSchemaColumns = {
     "station_code": {"data_type": "bigint"},
     "station_name": {"data_type": "text"},
-    "year": {"data_type": "bigint"},
-    "month": {"data_type": "bigint"},
-    "day": {"data_type": "bigint"},
+    "year": {"data_type": "bigint", "precision": 16},
+    "month": {"data_type": "bigint", "precision": 8},
+    "day": {"data_type": "bigint", "precision": 8},
+    "measurement_date": {"data_type": "date"},
     "temp_daily_max": {"data_type": "double"},
     "temp_max_status": {"data_type": "text"},
     "temp_daily_min": {"data_type": "double"},
@@ -79,29 +84,30 @@ K_D_COLUMNS_DLT: TTableSchemaColumns = {
 ### opady
 O_D_COLUMNS = {
     "station_code": pa.int64(),
-    "station_name": pa.string(),
-    "year": pa.int64(),
-    "month": pa.int64(),
-    "day": pa.int64(),
+    "station_name": DICTIONARY_STRING,
+    "year": pa.int16(),
+    "month": pa.int8(),
+    "day": pa.int8(),
     "precipitation_daily_total": pa.float64(),  # Suma dobowa opadów [mm]
-    "precipitation_daily_total_status": pa.string(),  # Status pomiaru SMDB
+    "precipitation_daily_total_status": DICTIONARY_STRING,  # Status pomiaru SMDB
     "precipitation_type": pa.string(),  # Rodzaj opadu [S/W/ ]
     "snow_cover_height": pa.float64(),  # Wysokość pokrywy śnieżnej [cm] - float safer
-    "snow_cover_height_status": pa.string(),  # Status pomiaru PKSN
+    "snow_cover_height_status": DICTIONARY_STRING,  # Status pomiaru PKSN
     "fresh_snow_height": pa.float64(),  # Wysokość świeżospałego śniegu [cm] - float safer
-    "fresh_snow_height_status": pa.string(),  # Status pomiaru HSS
+    "fresh_snow_height_status": DICTIONARY_STRING,  # Status pomiaru HSS
     "snow_type_code": pa.string(),  # Gatunek śniegu [kod]
-    "snow_type_code_status": pa.string(),  # Status pomiaru GATS
+    "snow_type_code_status": DICTIONARY_STRING,  # Status pomiaru GATS
     "snow_cover_type_code": pa.string(),  # Rodzaj pokrywy śnieżnej [kod] - length 5 suggests string code
-    "snow_cover_type_code_status": pa.string(),  # Status pomiaru RPSN
+    "snow_cover_type_code_status": DICTIONARY_STRING,  # Status pomiaru RPSN
 }
 
 O_D_COLUMNS_DLT: TTableSchemaColumns = {
     "station_code": {"data_type": "bigint"},
     "station_name": {"data_type": "text"},
-    "year": {"data_type": "bigint"},
-    "month": {"data_type": "bigint"},
-    "day": {"data_type": "bigint"},
+    "year": {"data_type": "bigint", "precision": 16},
+    "month": {"data_type": "bigint", "precision": 8},
+    "day": {"data_type": "bigint", "precision": 8},
+    "measurement_date": {"data_type": "date"},
     "precipitation_daily_total": {"data_type": "double"},
     "precipitation_daily_total_status": {"data_type": "text"},
     "precipitation_type": {"data_type": "text"},  # Single character type
@@ -117,78 +123,79 @@ O_D_COLUMNS_DLT: TTableSchemaColumns = {
 
 S_D_COLUMNS = {
     "station_code": pa.int64(),
-    "station_name": pa.string(),
-    "year": pa.int64(),
-    "month": pa.int64(),
-    "day": pa.int64(),
+    "station_name": DICTIONARY_STRING,
+    "year": pa.int16(),
+    "month": pa.int8(),
+    "day": pa.int8(),
     "temp_daily_max": pa.float64(),
-    "temp_daily_max_status": pa.string(),
+    "temp_daily_max_status": DICTIONARY_STRING,
     "temp_daily_min": pa.float64(),
-    "temp_daily_min_status": pa.string(),
+    "temp_daily_min_status": DICTIONARY_STRING,
     "temp_daily_average": pa.float64(),
-    "temp_daily_average_status": pa.string(),
+    "temp_daily_average_status": DICTIONARY_STRING,
     "ground_temp_min": pa.float64(),
-    "ground_temp_min_status": pa.string(),
+    "ground_temp_min_status": DICTIONARY_STRING,
     "precipitation_daily_total": pa.float64(),
-    "precipitation_daily_total_status": pa.string(),  # Adjusted name based on SMDB
+    "precipitation_daily_total_status": DICTIONARY_STRING,  # Adjusted name based on SMDB
     "precipitation_type": pa.string(),
     "snow_coverage_height": pa.float64(),  # Assuming float is safer even if width is 5
-    "snow_coverage_height_status": pa.string(),  # Adjusted name based on PKSN
+    "snow_coverage_height_status": DICTIONARY_STRING,  # Adjusted name based on PKSN
     "snow_water_equivalent": pa.float64(),
-    "snow_water_equivalent_status": pa.string(),
+    "snow_water_equivalent_status": DICTIONARY_STRING,
     "sunshine_duration": pa.float64(),
-    "sunshine_duration_status": pa.string(),
+    "sunshine_duration_status": DICTIONARY_STRING,
     "duration_rain": pa.float64(),
-    "duration_rain_status": pa.string(),
+    "duration_rain_status": DICTIONARY_STRING,
     "duration_snow": pa.float64(),
-    "duration_snow_status": pa.string(),
+    "duration_snow_status": DICTIONARY_STRING,
     "duration_sleet": pa.float64(),  # Deszcz ze śniegiem = Sleet/Rain and snow
-    "duration_sleet_status": pa.string(),
+    "duration_sleet_status": DICTIONARY_STRING,
     "duration_hail": pa.float64(),
-    "duration_hail_status": pa.string(),
+    "duration_hail_status": DICTIONARY_STRING,
     "duration_fog": pa.float64(),
-    "duration_fog_status": pa.string(),
+    "duration_fog_status": DICTIONARY_STRING,
     "duration_mist": pa.float64(),  # Zamglenie = Mist
-    "duration_mist_status": pa.string(),
+    "duration_mist_status": DICTIONARY_STRING,
     "duration_rime": pa.float64(),  # Sadź = Rime
-    "duration_rime_status": pa.string(),
+    "duration_rime_status": DICTIONARY_STRING,
     "duration_glaze": pa.float64(),  # Gołoledź = Glaze ice
-    "duration_glaze_status": pa.string(),
+    "duration_glaze_status": DICTIONARY_STRING,
     "duration_low_drifting_snow": pa.float64(),  # Zamieć śnieżna niska = Low drifting snow
-    "duration_low_drifting_snow_status": pa.string(),
+    "duration_low_drifting_snow_status": DICTIONARY_STRING,
     "duration_high_drifting_snow": pa.float64(),  # Zamieć śnieżna wysoka = High drifting snow
-    "duration_high_drifting_snow_status": pa.string(),
+    "duration_high_drifting_snow_status": DICTIONARY_STRING,
     "duration_haze": pa.float64(),  # Zmętnienie = Haze/Turbidity
-    "duration_haze_status": pa.string(),
+    "duration_haze_status": DICTIONARY_STRING,
     "duration_wind_gte_10mps": pa.float64(),  # Wiatr >= 10m/s
-    "duration_wind_gte_10mps_status": pa.string(),
+    "duration_wind_gte_10mps_status": DICTIONARY_STRING,
     "duration_wind_gt_15mps": pa.float64(),  # Wiatr > 15m/s
-    "duration_wind_gt_15mps_status": pa.string(),
+    "duration_wind_gt_15mps_status": DICTIONARY_STRING,
     "duration_thunderstorm": pa.float64(),  # Burza = Thunderstorm
-    "duration_thunderstorm_status": pa.string(),
+    "duration_thunderstorm_status": DICTIONARY_STRING,
     "duration_dew": pa.float64(),  # Rosa = Dew
-    "duration_dew_status": pa.string(),
+    "duration_dew_status": DICTIONARY_STRING,
     "duration_frost": pa.float64(),  # Szron = Frost
-    "duration_frost_status": pa.string(),
+    "duration_frost_status": DICTIONARY_STRING,
     "occurrence_snow_cover": pa.int64(),  # Wystąpienie pokrywy śnieżnej [0/1]
-    "occurrence_snow_cover_status": pa.string(),
+    "occurrence_snow_cover_status": DICTIONARY_STRING,
     "occurrence_lightning": pa.int64(),  # Wystąpienie błyskawicy [0/1]
-    "occurrence_lightning_status": pa.string(),
+    "occurrence_lightning_status": DICTIONARY_STRING,
     "ground_state": pa.string(),  # Stan gruntu [Z/R] - Frozen/Thawed? Assuming string
     "isotherm_lower": pa.float64(),  # Izoterma dolna [cm]
-    "isotherm_lower_status": pa.string(),
+    "isotherm_lower_status": DICTIONARY_STRING,
     "isotherm_upper": pa.float64(),  # Izoterma górna [cm]
-    "isotherm_upper_status": pa.string(),
+    "isotherm_upper_status": DICTIONARY_STRING,
     "actinometry": pa.float64(),  # Aktynometria [J/cm2]
-    "actinometry_status": pa.string(),
+    "actinometry_status": DICTIONARY_STRING,
 }
 
 S_D_COLUMNS_DLT: TTableSchemaColumns = {
     "station_code": {"data_type": "bigint"},
     "station_name": {"data_type": "text"},
-    "year": {"data_type": "bigint"},
-    "month": {"data_type": "bigint"},
-    "day": {"data_type": "bigint"},
+    "year": {"data_type": "bigint", "precision": 16},
+    "month": {"data_type": "bigint", "precision": 8},
+    "day": {"data_type": "bigint", "precision": 8},
+    "measurement_date": {"data_type": "date"},
     "temp_daily_max": {"data_type": "double"},
     "temp_daily_max_status": {"data_type": "text"},
     "temp_daily_min": {"data_type": "double"},
@@ -253,36 +260,37 @@ S_D_COLUMNS_DLT: TTableSchemaColumns = {
 
 S_D_T_COLUMNS = {
     "station_code": pa.int64(),
-    "station_name": pa.string(),
-    "year": pa.int64(),
-    "month": pa.int64(),
-    "day": pa.int64(),
+    "station_name": DICTIONARY_STRING,
+    "year": pa.int16(),
+    "month": pa.int8(),
+    "day": pa.int8(),
     "average_daily_cloud_cover": pa.float64(),  # Zachmurzenie ogólne [oktanty]
-    "cloud_cover_status": pa.string(),  # Status pomiaru NOS
+    "cloud_cover_status": DICTIONARY_STRING,  # Status pomiaru NOS
     "average_daily_wind_speed": pa.float64(),  # Prędkość wiatru [m/s]
-    "wind_speed_status": pa.string(),  # Status pomiaru FWS
+    "wind_speed_status": DICTIONARY_STRING,  # Status pomiaru FWS
     "temp_daily_average": pa.float64(),  # Temperatura [°C] (Assuming same as previous schema's average)
-    "temp_daily_average_status": pa.string(),  # Status pomiaru TEMP
+    "temp_daily_average_status": DICTIONARY_STRING,  # Status pomiaru TEMP
     "average_daily_vapor_pressure": pa.float64(),  # Ciśnienie pary wodnej [hPa]
-    "vapor_pressure_status": pa.string(),  # Status pomiaru CPW
+    "vapor_pressure_status": DICTIONARY_STRING,  # Status pomiaru CPW
     "average_daily_relative_humidity": pa.float64(),  # Wilgotność względna [%]
-    "relative_humidity_status": pa.string(),  # Status pomiaru WLGS
+    "relative_humidity_status": DICTIONARY_STRING,  # Status pomiaru WLGS
     "average_daily_station_pressure": pa.float64(),  # Ciśnienie na poziomie stacji [hPa]
-    "station_pressure_status": pa.string(),  # Status pomiaru PPPS
+    "station_pressure_status": DICTIONARY_STRING,  # Status pomiaru PPPS
     "average_daily_sea_level_pressure": pa.float64(),  # Ciśnienie na poziomie morza [hPa]
-    "sea_level_pressure_status": pa.string(),  # Status pomiaru PPPM
+    "sea_level_pressure_status": DICTIONARY_STRING,  # Status pomiaru PPPM
     "precipitation_sum_day": pa.float64(),  # Suma opadu dzień [mm]
-    "precipitation_sum_day_status": pa.string(),  # Status pomiaru WODZ
+    "precipitation_sum_day_status": DICTIONARY_STRING,  # Status pomiaru WODZ
     "precipitation_sum_night": pa.float64(),  # Suma opadu noc [mm]
-    "precipitation_sum_night_status": pa.string(),  # Status pomiaru WONO
+    "precipitation_sum_night_status": DICTIONARY_STRING,  # Status pomiaru WONO
 }
 
 S_D_T_COLUMNS_DLT: TTableSchemaColumns = {
     "station_code": {"data_type": "bigint"},
     "station_name": {"data_type": "text"},
-    "year": {"data_type": "bigint"},
-    "month": {"data_type": "bigint"},
-    "day": {"data_type": "bigint"},
+    "year": {"data_type": "bigint", "precision": 16},
+    "month": {"data_type": "bigint", "precision": 8},
+    "day": {"data_type": "bigint", "precision": 8},
+    "measurement_date": {"data_type": "date"},
     "average_daily_cloud_cover": {"data_type": "double"},
     "cloud_cover_status": {"data_type": "text"},
     "average_daily_wind_speed": {"data_type": "double"},
@@ -305,36 +313,37 @@ S_D_T_COLUMNS_DLT: TTableSchemaColumns = {
 
 K_T_COLUMNS = {
     "station_code": pa.int64(),
-    "station_name": pa.string(),
-    "year": pa.int64(),
-    "month": pa.int64(),
-    "day": pa.int64(),
-    "hour": pa.int64(),  # Godzina
+    "station_name": DICTIONARY_STRING,
+    "year": pa.int16(),
+    "month": pa.int8(),
+    "day": pa.int8(),
+    "hour": pa.int8(),  # Godzina
     "air_temperature": pa.float64(),  # Temperatura powietrza [°C]
-    "air_temperature_status": pa.string(),  # Status pomiaru TEMP
+    "air_temperature_status": DICTIONARY_STRING,  # Status pomiaru TEMP
     "wet_bulb_temperature": pa.float64(),  # Temperatura termometru zwilżonego [°C]
-    "wet_bulb_temperature_status": pa.string(),  # Status pomiaru TTZW
+    "wet_bulb_temperature_status": DICTIONARY_STRING,  # Status pomiaru TTZW
     "ice_indicator": pa.string(),  # Wskaźnik lodu [L/W] - Assuming single character code
     "ventilation_indicator": pa.string(),  # Wskaźnik wentylacji [W/N] - Assuming single character code
     "relative_humidity": pa.float64(),  # Wilgotność względna [%] - Width 5 suggests potential decimals or 100.0
-    "relative_humidity_status": pa.string(),  # Status pomiaru WLGW
+    "relative_humidity_status": DICTIONARY_STRING,  # Status pomiaru WLGW
     "wind_direction_code": pa.string(),  # Kod kierunku wiatru [kod] - Width 3, safer as string code
-    "wind_direction_code_status": pa.string(),  # Status pomiaru DKDK
+    "wind_direction_code_status": DICTIONARY_STRING,  # Status pomiaru DKDK
     "wind_speed": pa.float64(),  # Prędkość wiatru [m/s] - Width 5 allows for decimals
-    "wind_speed_status": pa.string(),  # Status pomiaru FWR
+    "wind_speed_status": DICTIONARY_STRING,  # Status pomiaru FWR
     "cloud_cover_general": pa.float64(),  # Zachmurzenie ogólne [oktanty] - Oktants usually int, but float safer
-    "cloud_cover_general_status": pa.string(),  # Status pomiaru ZOGK
+    "cloud_cover_general_status": DICTIONARY_STRING,  # Status pomiaru ZOGK
     "visibility_code": pa.string(),  # Widzialność [kod] - Width 5 suggests a code, safer as string
-    "visibility_code_status": pa.string(),  # Status pomiaru WID
+    "visibility_code_status": DICTIONARY_STRING,  # Status pomiaru WID
 }
 
 K_T_COLUMNS_DLT: TTableSchemaColumns = {
     "station_code": {"data_type": "bigint"},
     "station_name": {"data_type": "text"},
-    "year": {"data_type": "bigint"},
-    "month": {"data_type": "bigint"},
-    "day": {"data_type": "bigint"},
-    "hour": {"data_type": "bigint"},
+    "year": {"data_type": "bigint", "precision": 16},
+    "month": {"data_type": "bigint", "precision": 8},
+    "day": {"data_type": "bigint", "precision": 8},
+    "hour": {"data_type": "bigint", "precision": 8},
+    "measurement_timestamp": {"data_type": "timestamp", "precision": 0},
     "air_temperature": {"data_type": "double"},
     "air_temperature_status": {"data_type": "text"},
     "wet_bulb_temperature": {"data_type": "double"},
@@ -355,121 +364,122 @@ K_T_COLUMNS_DLT: TTableSchemaColumns = {
 
 S_T_COLUMNS = {
     "station_code": pa.int64(),
-    "station_name": pa.string(),
-    "year": pa.int64(),
-    "month": pa.int64(),
-    "day": pa.int64(),
-    "hour": pa.int64(),
+    "station_name": DICTIONARY_STRING,
+    "year": pa.int16(),
+    "month": pa.int8(),
+    "day": pa.int8(),
+    "hour": pa.int8(),
     "cloud_base_cl_cm_coded": pa.string(),  # Wysokość podstawy chmur CL CM szyfrowana [kod]
-    "cloud_base_cl_cm_coded_status": pa.string(),  # Status pomiaru HPOD
+    "cloud_base_cl_cm_coded_status": DICTIONARY_STRING,  # Status pomiaru HPOD
     "cloud_base_lower_m": pa.float64(),  # Wysokość podstawy niższej [m]
-    "cloud_base_lower_m_status": pa.string(),  # Status pomiaru HPON
+    "cloud_base_lower_m_status": DICTIONARY_STRING,  # Status pomiaru HPON
     "cloud_base_upper_m": pa.float64(),  # Wysokość podstawy wyższej [m]
-    "cloud_base_upper_m_status": pa.string(),  # Status pomiaru HPOW
+    "cloud_base_upper_m_status": DICTIONARY_STRING,  # Status pomiaru HPOW
     "cloud_base_text": pa.string(),  # Wysokość podstawy tekstowy [opis]
     "measurement_instrument_1_lower": pa.string(),  # Pomiar przyrzadem 1 (niższa) [P]
     "measurement_instrument_2_upper": pa.string(),  # Pomiar przyrzadem 2 (wyższa) [P]
     "visibility_code": pa.string(),  # Widzialność [kod]
-    "visibility_code_status": pa.string(),  # Status pomiaru WID
+    "visibility_code_status": DICTIONARY_STRING,  # Status pomiaru WID
     "visibility_operator_m": pa.float64(),  # Widzialność operatora [m]
-    "visibility_operator_m_status": pa.string(),  # Status pomiaru WIDO
+    "visibility_operator_m_status": DICTIONARY_STRING,  # Status pomiaru WIDO
     "visibility_auto_m": pa.float64(),  # Widzialność automat [m]
-    "visibility_auto_m_status": pa.string(),  # Status pomiaru WIDA
+    "visibility_auto_m_status": DICTIONARY_STRING,  # Status pomiaru WIDA
     "cloud_cover_general_oktants": pa.string(),  # Zachmurzenie ogólne [oktanty]
-    "cloud_cover_general_oktants_status": pa.string(),  # Status pomiaru NOG
+    "cloud_cover_general_oktants_status": DICTIONARY_STRING,  # Status pomiaru NOG
     "wind_direction_deg": pa.float64(),  # Kierunek wiatru [°]
-    "wind_direction_deg_status": pa.string(),  # Status pomiaru KRWR
+    "wind_direction_deg_status": DICTIONARY_STRING,  # Status pomiaru KRWR
     "wind_speed_ms": pa.float64(),  # Prędkość wiatru [m/s]
-    "wind_speed_ms_status": pa.string(),  # Status pomiaru FWR
+    "wind_speed_ms_status": DICTIONARY_STRING,  # Status pomiaru FWR
     "wind_gust_ms": pa.float64(),  # Poryw wiatru [m/s]
-    "wind_gust_ms_status": pa.string(),  # Status pomiaru PORW
+    "wind_gust_ms_status": DICTIONARY_STRING,  # Status pomiaru PORW
     "air_temperature_c": pa.float64(),  # Temperatura powietrza [°C]
-    "air_temperature_c_status": pa.string(),  # Status pomiaru TEMP
+    "air_temperature_c_status": DICTIONARY_STRING,  # Status pomiaru TEMP
     "wet_bulb_temperature_c": pa.float64(),  # Temperatura termometru zwilżonego [°C]
-    "wet_bulb_temperature_c_status": pa.string(),  # Status pomiaru TTZW
+    "wet_bulb_temperature_c_status": DICTIONARY_STRING,  # Status pomiaru TTZW
     "ventilation_indicator": pa.string(),  # Wskaźnik wentylacji [W/N]
     "ice_indicator": pa.string(),  # Wskaźnik lodu [L/W]
     "vapor_pressure_hpa": pa.float64(),  # Ciśnienie pary wodnej [hPa]
-    "vapor_pressure_hpa_status": pa.string(),  # Status pomiaru CPW
+    "vapor_pressure_hpa_status": DICTIONARY_STRING,  # Status pomiaru CPW
     "relative_humidity_percent": pa.float64(),  # Wilgotność względna [%]
-    "relative_humidity_percent_status": pa.string(),  # Status pomiaru WLGW
+    "relative_humidity_percent_status": DICTIONARY_STRING,  # Status pomiaru WLGW
     "dew_point_temperature_c": pa.float64(),  # Temperatura punktu rosy [°C]
-    "dew_point_temperature_c_status": pa.string(),  # Status pomiaru TPTR
+    "dew_point_temperature_c_status": DICTIONARY_STRING,  # Status pomiaru TPTR
     "station_pressure_hpa": pa.float64(),  # Ciśnienie na pozimie stacji [hPa]
-    "station_pressure_hpa_status": pa.string(),  # Status pomiaru PPPS
+    "station_pressure_hpa_status": DICTIONARY_STRING,  # Status pomiaru PPPS
     "sea_level_pressure_hpa": pa.float64(),  # Ciśnienie na pozimie morza [hPa]
-    "sea_level_pressure_hpa_status": pa.string(),  # Status pomiaru PPPM
+    "sea_level_pressure_hpa_status": DICTIONARY_STRING,  # Status pomiaru PPPM
     "pressure_tendency_characteristic_code": pa.string(),  # Charakterystyka tendencji [kod]
     "pressure_tendency_value": pa.float64(),  # Wartość tendencji [wartość]
-    "pressure_tendency_status": pa.string(),  # Status pomiaru APP
+    "pressure_tendency_status": DICTIONARY_STRING,  # Status pomiaru APP
     "precipitation_6hr_mm": pa.float64(),  # Opad za 6 godzin [mm]
-    "precipitation_6hr_mm_status": pa.string(),  # Status pomiaru WO6G
+    "precipitation_6hr_mm_status": DICTIONARY_STRING,  # Status pomiaru WO6G
     "precipitation_type_6hr_code": pa.string(),  # Rodzaj opadu za 6 godzin [kod]
-    "precipitation_type_6hr_code_status": pa.string(),  # Status pomiaru ROPT
+    "precipitation_type_6hr_code_status": DICTIONARY_STRING,  # Status pomiaru ROPT
     "weather_present_code": pa.string(),  # Pogoda bieżąca [kod]
     "weather_past_code": pa.string(),  # Pogoda ubiegła [kod]
     "cloud_cover_low_oktants": pa.string(),  # Zachmurzenie niskie [oktanty]
-    "cloud_cover_low_oktants_status": pa.string(),  # Status pomiaru CLCM
+    "cloud_cover_low_oktants_status": DICTIONARY_STRING,  # Status pomiaru CLCM
     "cloud_type_cl_code": pa.string(),  # Chmury CL [kod]
-    "cloud_type_cl_code_status": pa.string(),  # Status pomiaru CHCL
+    "cloud_type_cl_code_status": DICTIONARY_STRING,  # Status pomiaru CHCL
     "cloud_type_cl_text": pa.string(),  # Chmury CL tekstem
     "cloud_type_cm_code": pa.string(),  # Chmury CM [kod]
-    "cloud_type_cm_code_status": pa.string(),  # Status pomiaru CHCM
+    "cloud_type_cm_code_status": DICTIONARY_STRING,  # Status pomiaru CHCM
     "cloud_type_cm_text": pa.string(),  # Chmury CM tekstem
     "cloud_type_ch_code": pa.string(),  # Chmury CH [kod]
-    "cloud_type_ch_code_status": pa.string(),  # Status pomiaru CHCH
+    "cloud_type_ch_code_status": DICTIONARY_STRING,  # Status pomiaru CHCH
     "cloud_type_ch_text": pa.string(),  # Chmury CH tekstem
     "ground_state_code": pa.string(),  # Stan gruntu [kod]
-    "ground_state_code_status": pa.string(),  # Status pomiaru SGRN
+    "ground_state_code_status": DICTIONARY_STRING,  # Status pomiaru SGRN
     "humidity_deficit_hpa": pa.float64(),  # Niedosyt wilgotności [hPa]
-    "humidity_deficit_hpa_status": pa.string(),  # Status pomiaru DEFI
+    "humidity_deficit_hpa_status": DICTIONARY_STRING,  # Status pomiaru DEFI
     "sunshine_duration": pa.float64(),  # Usłonecznienie
-    "sunshine_duration_status": pa.string(),  # Status pomiaru USLN
+    "sunshine_duration_status": DICTIONARY_STRING,  # Status pomiaru USLN
     "dew_occurrence_flag": pa.int64(),  # Wystąpienie rosy [0/1]
-    "dew_occurrence_flag_status": pa.string(),  # Status pomiaru ROSW
+    "dew_occurrence_flag_status": DICTIONARY_STRING,  # Status pomiaru ROSW
     "max_gust_ww_period_ms": pa.float64(),  # Poryw maksymalny za okres WW [m/s]
-    "max_gust_ww_period_ms_status": pa.string(),  # Status pomiaru PORK
+    "max_gust_ww_period_ms_status": DICTIONARY_STRING,  # Status pomiaru PORK
     "max_gust_hour": pa.int64(),  # Godzina wystąpienia porywu
     "max_gust_minute": pa.int64(),  # Minuta wystąpienia porywu
     "ground_temp_5cm_c": pa.float64(),  # Temperatura gruntu -5 [°C]
-    "ground_temp_5cm_c_status": pa.string(),  # Status pomiaru TG05
+    "ground_temp_5cm_c_status": DICTIONARY_STRING,  # Status pomiaru TG05
     "ground_temp_10cm_c": pa.float64(),  # Temperatura gruntu -10 [°C]
-    "ground_temp_10cm_c_status": pa.string(),  # Status pomiaru TG10
+    "ground_temp_10cm_c_status": DICTIONARY_STRING,  # Status pomiaru TG10
     "ground_temp_20cm_c": pa.float64(),  # Temperatura gruntu -20 [°C]
-    "ground_temp_20cm_c_status": pa.string(),  # Status pomiaru TG20
+    "ground_temp_20cm_c_status": DICTIONARY_STRING,  # Status pomiaru TG20
     "ground_temp_50cm_c": pa.float64(),  # Temperatura gruntu -50 [°C]
-    "ground_temp_50cm_c_status": pa.string(),  # Status pomiaru TG50
+    "ground_temp_50cm_c_status": DICTIONARY_STRING,  # Status pomiaru TG50
     "ground_temp_100cm_c": pa.float64(),  # Temperatura gruntu -100 [°C]
-    "ground_temp_100cm_c_status": pa.string(),  # Status pomiaru TG100
+    "ground_temp_100cm_c_status": DICTIONARY_STRING,  # Status pomiaru TG100
     "temp_min_12hr_c": pa.float64(),  # Temperatura minimalna za 12 godzin [°C]
-    "temp_min_12hr_c_status": pa.string(),  # Status pomiaru TMIN
+    "temp_min_12hr_c_status": DICTIONARY_STRING,  # Status pomiaru TMIN
     "temp_max_12hr_c": pa.float64(),  # Temperatura maksymalna za 12 godzin [°C]
-    "temp_max_12hr_c_status": pa.string(),  # Status pomiaru TMAX
+    "temp_max_12hr_c_status": DICTIONARY_STRING,  # Status pomiaru TMAX
     "ground_temp_min_12hr_c": pa.float64(),  # Temperatura minimalna przy gruncie za 12 godzin [°C]
-    "ground_temp_min_12hr_c_status": pa.string(),  # Status pomiaru TGMI
+    "ground_temp_min_12hr_c_status": DICTIONARY_STRING,  # Status pomiaru TGMI
     "snow_water_equivalent_mm_cm": pa.float64(),  # Równoważnik wodny śniegu [mm/cm]
-    "snow_water_equivalent_mm_cm_status": pa.string(),  # Status pomiaru RWSN
+    "snow_water_equivalent_mm_cm_status": DICTIONARY_STRING,  # Status pomiaru RWSN
     "snow_cover_height_cm": pa.float64(),  # Wysokość pokrywy śnieżnej [cm]
-    "snow_cover_height_cm_status": pa.string(),  # Status pomiaru PKSN
+    "snow_cover_height_cm_status": DICTIONARY_STRING,  # Status pomiaru PKSN
     "fresh_snow_height_cm": pa.float64(),  # Wysokość świeżo spadłego śniegu [cm]
-    "fresh_snow_height_cm_status": pa.string(),  # Status pomiaru HSS
+    "fresh_snow_height_cm_status": DICTIONARY_STRING,  # Status pomiaru HSS
     "snow_height_plot_cm": pa.float64(),  # Wysokość śniegu na poletku [cm]
-    "snow_height_plot_cm_status": pa.string(),  # Status pomiaru GRSN
+    "snow_height_plot_cm_status": DICTIONARY_STRING,  # Status pomiaru GRSN
     "snow_type_code": pa.string(),  # Gatunek śniegu [kod]
     "snow_cover_formation_code": pa.string(),  # Ukształtowanie pokrywy [kod]
     "snow_sample_height_cm": pa.float64(),  # Wysokość próbki [cm]
-    "snow_sample_height_cm_status": pa.string(),  # Status pomiaru HPRO
+    "snow_sample_height_cm_status": DICTIONARY_STRING,  # Status pomiaru HPRO
     "snow_water_storage_mm": pa.float64(),  # Zapas wody w śniegu [mm]
-    "snow_water_storage_mm_status": pa.string(),  # Status pomiaru CIPR
+    "snow_water_storage_mm_status": DICTIONARY_STRING,  # Status pomiaru CIPR
 }
 
 S_T_COLUMNS_DLT: TTableSchemaColumns = {
     "station_code": {"data_type": "bigint"},
     "station_name": {"data_type": "text"},
-    "year": {"data_type": "bigint"},
-    "month": {"data_type": "bigint"},
-    "day": {"data_type": "bigint"},
-    "hour": {"data_type": "bigint"},
+    "year": {"data_type": "bigint", "precision": 16},
+    "month": {"data_type": "bigint", "precision": 8},
+    "day": {"data_type": "bigint", "precision": 8},
+    "hour": {"data_type": "bigint", "precision": 8},
+    "measurement_timestamp": {"data_type": "timestamp", "precision": 0},
     "cloud_base_cl_cm_coded": {"data_type": "text"},
     "cloud_base_cl_cm_coded_status": {"data_type": "text"},
     "cloud_base_lower_m": {"data_type": "double"},
@@ -573,6 +583,20 @@ S_T_COLUMNS_DLT: TTableSchemaColumns = {
     "snow_water_storage_mm_status": {"data_type": "text"},
 }
 
+### columns derived from the calendar parts while parsing
+DAILY_DERIVED_COLUMNS: dict[str, pa.DataType] = {"measurement_date": pa.date32()}
+HOURLY_DERIVED_COLUMNS: dict[str, pa.DataType] = {"measurement_timestamp": pa.timestamp("s", tz="UTC")}
+
+ARROW_DERIVED_COLUMNS = {
+    "k_d_t": DAILY_DERIVED_COLUMNS,
+    "k_d": DAILY_DERIVED_COLUMNS,
+    "o_d": DAILY_DERIVED_COLUMNS,
+    "s_d": DAILY_DERIVED_COLUMNS,
+    "s_d_t": DAILY_DERIVED_COLUMNS,
+    "k_t": HOURLY_DERIVED_COLUMNS,
+    "s_t": HOURLY_DERIVED_COLUMNS,
+}
+
 ARROW_COLUMNS_SCHEMA = {
     "k_d_t": K_D_T_COLUMNS,
     "k_d": K_D_COLUMNS,
@@ -592,3 +616,99 @@ DLT_COLUMNS_SCHEMA = {
     "k_t": K_T_COLUMNS_DLT,
     "s_t": S_T_COLUMNS_DLT,
 }
+
+### natural keys used when merging incremental loads
+DAILY_PRIMARY_KEY = ["station_code", "year", "month", "day"]
+HOURLY_PRIMARY_KEY = [*DAILY_PRIMARY_KEY, "hour"]
+
+PRIMARY_KEYS = {
+    "k_d_t": DAILY_PRIMARY_KEY,
+    "k_d": DAILY_PRIMARY_KEY,
+    "o_d": DAILY_PRIMARY_KEY,
+    "s_d": DAILY_PRIMARY_KEY,
+    "s_d_t": DAILY_PRIMARY_KEY,
+    "k_t": HOURLY_PRIMARY_KEY,
+    "s_t": HOURLY_PRIMARY_KEY,
+}
+
+### real-time API: measurement endpoints by API path; values arrive as quoted strings, times as published
+REAL_TIME_TIMESTAMP = pa.timestamp("us")
+
+SYNOP_COLUMNS = {
+    "id_stacji": pa.int64(),
+    "stacja": DICTIONARY_STRING,
+    "data_pomiaru": pa.date32(),
+    "godzina_pomiaru": pa.int8(),
+    "temperatura": pa.float64(),
+    "predkosc_wiatru": pa.float64(),
+    "kierunek_wiatru": pa.float64(),
+    "wilgotnosc_wzgledna": pa.float64(),
+    "suma_opadu": pa.float64(),
+    "cisnienie": pa.float64(),
+}
+
+HYDRO_COLUMNS = {
+    "id_stacji": pa.int64(),
+    "stacja": DICTIONARY_STRING,
+    "rzeka": DICTIONARY_STRING,
+    "województwo": DICTIONARY_STRING,
+    "stan_wody": pa.float64(),
+    "stan_wody_data_pomiaru": REAL_TIME_TIMESTAMP,
+    "temperatura_wody": pa.float64(),
+    "temperatura_wody_data_pomiaru": REAL_TIME_TIMESTAMP,
+    "zjawisko_lodowe": pa.int16(),
+    "zjawisko_lodowe_data_pomiaru": REAL_TIME_TIMESTAMP,
+    "zjawisko_zarastania": pa.int16(),
+    "zjawisko_zarastania_data_pomiaru": REAL_TIME_TIMESTAMP,
+}
+
+METEO_COLUMNS = {
+    "kod_stacji": pa.int64(),
+    "nazwa_stacji": DICTIONARY_STRING,
+    "lon": pa.float64(),
+    "lat": pa.float64(),
+    "temperatura_gruntu": pa.float64(),
+    "temperatura_gruntu_data": REAL_TIME_TIMESTAMP,
+    "kierunek_wiatru": pa.float64(),
+    "kierunek_wiatru_data": REAL_TIME_TIMESTAMP,
+    "wiatr_srednia_predkosc": pa.float64(),
+    "wiatr_srednia_predkosc_data": REAL_TIME_TIMESTAMP,
+    "wiatr_predkosc_maksymalna": pa.float64(),
+    "wiatr_predkosc_maksymalna_data": REAL_TIME_TIMESTAMP,
+    "wilgotnosc_wzgledna": pa.float64(),
+    "wilgotnosc_wzgledna_data": REAL_TIME_TIMESTAMP,
+    "wiatr_poryw_10min": pa.float64(),
+    "wiatr_poryw_10min_data": REAL_TIME_TIMESTAMP,
+    "opad_10min": pa.float64(),
+    "opad_10min_data": REAL_TIME_TIMESTAMP,
+    "data_pomiaru": REAL_TIME_TIMESTAMP,
+}
+
+REAL_TIME_ARROW_SCHEMA = {
+    "synop": SYNOP_COLUMNS,
+    "hydro": HYDRO_COLUMNS,
+    "meteo": METEO_COLUMNS,
+}
+
+### real-time API: natural keys of the measurement endpoints by API path, station id first
+# meteo reports every measurement with its own time; "data_pomiaru" is derived as the latest of them
+REAL_TIME_PRIMARY_KEYS = {
+    "synop": ["id_stacji", "data_pomiaru", "godzina_pomiaru"],
+    "hydro": ["id_stacji", "stan_wody_data_pomiaru"],
+    "meteo": ["kod_stacji", "data_pomiaru"],
+}
+
+### datalake layout: hive-style partitions of table formats and sort order of rows within files
+PARTITION_COLUMNS = ["year"]
+DAILY_SORT_KEY = ["station_code", "measurement_date"]
+HOURLY_SORT_KEY = ["station_code", "measurement_timestamp"]
+
+SORT_KEYS = {
+    "k_d_t": DAILY_SORT_KEY,
+    "k_d": DAILY_SORT_KEY,
+    "o_d": DAILY_SORT_KEY,
+    "s_d": DAILY_SORT_KEY,
+    "s_d_t": DAILY_SORT_KEY,
+    "k_t": HOURLY_SORT_KEY,
+    "s_t": HOURLY_SORT_KEY,
+}
@@ -1,17 +1,19 @@
-from dagster import AssetSelection, Definitions, define_asset_job
+from dagster import AssetSelection, Definitions, define_asset_job, definitions
 from dagster_dlt import DagsterDltResource
 
-from .defs.assets import imgw_historic_datalake, imgw_real_time_datalake
-
-dlt_resource = DagsterDltResource()
+from .defs.assets import build_imgw_assets
 
 historic_job = define_asset_job(name="historic_job", selection=AssetSelection.groups("imgw_historic"))
 real_time_job = define_asset_job(name="real_time_job", selection=AssetSelection.groups("imgw_real_time"))
 
-defs = Definitions(
-    assets=[imgw_real_time_datalake, imgw_historic_datalake],
-    jobs=[historic_job, real_time_job],
-    resources={
-        "dlt": dlt_resource,
-    },
-)
+
+@definitions
+def defs() -> Definitions:
+    # loaded lazily by the code location, so the sources and pipelines are built on first use
+    return Definitions(
+        assets=build_imgw_assets(),
+        jobs=[historic_job, real_time_job],
+        resources={
+            "dlt": DagsterDltResource(),
+        },
+    )
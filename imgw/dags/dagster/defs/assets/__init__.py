@@ -1,31 +1,80 @@
-from collections.abc import Generator
+import os
+from collections.abc import Generator, Iterable
+from typing import Any
 
-from dagster import AssetExecutionContext
+import dlt as dlt_lib
+from dagster import AssetExecutionContext, AssetsDefinition, MetadataValue
 from dagster_dlt import DagsterDltResource, dlt_assets
 from dagster_dlt.dlt_event_iterator import DltEventType
 
+from imgw.common import get_run_metrics
 from imgw.extract import get_dlt_datalake_pipeline, imgw_historic, imgw_real_time
 
 from .custom_functions import CustomDltTranslator as CustomDltTranslator
 
+# number of worker processes unzipping and parsing historic archives (0 parses in threads)
+HISTORIC_PARSE_WORKERS = int(os.getenv("IMGW_PARSE_WORKERS", "0"))
 
-@dlt_assets(
-    dlt_source=imgw_historic(),
-    dlt_pipeline=get_dlt_datalake_pipeline(),
-    name="imgw_historic_datalake",
-    group_name="imgw_historic",
-    dagster_dlt_translator=CustomDltTranslator(),
-)
-def imgw_historic_datalake(context: AssetExecutionContext, dlt: DagsterDltResource) -> Generator[DltEventType]:
-    yield from dlt.run(context=context)
-
-
-@dlt_assets(
-    dlt_source=imgw_real_time(),
-    dlt_pipeline=get_dlt_datalake_pipeline(),
-    name="imgw_real_time_datalake",
-    group_name="imgw_real_time",
-    dagster_dlt_translator=CustomDltTranslator(),
-)
-def imgw_real_time_datalake(context: AssetExecutionContext, dlt: DagsterDltResource) -> Generator[DltEventType]:
-    yield from dlt.run(context=context)
+
+def _with_run_metrics(events: Iterable[DltEventType], pipeline: dlt_lib.Pipeline) -> Generator[DltEventType]:
+    """
+    Attaches the per-stage run metrics to the materialization events of a dlt run.
+
+    Args:
+        events (Iterable[DltEventType]): Events of `DagsterDltResource.run`.
+        pipeline (dlt_lib.Pipeline): The pipeline that ran.
+
+    Yields:
+        DltEventType: The events, with the run summary as `imgw/<stage>/...` metadata.
+    """
+    # dagster-dlt runs the pipeline before the first event is emitted, so all stages are complete here
+    events = list(events)
+    metrics = get_run_metrics()
+    if pipeline.last_trace is not None:
+        metrics.record_trace(pipeline.last_trace)
+    metrics.log_summary()
+    metadata: dict[str, Any] = {
+        f"imgw/{key}": MetadataValue.float(value) if isinstance(value, float) else MetadataValue.int(value)
+        for key, value in metrics.summary().items()
+    }
+    for event in events:
+        event_metadata: dict[str, Any] = {**(event.metadata or {}), **metadata}
+        yield event._replace(metadata=event_metadata)
+
+
+def build_imgw_assets() -> list[AssetsDefinition]:
+    """
+    Builds the dlt assets of the historic and real-time sources.
+
+    The sources and their pipelines are created here rather than at import, so importing this module does not
+    construct them. The code location calls this when it loads its definitions.
+
+    Returns:
+        list[AssetsDefinition]: The real-time and historic datalake assets.
+    """
+    historic_pipeline = get_dlt_datalake_pipeline()
+    real_time_pipeline = get_dlt_datalake_pipeline()
+
+    @dlt_assets(
+        dlt_source=imgw_historic(parse_workers=HISTORIC_PARSE_WORKERS),
+        dlt_pipeline=historic_pipeline,
+        name="imgw_historic_datalake",
+        group_name="imgw_historic",
+        dagster_dlt_translator=CustomDltTranslator(),
+    )
+    def imgw_historic_datalake(context: AssetExecutionContext, dlt: DagsterDltResource) -> Generator[DltEventType]:
+        get_run_metrics().reset()
+        yield from _with_run_metrics(dlt.run(context=context), historic_pipeline)
+
+    @dlt_assets(
+        dlt_source=imgw_real_time(),
+        dlt_pipeline=real_time_pipeline,
+        name="imgw_real_time_datalake",
+        group_name="imgw_real_time",
+        dagster_dlt_translator=CustomDltTranslator(),
+    )
+    def imgw_real_time_datalake(context: AssetExecutionContext, dlt: DagsterDltResource) -> Generator[DltEventType]:
+        get_run_metrics().reset()
+        yield from _with_run_metrics(dlt.run(context=context), real_time_pipeline)
+
+    return [imgw_real_time_datalake, imgw_historic_datalake]
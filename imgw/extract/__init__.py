@@ -1,14 +1,36 @@
-from collections.abc import Iterable
+import os
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
 
 import dlt
 import dlt.extract
-import duckdb
+from dlt.common.configuration.container import Container
+from dlt.common.pipeline import PipelineContext
+from dlt.common.schema.typing import TTableFormat, TWriteDisposition
 from dlt.common.typing import TDataItem
 from dlt.extract.resource import DltResource
 
-from imgw.common import DLT_COLUMNS_SCHEMA, get_logger
-
-from .helpers import ImgwCsv, fetch_zip_data, find_zip_links, get_json_data, parse_table, unzip
+from imgw.common import MIB, MemoryBudget, Reservation, get_logger, get_memory_budget
+from imgw.load.config import DEFAULT_MEMORY_LIMIT, duckdb_config
+
+from .helpers.config import (
+    DEFAULT_CACHE_MAX_BYTES,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_MAX_REQUESTS_PER_SECOND,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_SLA_SECONDS,
+    DEFAULT_SPOOL_MAX_SIZE,
+    DEFAULT_STATION_BATCH_SIZE,
+    DEFAULT_STATION_WORKERS,
+    TIncludeColumns,
+)
+
+# the helpers and schemas are imported in the functions that use them, so that defining the sources loads
+# neither the HTTP clients nor the CSV reader
+if TYPE_CHECKING:
+    from .helpers import ImgwCsv, ImgwZip
 
 logger = get_logger(__name__)
 
@@ -20,48 +42,275 @@ DEFAULT_ENDPOINTS = [
     {"endpoint_name": "ostrzezenia_hydrologiczne", "api_path": "warningshydro"},
 ]
 
+# bytes reserved in the memory budget for an archive of unknown size and its CSV files, until it is downloaded
+DEFAULT_ARCHIVE_RESERVATION = 64 * MIB
+# assumed bytes of CSV files per byte of archive, until the central directory of the archive is read
+ARCHIVE_EXPANSION = 8
+
+
+def _pipeline_working_file(filename: str) -> Optional[str]:
+    """
+    Returns a path to a file inside the working directory of the active dlt pipeline.
+
+    Args:
+        filename (str): Name of the file.
+
+    Returns:
+        Optional[str]: The path, or None if no pipeline is active.
+    """
+    context = Container()[PipelineContext]
+    if not context.is_active():
+        return None
+    return os.path.join(context.pipeline().working_dir, filename)
+
+
+def _memory_budget(max_bytes: Optional[int]) -> Optional[MemoryBudget]:
+    return get_memory_budget(max_bytes) if max_bytes else None
+
+
+def _hold(budget: Optional[MemoryBudget], nbytes: int) -> AbstractContextManager:
+    """
+    Accounts bytes in the memory budget for the duration of the context, if there is a budget.
+
+    Args:
+        budget (Optional[MemoryBudget]): The memory budget.
+        nbytes (int): Number of bytes.
+
+    Returns:
+        AbstractContextManager: The context manager.
+    """
+    return budget.hold(nbytes) if budget is not None else nullcontext()
+
+
+def _reserve_archive(
+    budget: Optional[MemoryBudget], known_fingerprint: Optional[dict[str, str]]
+) -> Optional[Reservation]:
+    """
+    Reserves memory for an archive and its CSV files before it is fetched, waiting until the reservation fits.
+
+    Args:
+        budget (Optional[MemoryBudget]): The memory budget.
+        known_fingerprint (Optional[dict[str, str]]): Fingerprint of the archive in the ledger, whose Content-Length
+            is used for the estimate. Defaults to DEFAULT_ARCHIVE_RESERVATION for archives never fetched before.
+
+    Returns:
+        Optional[Reservation]: The reservation, or None if there is no budget.
+    """
+    if budget is None:
+        return None
+    content_length = int((known_fingerprint or {}).get("content_length", 0))
+    reservation = Reservation(budget)
+    reservation.reserve(content_length * (1 + ARCHIVE_EXPANSION) if content_length else DEFAULT_ARCHIVE_RESERVATION)
+    return reservation
+
+
+def _reconcile_archive(reservation: Optional[Reservation], zip_file: "ImgwZip") -> None:
+    """Resizes the reservation of a downloaded archive to the archive and the CSV files listed in it."""
+    if reservation is None:
+        return
+    unzipped = zip_file.unzipped_nbytes()
+    reservation.resize(zip_file.nbytes + (unzipped if unzipped is not None else zip_file.nbytes * ARCHIVE_EXPANSION))
+
 
 @dlt.resource(selected=False, parallelized=True)
-def zip_links(root_urls: list[str] = dlt.config.value) -> Iterable[TDataItem]:
+def zip_links(
+    root_urls: list[str] = dlt.config.value,
+    crawler_workers: int = 8,
+    crawler_max_requests_per_second: Optional[float] = None,
+    crawl_index_path: Optional[str] = None,
+    skip_unchanged_subtrees: bool = False,
+) -> Iterable[TDataItem]:
     """
     Retrieves zip links from the provided root URLs.
 
     Args:
         root_urls (list[str], optional): List of root URLs to fetch zip links from. Defaults to dlt.config.value.
+        crawler_workers (int, optional): Number of directory listings fetched concurrently. Defaults to 8.
+        crawler_max_requests_per_second (Optional[float], optional): Request cap per host. Defaults to None (no cap).
+        crawl_index_path (Optional[str], optional): Path to the SQLite crawl index. Defaults to None, which stores
+            the index in the working directory of the active pipeline (next to its state).
+        skip_unchanged_subtrees (bool, optional): Replay subtrees of unmodified listings from the crawl index
+            instead of crawling them. Misses archives added below an unmodified listing. Defaults to False.
 
     Yields:
-        Iterable[TDataItem]: An iterable of zip links.
+        Iterable[TDataItem]: An iterable of zip links, yielded while the crawl is still running.
     """
-    for _root_url in root_urls:
-        links = find_zip_links(_root_url)
-        yield from links
+    # imported here, so the real-time source does not load the HTML parser
+    from .helpers import CrawlIndex, find_zip_links
+
+    index_path = crawl_index_path or _pipeline_working_file("crawl_index.sqlite")
+    crawl_index = CrawlIndex(index_path) if index_path else None
+    try:
+        for _root_url in root_urls:
+            links = find_zip_links(
+                _root_url,
+                max_workers=crawler_workers,
+                max_requests_per_second=crawler_max_requests_per_second,
+                crawl_index=crawl_index,
+                skip_unchanged_subtrees=skip_unchanged_subtrees,
+            )
+            yield from links
+    finally:
+        if crawl_index is not None:
+            crawl_index.close()
 
 
 @dlt.transformer(selected=False, parallelized=True)
-def csv_files(zip_link: str) -> Iterable[TDataItem]:
+def csv_files(
+    zip_link: str,
+    incremental: bool = False,
+    stream_downloads: bool = False,
+    spool_max_size: int = DEFAULT_SPOOL_MAX_SIZE,
+    scratch_dir: Optional[str] = None,
+    download_cache_dir: Optional[str] = None,
+    download_cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    memory_budget: Optional[int] = None,
+) -> Iterable[TDataItem]:
     """
     Fetches and unzips CSV files from a given ZIP link.
 
+    Fingerprints of ingested archives are kept in a ledger in the source state. In incremental mode,
+    archives whose fingerprint did not change since the last run are skipped. An archive is recorded only
+    once it was unzipped and `weather_tables` parsed all of its CSV files without failures, so corrupt or
+    truncated archives are fetched again on the next run.
+
     Args:
         zip_link (str): The URL of the ZIP file containing CSV files.
+        incremental (bool, optional): Skip archives already recorded in the ledger. Defaults to False.
+        stream_downloads (bool, optional): Stream archives into spooled temporary files instead of memory.
+            Defaults to False.
+        spool_max_size (int, optional): Size in bytes above which a streamed archive is moved to disk.
+            Defaults to DEFAULT_SPOOL_MAX_SIZE.
+        scratch_dir (Optional[str], optional): Directory for streamed archives moved to disk.
+            Defaults to the system temp directory.
+        download_cache_dir (Optional[str], optional): Directory of the on-disk download cache. Cached archives are
+            revalidated and only downloaded again when they changed. Defaults to None (no cache).
+        download_cache_max_bytes (int, optional): Byte budget of the download cache. Defaults to
+            DEFAULT_CACHE_MAX_BYTES.
+        memory_budget (Optional[int], optional): Bytes of archives, CSV files and tables allowed in flight. A download
+            waits until an estimate of the archive and its CSV files fits into the budget, see `_reserve_archive`.
+            Unzipped CSV files stay accounted until `weather_tables` has parsed them. Defaults to None (no budget).
 
     Yields:
         Iterable[TDataItem]: An iterable of unzipped CSV files.
     """
-    zip_file = fetch_zip_data(zip_link)
+    from .helpers import ArchiveProgress, fetch_zip_data, get_download_cache, unzip
+
+    ledger = dlt.current.source_state().setdefault("archives", {})
+    reservation = _reserve_archive(_memory_budget(memory_budget), ledger.get(zip_link))
+    try:
+        zip_file = fetch_zip_data(
+            zip_link,
+            ledger.get(zip_link) if incremental else None,
+            stream=stream_downloads,
+            spool_max_size=spool_max_size,
+            scratch_dir=scratch_dir,
+            cache=get_download_cache(download_cache_dir, download_cache_max_bytes) if download_cache_dir else None,
+        )
+        if zip_file is None:
+            return
+        _reconcile_archive(reservation, zip_file)
+
+        fingerprint = zip_file.fingerprint
+        progress = ArchiveProgress(lambda: ledger.update({zip_link: fingerprint}))
+        try:
+            for csv_file in unzip(zip_file):
+                # released by weather_tables once the file is parsed
+                if reservation is not None:
+                    reservation.hand_over(csv_file.nbytes)
+                yield progress.add(csv_file)
+        finally:
+            zip_file.close()
+        progress.unzipped(zip_file.failed)
+    finally:
+        if reservation is not None:
+            reservation.release()
+
+
+def _weather_table_item(
+    table_data: TDataItem,
+    table_type: str,
+    write_disposition: TWriteDisposition,
+    include_columns: Optional[TIncludeColumns] = None,
+    table_format: Optional[TTableFormat] = None,
+    sort_rows: bool = False,
+) -> TDataItem:
+    """
+    Wraps parsed weather data with dlt hints for its table type.
+
+    Args:
+        table_data (TDataItem): Parsed Arrow table or record batch.
+        table_type (str): The detected table type.
+        write_disposition (TWriteDisposition): Write disposition of the weather tables.
+        include_columns (Optional[TIncludeColumns]): Columns selected per table type. Hints of columns that
+            were not parsed are dropped. Defaults to None.
+        table_format (Optional[TTableFormat]): Table format of the weather tables. With a table format, tables are
+            partitioned by PARTITION_COLUMNS. Defaults to None (plain files).
+        sort_rows (bool): Sort the rows of the item by PARTITION_COLUMNS and the SORT_KEYS of the table type.
+            Defaults to False.
+
+    Returns:
+        TDataItem: The data with table hints, or None if the table type has no DLT schema.
+    """
+    from imgw.common import DLT_COLUMNS_SCHEMA, PARTITION_COLUMNS, PRIMARY_KEYS, SORT_KEYS
 
-    unzipped_files = unzip(zip_file)
+    from .helpers import get_parse_plans
 
-    yield from unzipped_files
+    table_schema = DLT_COLUMNS_SCHEMA.get(table_type)
+    if not table_schema:
+        return None
+    if include_columns and table_type in include_columns:
+        columns = get_parse_plans(include_columns=include_columns)[table_type].columns
+        table_schema = {name: hint for name, hint in table_schema.items() if name in columns}
+    if table_format is not None:
+        table_schema = {
+            name: {**hint, "partition": True} if name in PARTITION_COLUMNS else hint
+            for name, hint in table_schema.items()
+        }
+    if sort_rows:
+        # partition columns first: plain files are not split into partition directories, readers prune them by the
+        # statistics of row groups instead
+        sort_key = PARTITION_COLUMNS + SORT_KEYS[table_type]
+        table_data = table_data.sort_by([(column, "ascending") for column in sort_key])
+    primary_key = PRIMARY_KEYS[table_type] if write_disposition == "merge" else None
+    return dlt.extract.with_hints(
+        table_data,
+        dlt.extract.make_hints(
+            table_type,
+            write_disposition=write_disposition,
+            columns=table_schema,
+            primary_key=primary_key,
+            table_format=table_format,
+        ),
+    )
 
 
-@dlt.transformer(parallelized=True, write_disposition="replace")
-def weather_tables(csv_file: ImgwCsv) -> Iterable[TDataItem]:
+@dlt.transformer(write_disposition="replace")
+def weather_tables(
+    csv_file: "ImgwCsv",
+    write_disposition: TWriteDisposition = "replace",
+    block_size: Optional[int] = None,
+    include_columns: Optional[TIncludeColumns] = None,
+    table_format: Optional[TTableFormat] = None,
+    sort_rows: bool = False,
+    memory_budget: Optional[int] = None,
+) -> Iterable[TDataItem]:
     """
     Processes weather data from an IMGW CSV file and yields extracted data with appropriate schema hints.
 
     Args:
         csv_file (ImgwCsv): The CSV file containing weather data.
+        write_disposition (TWriteDisposition, optional): Write disposition of the weather tables. With "merge",
+            rows are upserted on the natural key of the table type. Defaults to "replace".
+        block_size (Optional[int], optional): If set, the file is streamed as record batches of roughly this many
+            bytes of CSV instead of being parsed into a single table. Defaults to None.
+        include_columns (Optional[TIncludeColumns], optional): Columns to parse per table type. Defaults to None.
+        table_format (Optional[TTableFormat], optional): Table format of the weather tables, partitioned by year.
+            Defaults to None.
+        sort_rows (bool, optional): Sort the rows of each item by year, station and date before they are written.
+            Defaults to False.
+        memory_budget (Optional[int], optional): Memory budget shared with `csv_files`. Parsed tables are accounted
+            until dlt has written them. Defaults to None (no budget).
 
     Yields:
         Iterable[TDataItem]: Extracted data items with schema hints based on the detected table type.
@@ -69,42 +318,256 @@ def weather_tables(csv_file: ImgwCsv) -> Iterable[TDataItem]:
     Notes:
         If the detected table type has a corresponding schema in COLUMNS_DLT_SCHEMA, it is used to provide schema hints.
         Otherwise, no data is yielded.
+        `imgw_historic` parallelizes this transformer only without a memory budget: a parallelized generator resumes
+        in the worker pool as soon as it yielded, before dlt wrote the item.
     """
-    table_data, table_type = parse_table(csv_file)
-    table_schema = DLT_COLUMNS_SCHEMA.get(table_type)
-    if table_schema:
-        yield dlt.extract.with_hints(table_data, dlt.extract.make_hints(table_type, columns=table_schema))
-    else:
-        pass
+    from .helpers import parse_table, parse_table_batches
+
+    parsed: Iterable[tuple[TDataItem, str]] = (
+        parse_table_batches(csv_file, block_size=block_size, include_columns=include_columns)
+        if block_size
+        else [parse_table(csv_file, include_columns=include_columns)]
+    )
+
+    budget = _memory_budget(memory_budget)
+    try:
+        for table_data, table_type in parsed:
+            item = _weather_table_item(
+                table_data, table_type, write_disposition, include_columns, table_format, sort_rows
+            )
+            if item is not None:
+                # with a budget the transformer runs in the extract thread, which writes the item before resuming it
+                with _hold(budget, table_data.nbytes):
+                    yield item
+        if csv_file.archive is not None:
+            csv_file.archive.parsed(csv_file.failed)
+    finally:
+        if budget is not None:
+            budget.release(csv_file.nbytes)
+
+
+@dataclass
+class _ParsedArchive:
+    """Weather table items of an archive parsed in the parse pool, with the bytes each item holds in the budget."""
+
+    zip_link: str
+    fingerprint: dict[str, str]
+    items: list[tuple[TDataItem, int]]
+    tables: int
+    failed: bool
+
+
+@dlt.transformer(selected=False, parallelized=True)
+def parsed_archives(
+    zip_link: str,
+    parse_workers: int,
+    incremental: bool = False,
+    write_disposition: TWriteDisposition = "replace",
+    scratch_dir: Optional[str] = None,
+    download_cache_dir: Optional[str] = None,
+    download_cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    include_columns: Optional[TIncludeColumns] = None,
+    table_format: Optional[TTableFormat] = None,
+    sort_rows: bool = False,
+    memory_budget: Optional[int] = None,
+) -> Iterable[TDataItem]:
+    """
+    Fetches a ZIP file and unzips and parses its CSV files in a worker process of the parse pool.
+
+    Process-pool counterpart of `csv_files`: the CPU-bound unzip and parse stage runs in `parse_workers` processes
+    instead of threads holding the GIL. The weather table items of the archive are handed to `archive_tables`,
+    which yields them.
+
+    Args:
+        zip_link (str): The URL of the ZIP file containing CSV files.
+        parse_workers (int): Number of worker processes used for unzipping and parsing.
+        incremental (bool, optional): Skip archives already recorded in the ledger. Defaults to False.
+        write_disposition (TWriteDisposition, optional): Write disposition of the weather tables. Defaults to "replace".
+        scratch_dir (Optional[str], optional): Directory for archives and Arrow files exchanged with the workers.
+            Defaults to the system temp directory.
+        download_cache_dir (Optional[str], optional): Directory of the on-disk download cache. Defaults to None.
+        download_cache_max_bytes (int, optional): Byte budget of the download cache. Defaults to
+            DEFAULT_CACHE_MAX_BYTES.
+        include_columns (Optional[TIncludeColumns], optional): Columns to parse per table type. Defaults to None.
+        table_format (Optional[TTableFormat], optional): Table format of the weather tables, partitioned by year.
+            Defaults to None.
+        sort_rows (bool, optional): Sort the rows of each item by year, station and date before they are written.
+            Defaults to False.
+        memory_budget (Optional[int], optional): Bytes of archives and tables allowed in flight. A download waits
+            until an estimate of the archive and its CSV files fits into the budget, see `_reserve_archive`. Parsed
+            tables stay accounted until `archive_tables` has seen them written. Defaults to None (no budget).
+
+    Yields:
+        Iterable[TDataItem]: The parsed archive.
+    """
+    from .helpers import fetch_zip_data, get_download_cache, parse_archive_in_pool
+
+    ledger = dlt.current.source_state().setdefault("archives", {})
+    budget = _memory_budget(memory_budget)
+    reservation = _reserve_archive(budget, ledger.get(zip_link))
+    items: list[tuple[TDataItem, int]] = []
+    tables = 0
+    try:
+        zip_file = fetch_zip_data(
+            zip_link,
+            ledger.get(zip_link) if incremental else None,
+            stream=True,
+            scratch_dir=scratch_dir,
+            cache=get_download_cache(download_cache_dir, download_cache_max_bytes) if download_cache_dir else None,
+        )
+        if zip_file is None:
+            return
+        # the reservation covers the archive and the CSV files in the workers until the archive is parsed
+        _reconcile_archive(reservation, zip_file)
+        for table_data, table_type in parse_archive_in_pool(zip_file, parse_workers, scratch_dir, include_columns):
+            tables += 1
+            item = _weather_table_item(
+                table_data, table_type, write_disposition, include_columns, table_format, sort_rows
+            )
+            if item is not None:
+                # released by archive_tables once dlt has written the item
+                if budget is not None:
+                    budget.acquire(table_data.nbytes)
+                items.append((item, table_data.nbytes))
+    finally:
+        if reservation is not None:
+            reservation.release()
+    yield _ParsedArchive(zip_link, zip_file.fingerprint, items, tables, zip_file.failed)
+
+
+@dlt.transformer(name="weather_tables", write_disposition="replace")
+def archive_tables(archive: _ParsedArchive, memory_budget: Optional[int] = None) -> Iterable[TDataItem]:
+    """
+    Yields the weather table items of an archive parsed by `parsed_archives`.
+
+    The transformer is not parallelized, so it runs in the extract thread, which writes an item before it resumes
+    the generator. The bytes of an item are therefore released right after dlt has written it.
+
+    Args:
+        archive (_ParsedArchive): The parsed archive.
+        memory_budget (Optional[int], optional): Memory budget shared with `parsed_archives`. Defaults to None.
+
+    Yields:
+        Iterable[TDataItem]: Extracted data items with schema hints based on the detected table type.
+    """
+    ledger = dlt.current.source_state().setdefault("archives", {})
+    budget = _memory_budget(memory_budget)
+    try:
+        while archive.items:
+            item, nbytes = archive.items[0]
+            yield item
+            del archive.items[0]
+            if budget is not None:
+                budget.release(nbytes)
+        # like in csv_files, archives that failed or had no tables are fetched again on the next run
+        if archive.tables and not archive.failed:
+            ledger[archive.zip_link] = archive.fingerprint
+    finally:
+        if budget is not None:
+            budget.release(sum(nbytes for _, nbytes in archive.items))
 
 
 @dlt.source(name="imgw_historic")
-def imgw_historic() -> list[DltResource]:
+def imgw_historic(
+    incremental: bool = False,
+    block_size: Optional[int] = None,
+    parse_workers: int = 0,
+    include_columns: Optional[dict[str, list[str]]] = None,
+    table_format: Optional[TTableFormat] = None,
+    sort_rows: bool = False,
+    memory_budget: Optional[int] = None,
+) -> list[DltResource]:
     """
     Returns a list of DltResources representing the historic weather data from IMGW.
 
     The returned list includes resources for zip links, CSV files, and weather tables.
 
+    Args:
+        incremental (bool, optional): Only process archives that are new or changed since the last run and merge
+            their rows into the existing tables instead of replacing them. Defaults to False.
+        block_size (Optional[int], optional): Stream CSV files as record batches of roughly this many bytes
+            instead of parsing each file into a single table. Defaults to None.
+        parse_workers (int, optional): If greater than 0, archives are unzipped and parsed in a pool of this many
+            worker processes instead of in threads. `block_size` does not apply in this mode. Defaults to 0.
+        include_columns (Optional[dict[str, list[str]]], optional): Columns to load per table type, e.g.
+            {"s_t": ["air_temperature_c", "precipitation_6hr_mm"]}. Other columns are never converted by the CSV reader.
+            Primary key columns are always included. Defaults to None (all columns).
+        table_format (Optional[TTableFormat], optional): Table format of the weather tables on filesystem
+            destinations, e.g. "delta". Tables are then partitioned Hive-style by year
+            (`<table>/year=<year>/`) so readers can prune partitions. Defaults to None (plain Parquet files, which
+            dlt lays out per load and cannot split by year).
+        sort_rows (bool, optional): Sort rows by year, station and date before they are written, so that Parquet
+            row groups carry narrow min/max statistics and plain Parquet files can be pruned by year. Rows are sorted
+            per item (a CSV file or record batch); dlt appends items to a file in the order they are extracted.
+            Defaults to False.
+        memory_budget (Optional[int], optional): Bytes of archives, CSV files and parsed tables allowed in flight
+            across all stages. New downloads wait until an estimate of their archive fits into the budget. With a
+            budget, parsed tables are released only after dlt has written them, so CSV files are parsed in the extract
+            thread unless `parse_workers` is set. Defaults to None (no budget).
+
     Returns:
         list[DltResource]: A list of DltResources for the historic weather data.
     """
-    return [zip_links | csv_files | weather_tables]
+    from .helpers import get_parse_plans
+
+    write_disposition: TWriteDisposition = "merge" if incremental else "replace"
+    # fail on misconfigured projections before anything is downloaded
+    get_parse_plans(include_columns=include_columns)
+    tables: DltResource
+    if parse_workers > 0:
+        tables = (
+            zip_links
+            | parsed_archives(
+                parse_workers=parse_workers,
+                incremental=incremental,
+                write_disposition=write_disposition,
+                include_columns=include_columns,
+                table_format=table_format,
+                sort_rows=sort_rows,
+                memory_budget=memory_budget,
+            )
+            | archive_tables(memory_budget=memory_budget)
+        )
+    else:
+        parse_step = weather_tables(
+            write_disposition=write_disposition,
+            block_size=block_size,
+            include_columns=include_columns,
+            table_format=table_format,
+            sort_rows=sort_rows,
+            memory_budget=memory_budget,
+        )
+        # see the notes of weather_tables
+        if not memory_budget:
+            parse_step = parse_step.parallelize()
+        tables = zip_links | csv_files(incremental=incremental, memory_budget=memory_budget) | parse_step
+    tables.apply_hints(write_disposition=write_disposition)
+    return [tables]
 
 
 def get_dlt_local_pipeline(
     dataset_name: str,
     db_file: str = "output/imgw.db",
+    memory_limit: str = DEFAULT_MEMORY_LIMIT,
+    threads: Optional[int] = None,
+    temp_directory: Optional[str] = None,
 ) -> dlt.Pipeline:
     """
     Creates a dlt pipeline for loading data into a local DuckDB database.
 
     Args:
         db_file (str): The path to the DuckDB database file.
+        memory_limit (str): Memory limit of DuckDB. Defaults to DEFAULT_MEMORY_LIMIT.
+        threads (Optional[int]): Number of DuckDB threads. Defaults to None (number of cores).
+        temp_directory (Optional[str]): Directory where DuckDB spills data over the memory limit. Defaults to None.
 
     Returns:
         dlt.Pipeline: A dlt pipeline configured to load data into the specified local DuckDB database.
     """
-    db = duckdb.connect(db_file, config={"memory_limit": "2GB", "preserve_insertion_order": "false"})
+    # imported here, so importing the sources does not load duckdb
+    import duckdb
+
+    db = duckdb.connect(db_file, config=duckdb_config(memory_limit, threads, temp_directory))
     return dlt.pipeline(
         pipeline_name="imgw_pipeline_local",
         destination=dlt.destinations.duckdb(db, destination_name="local"),
@@ -132,18 +595,123 @@ def get_dlt_datalake_pipeline(dataset_name: str = "raw_data") -> dlt.Pipeline:
     )
 
 
+def _new_real_time_items(path: str, data: TDataItem) -> Iterator[TDataItem]:
+    """
+    Drops what earlier polls of an endpoint already loaded, keeping digests in the source state.
+
+    Records of the measurement endpoints are filtered per station and yielded as a typed Arrow table; other
+    documents are yielded only when they changed. Measurement endpoints that did not return a list of records
+    (e.g. an error document) yield nothing, so their tables keep the shape of the records.
+    """
+    from imgw.common import REAL_TIME_PRIMARY_KEYS
+
+    from .helpers import filter_unchanged, json_digest, records_to_table
+
+    state = dlt.current.source_state()
+    if path in REAL_TIME_PRIMARY_KEYS:
+        if not isinstance(data, list):
+            logger.warning("Expected a list of records from %s, got %s; skipping", path, type(data).__name__)
+            return
+        digests = state.setdefault("record_digests", {}).setdefault(path, {})
+        records = list(filter_unchanged(path, data, digests))
+        if records:
+            yield records_to_table(path, records)
+        return
+    document_digests = state.setdefault("document_digests", {})
+    digest = json_digest(data)
+    if document_digests.get(path) != digest:
+        document_digests[path] = digest
+        yield data
+
+
 @dlt.source(name="imgw_real_time", max_table_nesting=0)
-def imgw_real_time() -> list[DltResource]:
+def imgw_real_time(
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    sla_seconds: Optional[float] = DEFAULT_SLA_SECONDS,
+    stations: Optional[dict[str, list[str]]] = None,
+    max_requests_per_second: Optional[float] = DEFAULT_MAX_REQUESTS_PER_SECOND,
+    station_workers: int = DEFAULT_STATION_WORKERS,
+    station_batch_size: int = DEFAULT_STATION_BATCH_SIZE,
+) -> list[DltResource]:
     """
     IMGW real-time API source function generating a list of resources based on endpoints.
 
+    The endpoints are fetched concurrently, each in its own extract worker, over one keep-alive session, so a
+    poll takes about as long as the slowest endpoint. Keep `[extract] workers` at least at the number of
+    endpoints for that.
+
+    The synop, hydro and meteo measurements are merged on their natural keys (REAL_TIME_PRIMARY_KEYS), and
+    records equal to the last one seen for their station are dropped before normalize, so the tables grow
+    with new observations instead of with the number of polls. They are yielded as Arrow tables typed by
+    REAL_TIME_ARROW_SCHEMA. Warnings are appended when their document
+    changed since the last poll.
+
+    Measurement endpoints listed in `stations` are swept per station instead: the stations are fetched
+    concurrently under a request cap shared by the whole process, and their records are yielded in batches.
+
+    Args:
+        request_timeout (float, optional): Timeout of a single request attempt in seconds.
+            Defaults to DEFAULT_REQUEST_TIMEOUT.
+        max_attempts (int, optional): Attempts per endpoint; connection errors, timeouts, 429 and 5xx responses
+            are retried with exponential backoff. Defaults to DEFAULT_MAX_ATTEMPTS.
+        sla_seconds (Optional[float], optional): Time allowed for each endpoint, retries included. Endpoints that
+            miss it are skipped with a warning, so a slow endpoint cannot hold up the poll. Defaults to
+            DEFAULT_SLA_SECONDS; None waits for every endpoint. For station sweeps the SLA applies to the whole
+            sweep, and stations that miss it are skipped.
+        stations (Optional[dict[str, list[str]]], optional): Station ids to fetch per API path, e.g.
+            {"synop": ["12295", "12375"]}. Only the measurement endpoints of REAL_TIME_PRIMARY_KEYS can be swept.
+            Defaults to None (aggregate endpoints only).
+        max_requests_per_second (Optional[float], optional): Request cap of station sweeps.
+            Defaults to DEFAULT_MAX_REQUESTS_PER_SECOND; None disables the cap.
+        station_workers (int, optional): Stations fetched at the same time per endpoint.
+            Defaults to DEFAULT_STATION_WORKERS.
+        station_batch_size (int, optional): Records per batch yielded by station sweeps.
+            Defaults to DEFAULT_STATION_BATCH_SIZE.
+
     Returns:
         Iterable[DltResource]: List of resource functions.
+
+    Raises:
+        ValueError: If `stations` lists an endpoint that cannot be swept per station.
     """
+    from imgw.common import REAL_TIME_PRIMARY_KEYS
+
+    from .helpers import fetch_stations, get_json_data
+
+    stations = stations or {}
+    unknown = sorted(set(stations) - set(REAL_TIME_PRIMARY_KEYS))
+    if unknown:
+        raise ValueError(f"Cannot fetch per station: {', '.join(unknown)}")  # noqa: TRY003
+
+    def fetch(path: str) -> Iterator[TDataItem]:
+        if path in stations:
+            yield from fetch_stations(
+                path,
+                stations[path],
+                request_timeout,
+                max_attempts,
+                sla_seconds,
+                max_requests_per_second,
+                station_workers,
+                station_batch_size,
+            )
+        else:
+            yield from get_json_data(path, request_timeout, max_attempts, sla_seconds)
+
+    def endpoint_data(path: str) -> Iterator[TDataItem]:
+        # options are bound here: dlt injects config into resource arguments with defaults, and such resources
+        # are no longer run in parallel
+        for data in fetch(path):
+            yield from _new_real_time_items(path, data)
+
     resources = []
     for endpoint in DEFAULT_ENDPOINTS:
-        res_function = dlt.resource(get_json_data, name=endpoint["endpoint_name"], write_disposition="append")(
-            path=endpoint["api_path"]
-        )
+        path = endpoint["api_path"]
+        res_function = dlt.resource(
+            endpoint_data, name=endpoint["endpoint_name"], write_disposition="append", parallelized=True
+        )(path=path)
+        if path in REAL_TIME_PRIMARY_KEYS:
+            res_function.apply_hints(write_disposition="merge", primary_key=REAL_TIME_PRIMARY_KEYS[path])
         resources.append(res_function)
     return resources
@@ -1,4 +1,125 @@
-from .extract import ImgwCsv, fetch_zip_data, get_json_data, parse_table, unzip
-from .scraper import find_zip_links
+import importlib
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["ImgwCsv", "fetch_zip_data", "find_zip_links", "get_json_data", "parse_table", "unzip"]
+if TYPE_CHECKING:
+    from .config import (
+        DEFAULT_CACHE_MAX_BYTES,
+        DEFAULT_MAX_ATTEMPTS,
+        DEFAULT_MAX_REQUESTS_PER_SECOND,
+        DEFAULT_REQUEST_TIMEOUT,
+        DEFAULT_SLA_SECONDS,
+        DEFAULT_SPOOL_MAX_SIZE,
+        DEFAULT_STATION_BATCH_SIZE,
+        DEFAULT_STATION_WORKERS,
+        TIncludeColumns,
+    )
+    from .crawl_index import CrawlIndex
+    from .download_cache import DownloadCache, get_download_cache
+    from .extract import (
+        ArchiveProgress,
+        ImgwCsv,
+        ImgwZip,
+        fetch_zip_data,
+        parse_table,
+        parse_table_batches,
+        unzip,
+    )
+    from .parallel import parse_archive_in_pool
+    from .parse_plan import get_parse_plans
+    from .real_time import (
+        SlaExceededError,
+        fetch_coalesced,
+        fetch_endpoint,
+        fetch_stations,
+        filter_unchanged,
+        get_api_rate_limiter,
+        get_api_session,
+        get_json_data,
+        json_digest,
+        records_to_table,
+    )
+    from .scraper import find_zip_links
+
+# submodules are imported on first access, so using one helper does not import the dependencies of all of them
+_LAZY_IMPORTS = {
+    "CrawlIndex": ".crawl_index",
+    "DEFAULT_CACHE_MAX_BYTES": ".config",
+    "DownloadCache": ".download_cache",
+    "get_download_cache": ".download_cache",
+    "DEFAULT_SPOOL_MAX_SIZE": ".config",
+    "ArchiveProgress": ".extract",
+    "ImgwCsv": ".extract",
+    "ImgwZip": ".extract",
+    "fetch_zip_data": ".extract",
+    "parse_table": ".extract",
+    "parse_table_batches": ".extract",
+    "unzip": ".extract",
+    "parse_archive_in_pool": ".parallel",
+    "TIncludeColumns": ".config",
+    "get_parse_plans": ".parse_plan",
+    "DEFAULT_MAX_ATTEMPTS": ".config",
+    "DEFAULT_MAX_REQUESTS_PER_SECOND": ".config",
+    "DEFAULT_REQUEST_TIMEOUT": ".config",
+    "DEFAULT_SLA_SECONDS": ".config",
+    "DEFAULT_STATION_BATCH_SIZE": ".config",
+    "DEFAULT_STATION_WORKERS": ".config",
+    "SlaExceededError": ".real_time",
+    "fetch_coalesced": ".real_time",
+    "fetch_endpoint": ".real_time",
+    "fetch_stations": ".real_time",
+    "filter_unchanged": ".real_time",
+    "get_api_rate_limiter": ".real_time",
+    "get_api_session": ".real_time",
+    "get_json_data": ".real_time",
+    "json_digest": ".real_time",
+    "records_to_table": ".real_time",
+    "find_zip_links": ".scraper",
+}
+
+__all__ = [
+    "DEFAULT_CACHE_MAX_BYTES",
+    "DEFAULT_MAX_ATTEMPTS",
+    "DEFAULT_MAX_REQUESTS_PER_SECOND",
+    "DEFAULT_REQUEST_TIMEOUT",
+    "DEFAULT_SLA_SECONDS",
+    "DEFAULT_SPOOL_MAX_SIZE",
+    "DEFAULT_STATION_BATCH_SIZE",
+    "DEFAULT_STATION_WORKERS",
+    "ArchiveProgress",
+    "CrawlIndex",
+    "DownloadCache",
+    "ImgwCsv",
+    "ImgwZip",
+    "SlaExceededError",
+    "TIncludeColumns",
+    "fetch_coalesced",
+    "fetch_endpoint",
+    "fetch_stations",
+    "fetch_zip_data",
+    "filter_unchanged",
+    "find_zip_links",
+    "get_api_rate_limiter",
+    "get_api_session",
+    "get_download_cache",
+    "get_json_data",
+    "get_parse_plans",
+    "json_digest",
+    "parse_archive_in_pool",
+    "parse_table",
+    "parse_table_batches",
+    "records_to_table",
+    "unzip",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")  # noqa: TRY003
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,16 @@
+from collections.abc import Mapping, Sequence
+
+# defaults and types used in the signatures of the sources; this module imports nothing heavy, so defining the
+# sources does not load the helpers
+
+TIncludeColumns = Mapping[str, Sequence[str]]
+
+DEFAULT_SPOOL_MAX_SIZE = 32 * 1024 * 1024
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024**3
+
+DEFAULT_REQUEST_TIMEOUT = 10.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_SLA_SECONDS = 30.0
+DEFAULT_STATION_WORKERS = 16
+DEFAULT_STATION_BATCH_SIZE = 100
+DEFAULT_MAX_REQUESTS_PER_SECOND = 20.0
@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from typing import NamedTuple, Optional
+
+
+class IndexEntry(NamedTuple):
+    """Cached state of a single directory listing."""
+
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    zip_links: list[str]
+    subdirs: list[str]
+
+
+class CrawlIndex:
+    """
+    Persistent index of crawled directory listings, stored in a SQLite file.
+
+    For every directory the index keeps the HTTP validators (ETag/Last-Modified) returned by the server
+    together with the zip links and subdirectories found on the listing, so that later crawls can send
+    conditional requests and reuse the stored links when the listing did not change.
+
+    Args:
+        path (str): Path to the SQLite file. Use ":memory:" for a throwaway index.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS listings (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    zip_links TEXT NOT NULL,
+                    subdirs TEXT NOT NULL,
+                    checked_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get(self, url: str) -> Optional[IndexEntry]:
+        """
+        Returns the stored entry for a directory.
+
+        Args:
+            url (str): The URL of the directory.
+
+        Returns:
+            Optional[IndexEntry]: The stored entry, or None if the directory was never indexed.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT url, etag, last_modified, zip_links, subdirs FROM listings WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return IndexEntry(row[0], row[1], row[2], json.loads(row[3]), json.loads(row[4]))
+
+    def put(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        zip_links: list[str],
+        subdirs: list[str],
+    ) -> None:
+        """
+        Stores (or replaces) the entry for a directory.
+
+        Args:
+            url (str): The URL of the directory.
+            etag (Optional[str]): The ETag header returned with the listing.
+            last_modified (Optional[str]): The Last-Modified header returned with the listing.
+            zip_links (list[str]): Zip links found on the listing.
+            subdirs (list[str]): Subdirectories found on the listing.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(zip_links), json.dumps(subdirs), time.time()),
+            )
+
+    def walk(self, url: str, visited_dirs: set[str], missing: list[str]) -> Iterator[str]:
+        """
+        Yields zip links of all indexed directories below the given one, without touching the network.
+
+        Args:
+            url (str): The URL of the directory to start from.
+            visited_dirs (set[str]): Directories already visited by the crawler. Replayed directories are added to it.
+            missing (list[str]): Directories of the subtree that are not in the index are appended to this list,
+                so that the caller can crawl them.
+
+        Yields:
+            str: Zip links stored in the index.
+        """
+        stack = [url]
+        while stack:
+            current_url = stack.pop()
+            entry = self.get(current_url)
+            if entry is None:
+                missing.append(current_url)
+                continue
+            yield from entry.zip_links
+            for subdir in entry.subdirs:
+                if subdir not in visited_dirs:
+                    visited_dirs.add(subdir)
+                    stack.append(subdir)
+
+    def close(self) -> None:
+        """Closes the underlying SQLite connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def conditional_headers(entry: Optional[IndexEntry]) -> dict[str, str]:
+    """
+    Builds conditional request headers from a stored index entry.
+
+    Args:
+        entry (Optional[IndexEntry]): The stored entry.
+
+    Returns:
+        dict[str, str]: `If-None-Match`/`If-Modified-Since` headers, empty if no validators are known.
+    """
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
@@ -0,0 +1,229 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from functools import cache
+from typing import NamedTuple, Optional
+
+import pyarrow as pa
+
+from imgw.common import get_logger
+
+from .config import DEFAULT_CACHE_MAX_BYTES
+
+logger = get_logger(__name__)
+
+# unindexed blobs and partial downloads younger than this may still be registered by another process sharing the
+# cache, so the sweep leaves them alone
+ORPHAN_MIN_AGE_SECONDS = 3600
+
+
+class CacheEntry(NamedTuple):
+    """A cached download."""
+
+    url: str
+    sha256: str
+    size: int
+    fingerprint: dict[str, str]
+
+
+class DownloadCache:
+    """
+    Content-addressed on-disk cache of downloaded archives with a size-capped LRU eviction.
+
+    Blobs are stored under `<root>/blobs/<sha256[:2]>/<sha256>`, so identical archives published under
+    different URLs are stored once. A SQLite index maps every URL to its blob, the fingerprint
+    (validators) of the cached version and the time of last access. When the total size of the cached
+    URLs exceeds `max_bytes`, least recently used entries are evicted. Blobs that no URL points to, left over
+    when a process stopped between storing and registering a download, are swept when the cache is opened.
+
+    Args:
+        root (str): Directory of the cache.
+        max_bytes (int): Byte budget of the cache. Defaults to DEFAULT_CACHE_MAX_BYTES.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    url TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+        self.sweep_orphans()
+
+    def blob_path(self, sha256: str) -> str:
+        """Returns the path of a stored blob by its SHA-256."""
+        return os.path.join(self.root, "blobs", sha256[:2], sha256)
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """
+        Returns the cache entry of a URL, if its blob is still present.
+
+        Args:
+            url (str): The URL of the download.
+
+        Returns:
+            Optional[CacheEntry]: The entry, or None on a cache miss.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT url, sha256, size, fingerprint FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = CacheEntry(row[0], row[1], row[2], json.loads(row[3]))
+        if not os.path.exists(self.blob_path(entry.sha256)):
+            return None
+        return entry
+
+    def read(self, entry: CacheEntry) -> Optional[pa.Buffer]:
+        """
+        Memory-maps the blob of a cache entry and marks the entry as recently used.
+
+        Args:
+            entry (CacheEntry): The entry to read.
+
+        Returns:
+            Optional[pa.Buffer]: Zero-copy buffer backed by the cached file, or None if the blob was evicted since
+                the entry was looked up.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), entry.url))
+        try:
+            return self.read_blob(entry.sha256)
+        except FileNotFoundError:
+            return None
+
+    def read_blob(self, sha256: str) -> pa.Buffer:
+        """
+        Memory-maps a stored blob. The mapping stays valid even if the blob is evicted afterwards.
+
+        Args:
+            sha256 (str): SHA-256 of the blob.
+
+        Returns:
+            pa.Buffer: Zero-copy buffer backed by the cached file.
+        """
+        return pa.memory_map(self.blob_path(sha256)).read_buffer()
+
+    def write_blob(self, chunks: Iterable[bytes]) -> tuple[str, int]:
+        """
+        Streams data into the cache and stores it under its content hash.
+
+        Args:
+            chunks (Iterable[bytes]): The data to store.
+
+        Returns:
+            tuple[str, int]: SHA-256 and size of the stored data.
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                for chunk in chunks:
+                    tmp_file.write(chunk)
+                    hasher.update(chunk)
+                    size += len(chunk)
+            sha256 = hasher.hexdigest()
+            blob_path = self.blob_path(sha256)
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(tmp_path, blob_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha256, size
+
+    def put(self, url: str, sha256: str, size: int, fingerprint: dict[str, str]) -> CacheEntry:
+        """
+        Points a URL to a stored blob and evicts least recently used entries over the byte budget.
+
+        Args:
+            url (str): The URL of the download.
+            sha256 (str): SHA-256 of a blob stored with `write_blob`.
+            size (int): Size of the blob.
+            fingerprint (dict[str, str]): Fingerprint of the downloaded version, used for revalidation.
+
+        Returns:
+            CacheEntry: The stored entry.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (url, sha256, size, json.dumps(fingerprint), time.time()),
+            )
+        self.evict()
+        return CacheEntry(url, sha256, size, fingerprint)
+
+    def evict(self) -> None:
+        """Removes least recently used entries, and blobs no longer referenced, until the cache fits its budget."""
+        with self._lock:
+            with self._connection:
+                total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                evicted = []
+                for url, sha256, size in self._connection.execute(
+                    "SELECT url, sha256, size FROM entries ORDER BY last_access"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._connection.execute("DELETE FROM entries WHERE url = ?", (url,))
+                    evicted.append(sha256)
+                    total -= size
+            for sha256 in evicted:
+                in_use = self._connection.execute("SELECT 1 FROM entries WHERE sha256 = ?", (sha256,)).fetchone()
+                if in_use is None:
+                    logger.debug("Evicting %s from download cache", sha256)
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(self.blob_path(sha256))
+
+    def sweep_orphans(self) -> None:
+        """Removes blobs no entry points to and partial downloads, once they are older than ORPHAN_MIN_AGE_SECONDS."""
+        with self._lock:
+            indexed = {row[0] for row in self._connection.execute("SELECT DISTINCT sha256 FROM entries")}
+        paths = [entry.path for entry in os.scandir(self.root) if entry.name.endswith(".part")]
+        for prefix in os.scandir(os.path.join(self.root, "blobs")):
+            if prefix.is_dir():
+                paths += [blob.path for blob in os.scandir(prefix.path) if blob.name not in indexed]
+        cutoff = time.time() - ORPHAN_MIN_AGE_SECONDS
+        for path in paths:
+            with contextlib.suppress(FileNotFoundError):
+                if os.path.getmtime(path) < cutoff:
+                    logger.debug("Removing orphaned file %s from download cache", path)
+                    os.remove(path)
+
+    def close(self) -> None:
+        """Closes the underlying SQLite connection."""
+        with self._lock:
+            self._connection.close()
+
+
+@cache
+def get_download_cache(root: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> DownloadCache:
+    """
+    Returns the download cache for a directory, shared by all threads of the process.
+
+    Args:
+        root (str): Directory of the cache.
+        max_bytes (int): Byte budget of the cache. Defaults to DEFAULT_CACHE_MAX_BYTES.
+
+    Returns:
+        DownloadCache: The download cache.
+    """
+    return DownloadCache(root, max_bytes)
@@ -1,51 +1,185 @@
-import os
-import re
+import hashlib
+import io
 import shutil
-import subprocess
+import threading
+import time
 import zipfile
-from collections.abc import Iterable
-from io import BytesIO
-from typing import Optional, Union
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO, Optional, Union, cast
 from urllib.parse import urlparse
 
 import pyarrow as pa
-from dlt.sources import TDataItem
 from dlt.sources.helpers import requests
 from pyarrow import csv
-from pydantic import BaseModel, field_validator
 
-from imgw.common import ARROW_COLUMNS_SCHEMA, get_logger
+from imgw.common import ARROW_COLUMNS_SCHEMA, StageMetrics, get_logger, get_run_metrics
+
+from .config import DEFAULT_SPOOL_MAX_SIZE, TIncludeColumns
+from .download_cache import CacheEntry, DownloadCache
+from .parse_plan import ParsePlan, get_parse_plans, match_table_type
+from .zip_reader import iter_local_members
 
 logger = get_logger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+BytesLike = Union[bytes, memoryview, pa.Buffer]
+
+
+@dataclass(slots=True)
+class FileResource:
+    """
+    Lightweight container for a file passed between pipeline stages.
+
+    The content is kept as the bytes-like object it was produced as (bytes, memoryview or pyarrow.Buffer)
+    and is never copied: `open` wraps it in a zero-copy pyarrow.BufferReader. `failed` is set by the stage
+    that could not read the file in full (unzip for archives, parse for CSV files).
+    """
 
-class FileResource(BaseModel):
     filename: str
-    content: bytes
+    content: BytesLike = b""
+    failed: bool = False
 
+    def __post_init__(self) -> None:
+        self.validate_filename()
 
+    def validate_filename(self) -> None:
+        """Validate the filename of the resource. Subclasses raise ValueError for unexpected file types."""
+
+    def open(self) -> BinaryIO:
+        """Returns a readable binary stream with the content of the file."""
+        return cast(BinaryIO, pa.BufferReader(self.content))
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the content in bytes."""
+        return len(self.content)
+
+
+@dataclass(slots=True)
 class ImgwCsv(FileResource):
-    """Represents a CSV file resource."""
+    """Represents a CSV file resource, with the progress of the archive it was unzipped from."""
 
-    @field_validator("filename")
-    @classmethod
-    def filename_must_be_csv(cls, v: str) -> str:
+    archive: Optional["ArchiveProgress"] = None
+
+    def validate_filename(self) -> None:
         """Validate if the filename ends with .csv."""
-        if not v.lower().endswith(".csv"):
+        if not self.filename.lower().endswith(".csv"):
             raise ValueError("Filename must end with .csv")  # noqa: TRY003
-        return v
 
 
+@dataclass(slots=True)
 class ImgwZip(FileResource):
-    """Represents a ZIP file resource."""
+    """
+    Represents a ZIP file resource.
+
+    The content is either kept in memory (`content`) or, for streamed downloads, in a spool (`spool`): an in-memory
+    buffer, or a named temporary file once the download exceeds its size threshold, see `_spool_response`. `path` is set when the content is backed
+    by a file on disk that outlives the archive, i.e. a blob of the download cache.
+    """
 
-    @field_validator("filename")
-    @classmethod
-    def filename_must_be_zip(cls, v: str) -> str:
+    fingerprint: dict[str, str] = field(default_factory=dict)
+    spool: Optional[BinaryIO] = None
+    path: Optional[str] = None
+
+    def validate_filename(self) -> None:
         """Validate if the filename ends with .zip."""
-        if not v.lower().endswith(".zip"):
+        if not self.filename.lower().endswith(".zip"):
             raise ValueError("Filename must end with .zip")  # noqa: TRY003
-        return v
+
+    def open(self) -> BinaryIO:
+        """Returns a readable binary stream with the content of the archive, rewound to the start."""
+        if self.spool is not None:
+            self.spool.seek(0)
+            return self.spool
+        return FileResource.open(self)
+
+    def disk_path(self) -> Optional[str]:
+        """Returns the path of a file on disk holding the archive, or None if the archive is only in memory."""
+        if self.spool is not None:
+            # only a spool moved to disk is a named file, see _spool_response
+            name = getattr(self.spool, "name", None)
+            if not isinstance(name, str):
+                return None
+            # readers open the file by path, so buffered writes must reach it first
+            self.spool.flush()
+            return name
+        return self.path
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the archive in bytes."""
+        if self.spool is None:
+            return len(self.content)
+        position = self.spool.tell()
+        size = self.spool.seek(0, 2)
+        self.spool.seek(position)
+        return size
+
+    def unzipped_nbytes(self) -> Optional[int]:
+        """Returns the total size of the archive members from its central directory, or None if it cannot be read."""
+        try:
+            with zipfile.ZipFile(self.open()) as zip_ref:
+                return sum(file_info.file_size for file_info in zip_ref.infolist())
+        except (zipfile.BadZipFile, EOFError):
+            return None
+
+    def close(self) -> None:
+        """Releases the spool, if any. A spool on disk is removed."""
+        if self.spool is not None:
+            self.spool.close()
+
+
+class ArchiveProgress:
+    """
+    Tracks whether an archive was unzipped and all of its CSV files were parsed without failures.
+
+    Unzip and parse run in different resources, so the CSV files carry the progress of their archive. The
+    `on_complete` callback runs once, after the archive was unzipped in full and its last CSV file was parsed.
+    It never runs if a stage failed or did not finish, or if the archive had no CSV files.
+    """
+
+    def __init__(self, on_complete: Callable[[], None]) -> None:
+        self._on_complete = on_complete
+        self._lock = threading.Lock()
+        self._files = 0
+        self._pending = 0
+        self._unzipped = False
+        self._failed = False
+        self._completed = False
+
+    def add(self, csv_file: ImgwCsv) -> ImgwCsv:
+        """Registers a CSV file of the archive that still has to be parsed and returns it."""
+        with self._lock:
+            self._files += 1
+            self._pending += 1
+        csv_file.archive = self
+        return csv_file
+
+    def unzipped(self, failed: bool) -> None:
+        """Marks the archive as unzipped, with all of its CSV files registered."""
+        with self._lock:
+            self._unzipped = True
+            self._failed |= failed
+        self._complete_if_done()
+
+    def parsed(self, failed: bool) -> None:
+        """Marks a registered CSV file as parsed."""
+        with self._lock:
+            self._pending -= 1
+            self._failed |= failed
+        self._complete_if_done()
+
+    def _complete_if_done(self) -> None:
+        with self._lock:
+            done = self._unzipped and self._files > 0 and not self._pending and not self._failed and not self._completed
+            self._completed |= done
+        if done:
+            self._on_complete()
 
 
 ### 0. common
@@ -66,7 +200,7 @@ def _save_failed_file(file: Union[ImgwCsv, ImgwZip]) -> str | None:
     logger.info("Saving file: %s in rejected folder", file.filename)
     try:
         with open(f"./.failed_files/{file.filename}", "wb") as f:
-            f.write(file.content)
+            shutil.copyfileobj(file.open(), f)
     except Exception:
         logger.exception("Failed to save file '%s'", file.filename)
     else:
@@ -76,195 +210,350 @@ def _save_failed_file(file: Union[ImgwCsv, ImgwZip]) -> str | None:
 
 
 ### 1. fetch zips and unzip
-def fetch_zip_data(url: str) -> ImgwZip:
+def _has_validators(response: requests.Response) -> bool:
+    """Checks if the response carries an ETag or Last-Modified header."""
+    return bool(response.headers.get("ETag") or response.headers.get("Last-Modified"))
+
+
+def _archive_fingerprint(response: requests.Response, content_hash: Optional[str] = None) -> dict[str, str]:
     """
-    Fetches zip data from a given URL.
+    Builds a fingerprint identifying a version of an archive.
+
+    Uses the ETag, Last-Modified and Content-Length headers of the response. If the server sent no validators,
+    a SHA-256 hash of the content is used instead.
 
     Args:
-        url (str): The URL to fetch zip data from.
+        response (requests.Response): The response containing the archive.
+        content_hash (Optional[str]): SHA-256 of the content computed while streaming. Defaults to None, in which
+            case it is computed from `response.content` when needed.
 
     Returns:
-        ImgwZip: An ImgwZip object containing the filename and content of the fetched zip data.
-                 If an error occurs during fetching, returns an ImgwZip object with empty filename and content.
+        dict[str, str]: The fingerprint of the archive.
+    """
+    fingerprint = {
+        key: response.headers[header]
+        for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"), ("content_length", "Content-Length"))
+        if response.headers.get(header)
+    }
+    if "etag" not in fingerprint and "last_modified" not in fingerprint:
+        fingerprint["sha256"] = content_hash or hashlib.sha256(response.content).hexdigest()
+    return fingerprint
 
-    Raises:
-        None
+
+def _archive_conditional_headers(fingerprint: Optional[dict[str, str]]) -> dict[str, str]:
     """
-    try:
-        filename = urlparse(url).path.split("/")[-1]
-        response = requests.get(url)
-        response.raise_for_status()
-    except Exception:
-        logger.exception("Error fetching data for %s", url)
-        return ImgwZip(filename="", content=b"")
-    else:
-        return ImgwZip(filename=filename, content=response.content)
+    Builds conditional request headers from a stored archive fingerprint.
 
+    Args:
+        fingerprint (Optional[dict[str, str]]): The stored fingerprint.
 
-def unzip(zip_file: ImgwZip) -> list[ImgwCsv]:
+    Returns:
+        dict[str, str]: `If-None-Match`/`If-Modified-Since` headers, empty if no validators are known.
     """
-    Unzips the provided ImgwZip file into memory and returns a list of ImgwCsv objects.
+    headers = {}
+    if fingerprint:
+        if fingerprint.get("etag"):
+            headers["If-None-Match"] = fingerprint["etag"]
+        if fingerprint.get("last_modified"):
+            headers["If-Modified-Since"] = fingerprint["last_modified"]
+    return headers
+
+
+def _spool_response(
+    response: requests.Response,
+    spool_max_size: int,
+    scratch_dir: Optional[str] = None,
+    hasher: Optional["hashlib._Hash"] = None,
+) -> BinaryIO:
+    """
+    Streams the body of a response into memory, switching to a named temporary file once it exceeds a size.
+
+    The file is named so that worker processes can open it by path, see `ImgwZip.disk_path`.
 
     Args:
-        zip_file (ImgwZip): The zip file to be unzipped.
+        response (requests.Response): The streamed response.
+        spool_max_size (int): Size in bytes above which the body is moved from memory to disk.
+        scratch_dir (Optional[str]): Directory for the temporary file. Defaults to the system temp directory.
+        hasher (Optional[hashlib._Hash]): Hash object updated with every chunk. Defaults to None.
 
     Returns:
-        list[ImgwCsv]: A list of ImgwCsv objects representing the unzipped files.
-        If the zip file is empty or invalid, an empty list is returned.
+        BinaryIO: An io.BytesIO or a NamedTemporaryFile with the body, rewound to the start.
     """
+    spool: BinaryIO = io.BytesIO()
     try:
-        zip_data = BytesIO(zip_file.content)
-        files = []
-        with zipfile.ZipFile(zip_data, "r") as zip_ref:
-            for file_info in zip_ref.infolist():
-                if not file_info.is_dir():
-                    with zip_ref.open(file_info.filename) as file:
-                        imgw_file = ImgwCsv(filename=file.name, content=file.read())
-                        files.append(imgw_file)
-                else:
-                    return []
-    except zipfile.BadZipFile:
-        logger.exception("The provided bytes are not a valid zip file.")
-        logger.info("Turning to alternative unzip method.")
-        return unzip_alt(zip_file)
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            if isinstance(spool, io.BytesIO) and spool.tell() + len(chunk) > spool_max_size:
+                named_file = cast(BinaryIO, NamedTemporaryFile(dir=scratch_dir))  # noqa: SIM115
+                named_file.write(spool.getbuffer())
+                spool = named_file
+            spool.write(chunk)
+            if hasher is not None:
+                hasher.update(chunk)
     except Exception:
-        logger.exception("Failed to read zip file.")
-        return []
-    else:
-        return files
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
 
 
-def unzip_alt(zip_file: ImgwZip) -> list[ImgwCsv]:
+def _cache_response(
+    url: str, response: requests.Response, cache: DownloadCache
+) -> tuple[pa.Buffer, dict[str, str], str]:
     """
-    Unzips the provided ImgwZip into temp directory, reads the CSV files, and returns them as a list of ImgwCsv objects.
+    Streams the body of a response into the download cache.
 
     Args:
-    zip_file (ImgwZip): The zip file to be unzipped.
+        url (str): The URL of the archive.
+        response (requests.Response): The streamed response.
+        cache (DownloadCache): The download cache.
 
     Returns:
-    list[ImgwCsv]: A list of ImgwCsv objects representing the CSV files.
+        tuple[pa.Buffer, dict[str, str], str]: The memory-mapped cached archive, its fingerprint and the path of
+            the cached file.
     """
+    content_hash, size = cache.write_blob(response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE))
+    fingerprint = _archive_fingerprint(response, content_hash)
+    # map the blob before registering it, so that eviction cannot remove it first
+    content = cache.read_blob(content_hash)
+    cache.put(url, content_hash, size, fingerprint)
+    return content, fingerprint, cache.blob_path(content_hash)
+
+
+def _read_archive(
+    url: str,
+    response: requests.Response,
+    stream: bool,
+    spool_max_size: int,
+    scratch_dir: Optional[str],
+    cache: Optional[DownloadCache],
+) -> ImgwZip:
+    """Reads the body of a response with an archive into the download cache, a spooled file or memory."""
+    filename = urlparse(url).path.split("/")[-1]
+    if cache is not None:
+        content, fingerprint, path = _cache_response(url, response, cache)
+        return ImgwZip(filename=filename, content=content, fingerprint=fingerprint, path=path)
+    if stream:
+        hasher = None if _has_validators(response) else hashlib.sha256()
+        spool = _spool_response(response, spool_max_size, scratch_dir, hasher)
+        fingerprint = _archive_fingerprint(response, hasher.hexdigest() if hasher is not None else None)
+        return ImgwZip(filename=filename, spool=spool, fingerprint=fingerprint)
+    return ImgwZip(filename=filename, content=response.content, fingerprint=_archive_fingerprint(response))
+
+
+def _read_cached_archive(url: str, cache: DownloadCache, cached: CacheEntry) -> Optional[ImgwZip]:
+    """Reads a revalidated archive from the download cache, or returns None if it was evicted in the meantime."""
+    content = cache.read(cached)
+    if content is None:
+        logger.info("Archive evicted from download cache during revalidation, downloading it again: %s", url)
+        return None
+    logger.debug("Reading archive from download cache: %s", url)
+    return ImgwZip(
+        filename=urlparse(url).path.split("/")[-1],
+        content=content,
+        fingerprint=cached.fingerprint,
+        path=cache.blob_path(cached.sha256),
+    )
+
+
+def _download_zip(
+    url: str,
+    known_fingerprint: Optional[dict[str, str]] = None,
+    stream: bool = False,
+    spool_max_size: int = DEFAULT_SPOOL_MAX_SIZE,
+    scratch_dir: Optional[str] = None,
+    cache: Optional[DownloadCache] = None,
+) -> Optional[ImgwZip]:
+    """Downloads an archive, see `fetch_zip_data`."""
+    cached = cache.lookup(url) if cache is not None else None
+    # validators of an ingested archive take precedence: a 304 then means there is nothing to load
+    validators = known_fingerprint or (cached.fingerprint if cached is not None else None)
+    zip_file: Optional[ImgwZip]
     try:
-        tmp_dir, failed_file_path = _validate_and_unzip(zip_file)
-        if not tmp_dir:
-            return []
-
-        imgw_files = _read_csv_files(tmp_dir)
-        _cleanup(tmp_dir, failed_file_path)
+        # the streamed connection goes back to the pool on every path, including a 304
+        with requests.get(
+            url, headers=_archive_conditional_headers(validators), stream=stream or cache is not None
+        ) as response:
+            response.raise_for_status()
+            if response.status_code != 304:
+                zip_file = _read_archive(url, response, stream, spool_max_size, scratch_dir, cache)
+            elif known_fingerprint is not None or cache is None or cached is None:
+                logger.debug("Archive not modified: %s", url)
+                return None
+            else:
+                zip_file = _read_cached_archive(url, cache, cached)
+        if zip_file is None:
+            with requests.get(url, stream=True) as response:
+                response.raise_for_status()
+                zip_file = _read_archive(url, response, stream, spool_max_size, scratch_dir, cache)
     except Exception:
-        logger.exception("An error occurred while unzipping file %s", zip_file.filename)
-        return []
-    else:
-        return imgw_files
-
-
-def _unzip_file(unzip_path: str, failed_file_path: str, tmp_dir: str) -> None:
+        logger.exception("Error fetching data for %s", url)
+        get_run_metrics().record("download", failures=1)
+        return None
+
+    if known_fingerprint is not None and zip_file.fingerprint == known_fingerprint:
+        logger.debug("Archive already ingested: %s", url)
+        zip_file.close()
+        return None
+    return zip_file
+
+
+def fetch_zip_data(
+    url: str,
+    known_fingerprint: Optional[dict[str, str]] = None,
+    stream: bool = False,
+    spool_max_size: int = DEFAULT_SPOOL_MAX_SIZE,
+    scratch_dir: Optional[str] = None,
+    cache: Optional[DownloadCache] = None,
+) -> Optional[ImgwZip]:
     """
-    Unzips the file using the provided unzip_path.
+    Fetches zip data from a given URL. Downloads are recorded in the "download" stage of the run metrics.
 
     Args:
-        unzip_path (str): The path to the unzip executable.
-        failed_file_path (str): The path to the file to be unzipped.
-        tmp_dir (str): The directory where the file will be unzipped.
+        url (str): The URL to fetch zip data from.
+        known_fingerprint (Optional[dict[str, str]]): Fingerprint of an already ingested version of the archive.
+            If given, the request is conditional and an unchanged archive is not returned. Defaults to None.
+        stream (bool): Stream the body in chunks into a spooled temporary file instead of reading it into memory.
+            Defaults to False.
+        spool_max_size (int): Size in bytes above which a streamed archive is moved from memory to disk.
+            Defaults to DEFAULT_SPOOL_MAX_SIZE.
+        scratch_dir (Optional[str]): Directory for spooled archives that exceed `spool_max_size`.
+            Defaults to the system temp directory.
+        cache (Optional[DownloadCache]): Download cache. Cached archives are revalidated with a conditional
+            request and read from disk when unchanged; downloaded archives are streamed into the cache.
+            Defaults to None.
+
+    Returns:
+        Optional[ImgwZip]: An ImgwZip object containing the filename, content and fingerprint of the fetched zip data.
+                 Returns None if an error occurs during fetching or if the archive matches `known_fingerprint`.
 
     Raises:
-        subprocess.CalledProcessError: If the unzip operation fails.
+        None
     """
-    try:
-        subprocess.run([unzip_path, "-d", str(tmp_dir), str(failed_file_path)], check=True)  # noqa: S603
-    except subprocess.CalledProcessError:
-        logger.exception("Failed to unzip file %s", failed_file_path)
-        raise
+    with get_run_metrics().measure("download") as sample:
+        zip_file = _download_zip(url, known_fingerprint, stream, spool_max_size, scratch_dir, cache)
+        if zip_file is not None:
+            sample.files = 1
+            sample.bytes_in = zip_file.nbytes
+    return zip_file
 
 
-def _validate_and_unzip(zip_file: ImgwZip) -> tuple[str, str]:
+def unzip(zip_file: ImgwZip) -> Iterator[ImgwCsv]:
     """
-    Saves the zip file and unzips it into a temporary directory.
+    Lazily unzips the provided ImgwZip file, decompressing and yielding one ImgwCsv object at a time.
 
-    Args:
-        zip_file: The zip file to be saved and unzipped.
+    Only a single member of the archive is held in memory at once, so the archive can be consumed
+    member by member while later members are still compressed.
 
-    Returns:
-        A tuple containing the path to the temporary directory where the zip file is unzipped and the path to the saved zip file.
+    Args:
+        zip_file (ImgwZip): The zip file to be unzipped.
 
-    Raises:
-        FileNotFoundError: If the 'unzip' command is not found.
+    Yields:
+        ImgwCsv: ImgwCsv objects representing the unzipped files.
+        If the zip file is empty or invalid, nothing is yielded. If it could not be read in full,
+        `zip_file.failed` is set.
     """
-    failed_file_path = _save_failed_file(zip_file)
-    if not failed_file_path:
-        return "", ""
-
-    tmp_dir = f".tmp-{zip_file.filename}"
-    unzip_path = shutil.which("unzip")
-    if unzip_path is None:
-        raise FileNotFoundError("unzip")
+    yielded: set[str] = set()
+    try:
+        with zipfile.ZipFile(zip_file.open(), "r") as zip_ref:
+            members = zip_ref.infolist()
+            if any(file_info.is_dir() for file_info in members):
+                return
+            for file_info in members:
+                table_type = match_table_type(file_info.filename) or ""
+                with get_run_metrics().measure("unzip", table_type) as sample, zip_ref.open(file_info) as file:
+                    imgw_file = ImgwCsv(filename=file.name, content=file.read())
+                    sample.files = 1
+                    sample.bytes_in = file_info.compress_size
+                    sample.bytes_out = imgw_file.nbytes
+                yielded.add(imgw_file.filename)
+                yield imgw_file
+    except zipfile.BadZipFile:
+        logger.exception("The provided bytes are not a valid zip file.")
+        logger.info("Turning to alternative unzip method.")
+        yield from (imgw_file for imgw_file in unzip_alt(zip_file) if imgw_file.filename not in yielded)
+    except Exception:
+        logger.exception("Failed to read zip file.")
+        zip_file.failed = True
 
-    logger.info("Unzipping file %s into %s...", failed_file_path, tmp_dir)
-    _unzip_file(unzip_path, failed_file_path, tmp_dir)
-    return tmp_dir, failed_file_path
 
+def unzip_alt(zip_file: ImgwZip) -> Iterator[ImgwCsv]:
+    """
+    Recovers CSV files from an archive with a damaged central directory by scanning its local file headers.
 
-def _read_csv_files(tmp_dir: str) -> list[ImgwCsv]:
-    """Reads CSV files from the provided directory.
+    The archive is read in-process from its in-memory or spooled content, without writing it to disk
+    or calling external tools. CSV files are yielded one at a time as ImgwCsv objects. The archive is marked
+    as failed if members were damaged (e.g. a truncated download) or nothing could be recovered.
 
     Args:
-        tmp_dir (str): The directory containing the CSV files.
-
-    Returns:
-        list[ImgwCsv]: A list of ImgwCsv objects representing the read CSV files.
+    zip_file (ImgwZip): The zip file to be unzipped.
 
-    Raises:
-        Exception: If an error occurs while reading a CSV file.
+    Yields:
+    ImgwCsv: ImgwCsv objects representing the CSV files.
     """
-    csv_files = [f for f in os.listdir(tmp_dir) if f.endswith(".csv")]
-    imgw_files = []
-    for csv_file in csv_files:
-        file_path = os.path.join(tmp_dir, csv_file)
-        try:
-            logger.debug("Reading file %s", file_path)
-            with open(file_path, "rb") as file:
-                imgw_file = ImgwCsv(filename=csv_file, content=file.read())
-                imgw_files.append(imgw_file)
-        except Exception:
-            logger.exception("Failed to read file %s", file_path)
-    return imgw_files
+    metrics = get_run_metrics()
+    damaged: list[int] = []
+    recovered = False
+    try:
+        started = time.perf_counter()
+        for member in iter_local_members(zip_file.open(), damaged):
+            recovered = True
+            if member.filename.lower().endswith(".csv"):
+                metrics.record(
+                    "unzip",
+                    match_table_type(member.filename) or "",
+                    seconds=time.perf_counter() - started,
+                    bytes_out=len(member.content),
+                    files=1,
+                )
+                yield ImgwCsv(filename=member.filename, content=member.content)
+            else:
+                logger.debug("Ignoring member %s of %s", member.filename, zip_file.filename)
+            started = time.perf_counter()
+    except Exception:
+        logger.exception("An error occurred while unzipping file %s", zip_file.filename)
+        metrics.record("unzip", failures=1)
+        zip_file.failed = True
+    if damaged or not recovered:
+        zip_file.failed = True
 
 
-def _cleanup(tmp_dir: str, failed_file_path: str) -> None:
+### 2. parse table
+def _match_parse_plan(file: ImgwCsv, plans: dict[str, ParsePlan]) -> Optional[ParsePlan]:
     """
-    Removes the temporary directory and the failed file.
+    Detects the table type of a CSV file from its filename and returns its parse plan.
 
     Args:
-        tmp_dir (str): The path to the temporary directory to be removed.
-        failed_file_path (str): The path to the failed file to be removed.
+    file (ImgwCsv): The CSV file.
+    plans (dict[str, ParsePlan]): Parse plans by table type.
 
     Returns:
-        None
-
-    Notes:
-        Logs exceptions if removal of temporary directory or failed file fails.
+    Optional[ParsePlan]: The parse plan, or None if the filename does not match any known table type.
     """
-    try:
-        for file in os.listdir(tmp_dir):
-            os.remove(os.path.join(tmp_dir, file))
-        os.rmdir(tmp_dir)
-    except Exception:
-        logger.exception("Failed to remove temporary directory %s", tmp_dir)
+    table_type = match_table_type(file.filename)
+    if table_type is None:
+        logger.warning("'%s' does not match any table type", file.filename)
+        _save_failed_file(file)
+        return None
 
-    try:
-        os.remove(failed_file_path)
-    except Exception:
-        logger.exception("Failed to remove failed file %s", failed_file_path)
+    plan = plans.get(table_type)
+    if plan is None:
+        logger.warning("Unknown table type: %s", table_type)
+    return plan
 
 
-### 2. parse table
-def parse_table(file: ImgwCsv, schemas: dict = ARROW_COLUMNS_SCHEMA) -> tuple[Optional[pa.Table], str]:
+def parse_table(
+    file: ImgwCsv,
+    schemas: dict = ARROW_COLUMNS_SCHEMA,
+    include_columns: Optional[TIncludeColumns] = None,
+) -> tuple[Optional[pa.Table], str]:
     """
     Reads a CSV file into a PyArrow Table based on the file's table type.
 
     Args:
     file (ImgwCsv): The CSV file to be read.
     schemas (dict, optional): A dictionary mapping table types to their respective column schemas. Defaults to COLUMNS_DICT.
+    include_columns (Optional[TIncludeColumns], optional): Columns to convert per table type; other columns
+        are skipped by the reader. Defaults to None (all columns).
 
     Returns:
     tuple[Optional[pa.Table], str]: A tuple containing the read PyArrow Table and its corresponding table type.
@@ -273,83 +562,81 @@ def parse_table(file: ImgwCsv, schemas: dict = ARROW_COLUMNS_SCHEMA) -> tuple[Op
     Raises:
     Logs exceptions and warnings using the logger.
     """
-    try:
-        table_type_match = re.match(r"^\D+", file.filename)
-        if table_type_match:
-            table_type = table_type_match.group().rstrip("_")
-        else:
-            logger.warning("'%s' does not match any table type", file.filename)
-            _save_failed_file(file)
-            return None, ""
-    except Exception:
-        logger.exception("Failed while matching table type")
-        _save_failed_file(file)
-        return None, ""
-
-    if table_type not in schemas:
-        logger.warning("Unknown table type: %s", table_type)
+    plan = _match_parse_plan(file, get_parse_plans(schemas, include_columns))
+    if plan is None:
         return None, ""
 
     logger.debug("Reading file: %s", file.filename)
 
-    table_columns = list(schemas[table_type].keys())
-    buffer_reader = BytesIO(file.content)
-
-    try:
-        table = csv.read_csv(
-            buffer_reader,
-            csv.ReadOptions(column_names=table_columns, encoding="windows-1250"),
-            csv.ParseOptions(),
-            csv.ConvertOptions(column_types=schemas[table_type]),
-        )
-        logger.debug(table)
-    except Exception:
-        logger.exception("Error while parsing CSV file: %s", file.filename)
-        _save_failed_file(file)
-        return None, ""
-    else:
-        return table, table_type
+    buffer_reader = file.open()
 
-
-### 4. get real time data
+    with get_run_metrics().measure("parse", plan.table_type) as sample:
+        sample.files = 1
+        sample.bytes_in = file.nbytes
+        try:
+            table = plan.derive(csv.read_csv(buffer_reader, *plan.csv_options()))
+            logger.debug("Parsed %s: %d rows, %d columns", file.filename, table.num_rows, table.num_columns)
+        except Exception:
+            logger.exception("Error while parsing CSV file: %s", file.filename)
+            sample.failures += 1
+            file.failed = True
+            _save_failed_file(file)
+            return None, ""
+        sample.rows = table.num_rows
+        sample.bytes_out = table.nbytes
+    return table, plan.table_type
 
 
-def get_json_data(path: str) -> Iterable[TDataItem]:
+def parse_table_batches(
+    file: ImgwCsv,
+    schemas: dict = ARROW_COLUMNS_SCHEMA,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    include_columns: Optional[TIncludeColumns] = None,
+) -> Iterator[tuple[pa.RecordBatch, str]]:
     """
-    Fetches JSON data from the specified IMGW API endpoint.
+    Streams a CSV file as PyArrow RecordBatches based on the file's table type.
+
+    Unlike `parse_table`, the file is never materialized as a whole table: only a few blocks of
+    `block_size` bytes are decoded and converted at a time.
 
     Args:
-        path (str): The API endpoint path.
+    file (ImgwCsv): The CSV file to be read.
+    schemas (dict, optional): A dictionary mapping table types to their respective column schemas. Defaults to COLUMNS_DICT.
+    block_size (int, optional): Number of bytes of CSV converted into a single batch. Defaults to DEFAULT_BLOCK_SIZE.
+    include_columns (Optional[TIncludeColumns], optional): Columns to convert per table type. Defaults to None.
 
     Yields:
-        TDataItem: The JSON data items.
+    tuple[pa.RecordBatch, str]: Record batches and their corresponding table type.
+    If the file does not match any known table type nothing is yielded. If an error occurs during parsing,
+    batches read up to the error are yielded.
 
     Raises:
-        requests.HTTPError: If the HTTP request returns an unsuccessful status code.
+    Logs exceptions and warnings using the logger.
     """
-    url = f"https://danepubliczne.imgw.pl/api/data/{path}"
-    headers = {"Accept": "application/json"}
+    plan = _match_parse_plan(file, get_parse_plans(schemas, include_columns))
+    if plan is None:
+        return
+
+    logger.debug("Streaming file: %s", file.filename)
 
+    # timed between yields only, so the time spent by the consumer is not counted
+    sample = StageMetrics(files=1, bytes_in=file.nbytes, started=time.time())
+    started = time.perf_counter()
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-    except requests.HTTPError as http_err:
-        if http_err.response.status_code == 404:
-            try:
-                error_body = http_err.response.json()
-                if (
-                    isinstance(error_body, dict)
-                    and error_body.get("status") is False
-                    and error_body.get("message") == "No products were found"
-                ):
-                    logger.warning("No data for endpoint %s, skipping", path)
-                    yield {}
-                    return  # return statement to exit function
-            except ValueError:
-                pass
-        raise  # This will be executed if the status code is not 404 or the response body doesn't match
-    except requests.RequestException:
-        raise
-    else:
-        result = response.json()
-        yield result
+        reader = csv.open_csv(file.open(), *plan.csv_options(block_size))
+        for batch in reader:
+            derived = plan.derive(batch)
+            sample.seconds += time.perf_counter() - started
+            sample.rows += derived.num_rows
+            sample.bytes_out += derived.nbytes
+            yield derived, plan.table_type
+            started = time.perf_counter()
+        sample.seconds += time.perf_counter() - started
+    except Exception:
+        logger.exception("Error while parsing CSV file: %s", file.filename)
+        sample.failures += 1
+        file.failed = True
+        _save_failed_file(file)
+    finally:
+        sample.finished = time.time()
+        get_run_metrics().add("parse", sample, plan.table_type)
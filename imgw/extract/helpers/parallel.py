@@ -0,0 +1,166 @@
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import pyarrow as pa
+
+from imgw.common import StageMetrics, get_logger, get_run_metrics
+from imgw.common.metrics import TStageKey
+
+from .config import TIncludeColumns
+from .extract import ImgwZip, parse_table, unzip
+
+logger = get_logger(__name__)
+
+_pools: dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Returns a process pool with the given number of workers, creating it on first use.
+
+    Workers are started with the "spawn" method, so they do not inherit the threads and open connections
+    of the pipeline process. Pools are shut down when the interpreter exits.
+
+    Args:
+        workers (int): Number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The shared process pool.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return pool
+
+
+@atexit.register
+def _shutdown_parse_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def _unzip_and_parse(
+    archive_path: str, filename: str, output_dir: str, include_columns: Optional[TIncludeColumns] = None
+) -> tuple[list[tuple[str, str]], bool, dict[TStageKey, StageMetrics]]:
+    """
+    Worker function: unzips an archive from disk and parses its CSV files into Arrow IPC files.
+
+    Unzip and parse metrics are recorded in the worker and returned to the pipeline process.
+
+    Args:
+        archive_path (str): Path to the zip archive.
+        filename (str): Original filename of the archive.
+        output_dir (str): Directory where the Arrow IPC files are written.
+        include_columns (Optional[TIncludeColumns]): Columns to convert per table type. Defaults to None.
+
+    Returns:
+        tuple[list[tuple[str, str]], bool, dict[TStageKey, StageMetrics]]: Table type and IPC file path of every
+            parsed CSV file, whether unzipping or parsing failed, and the metrics of the task.
+    """
+    # a worker runs one task at a time, so its metrics only hold the current task
+    metrics = get_run_metrics()
+    metrics.reset()
+    results = []
+    failed = False
+    with pa.memory_map(archive_path) as source:
+        zip_file = ImgwZip(filename=filename, content=source.read_buffer())
+        for csv_file in unzip(zip_file):
+            table, table_type = parse_table(csv_file, include_columns=include_columns)
+            failed |= csv_file.failed
+            if table is None:
+                continue
+            # IPC files allow a single dictionary per column, while every parsed block has its own
+            table = table.unify_dictionaries()
+            ipc_path = os.path.join(output_dir, f"{uuid.uuid4().hex}.arrow")
+            with pa.OSFile(ipc_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            results.append((table_type, ipc_path))
+        failed |= zip_file.failed
+    return results, failed, metrics.snapshot()
+
+
+def _read_ipc_table(ipc_path: str) -> pa.Table:
+    """
+    Memory-maps an Arrow IPC file written by a worker and reads it without copying.
+
+    The file is unlinked right away; the mapping keeps its content available until the table is released.
+
+    Args:
+        ipc_path (str): Path to the IPC file.
+
+    Returns:
+        pa.Table: The table backed by the memory-mapped file.
+    """
+    source = pa.memory_map(ipc_path)
+    try:
+        return pa.ipc.open_file(source).read_all()
+    finally:
+        os.remove(ipc_path)
+
+
+def parse_archive_in_pool(
+    zip_file: ImgwZip,
+    workers: int,
+    scratch_dir: Optional[str] = None,
+    include_columns: Optional[TIncludeColumns] = None,
+) -> Iterator[tuple[pa.Table, str]]:
+    """
+    Unzips and parses an archive in a worker process of the parse pool.
+
+    Only the path of the archive is sent to the worker. Archives already on disk (a spool moved to disk or a blob of
+    the download cache) are read in place; archives kept in memory are first written to a scratch directory.
+    The worker returns parsed tables as Arrow IPC files, which are memory-mapped instead of being pickled back.
+    If the worker could not unzip or parse the archive in full, `zip_file.failed` is set.
+
+    Args:
+        zip_file (ImgwZip): The archive to parse.
+        workers (int): Number of worker processes of the pool.
+        scratch_dir (Optional[str]): Directory for in-memory archives and the IPC files. Defaults to the system temp
+            directory.
+        include_columns (Optional[TIncludeColumns]): Columns to convert per table type. Defaults to None.
+
+    Yields:
+        tuple[pa.Table, str]: Parsed tables and their table types.
+    """
+    work_dir = tempfile.mkdtemp(prefix="imgw-parse-", dir=scratch_dir)
+    try:
+        # a spool is closed, and its file removed, only after the worker is done; a cache blob evicted in the
+        # meantime fails the archive, which is fetched again on the next run
+        archive_path = zip_file.disk_path()
+        copied = archive_path is None
+        if archive_path is None:
+            archive_path = os.path.join(work_dir, zip_file.filename)
+            with open(archive_path, "wb") as archive:
+                shutil.copyfileobj(zip_file.open(), archive)
+
+        future = get_parse_pool(workers).submit(
+            _unzip_and_parse, archive_path, zip_file.filename, work_dir, include_columns
+        )
+        results, failed, metrics = future.result()
+        get_run_metrics().merge(metrics)
+        zip_file.failed |= failed
+        zip_file.close()
+        if copied:
+            os.remove(archive_path)
+        for table_type, ipc_path in results:
+            yield _read_ipc_table(ipc_path), table_type
+    except Exception:
+        logger.exception("Failed to parse archive %s in process pool", zip_file.filename)
+        zip_file.failed = True
+    finally:
+        zip_file.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
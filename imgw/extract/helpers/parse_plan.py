@@ -0,0 +1,230 @@
+import re
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Optional, TypeVar, Union
+
+import pyarrow as pa
+from pyarrow import csv
+
+from imgw.common import ARROW_COLUMNS_SCHEMA, ARROW_DERIVED_COLUMNS, PRIMARY_KEYS
+
+from .config import TIncludeColumns
+
+TABLE_TYPE_PATTERN = re.compile(r"^\D+")
+CSV_ENCODING = "windows-1250"
+
+TArrowData = TypeVar("TArrowData", pa.Table, pa.RecordBatch)
+TArrowColumn = Union[pa.Array, pa.ChunkedArray]
+
+SECONDS_PER_DAY = 86400
+SECONDS_PER_HOUR = 3600
+
+
+def _int32(value: int) -> pa.Int32Scalar:
+    return pa.scalar(value, pa.int32())
+
+
+def _days_from_civil(year: TArrowColumn, month: TArrowColumn, day: TArrowColumn) -> TArrowColumn:
+    """
+    Computes days since 1970-01-01 from calendar parts, vectorized over whole columns.
+
+    Uses the proleptic Gregorian algorithm of H. Hinnant with March-based years, which avoids
+    per-row branching. Valid for years >= 0; nulls propagate.
+
+    Args:
+        year (TArrowColumn): Years.
+        month (TArrowColumn): Months (1-12).
+        day (TArrowColumn): Days of the month.
+
+    Returns:
+        TArrowColumn: int32 days since the epoch.
+    """
+    # pyarrow.compute is imported on first use, it is the slowest part of importing the parse helpers
+    import pyarrow.compute as pc
+
+    year, month, day = (pc.cast(part, pa.int32()) for part in (year, month, day))
+    march_year = pc.subtract(year, pc.cast(pc.less_equal(month, _int32(2)), pa.int32()))
+    era = pc.divide(march_year, _int32(400))
+    year_of_era = pc.subtract(march_year, pc.multiply(era, _int32(400)))
+    march_month = pc.if_else(pc.greater(month, _int32(2)), pc.subtract(month, _int32(3)), pc.add(month, _int32(9)))
+    day_of_year = pc.add(
+        pc.divide(pc.add(pc.multiply(march_month, _int32(153)), _int32(2)), _int32(5)),
+        pc.subtract(day, _int32(1)),
+    )
+    day_of_era = pc.add(
+        pc.subtract(
+            pc.add(pc.multiply(year_of_era, _int32(365)), pc.divide(year_of_era, _int32(4))),
+            pc.divide(year_of_era, _int32(100)),
+        ),
+        day_of_year,
+    )
+    days: TArrowColumn = pc.subtract(pc.add(pc.multiply(era, _int32(146097)), day_of_era), _int32(719468))
+    return days
+
+
+def _derived_column(data: TArrowData, data_type: pa.DataType) -> TArrowColumn:
+    """
+    Computes a date or timestamp column from the year, month, day (and hour) columns.
+
+    Args:
+        data (TArrowData): Parsed table or record batch.
+        data_type (pa.DataType): date32 or timestamp type of the derived column.
+
+    Returns:
+        TArrowColumn: The derived column.
+    """
+    import pyarrow.compute as pc
+
+    days = _days_from_civil(data.column("year"), data.column("month"), data.column("day"))
+    if pa.types.is_date32(data_type):
+        return pc.cast(days, data_type)
+    seconds = pc.add(
+        pc.multiply(pc.cast(days, pa.int64()), pa.scalar(SECONDS_PER_DAY, pa.int64())),
+        pc.multiply(pc.cast(data.column("hour"), pa.int64()), pa.scalar(SECONDS_PER_HOUR, pa.int64())),
+    )
+    return pc.cast(seconds, data_type)
+
+
+@dataclass(frozen=True, slots=True)
+class ParsePlan:
+    """
+    Precomputed CSV options of a table type.
+
+    Built once per table type and shared by all files of that type, so parsing a file does not rebuild
+    the column list or the pyarrow option objects.
+    """
+
+    table_type: str
+    column_types: dict
+    include_columns: tuple[str, ...] = ()
+    derived_columns: dict = field(default_factory=dict)
+    read_options: csv.ReadOptions = field(init=False)
+    parse_options: csv.ParseOptions = field(init=False)
+    convert_options: csv.ConvertOptions = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self, "read_options", csv.ReadOptions(column_names=list(self.column_types), encoding=CSV_ENCODING)
+        )
+        object.__setattr__(self, "parse_options", csv.ParseOptions())
+        object.__setattr__(
+            self,
+            "convert_options",
+            csv.ConvertOptions(column_types=self.column_types, include_columns=list(self.include_columns)),
+        )
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        """Names of the columns produced by the plan."""
+        return (*(self.include_columns or self.column_types), *self.derived_columns)
+
+    def derive(self, data: TArrowData) -> TArrowData:
+        """
+        Appends the derived columns of the table type to parsed data.
+
+        Args:
+            data (TArrowData): Parsed table or record batch.
+
+        Returns:
+            TArrowData: The data with derived columns.
+        """
+        for name, data_type in self.derived_columns.items():
+            data = data.append_column(pa.field(name, data_type), _derived_column(data, data_type))
+        return data
+
+    def csv_options(
+        self, block_size: Optional[int] = None
+    ) -> tuple[csv.ReadOptions, csv.ParseOptions, csv.ConvertOptions]:
+        """
+        Returns pyarrow CSV options for `read_csv`/`open_csv`.
+
+        Args:
+            block_size (Optional[int]): Number of bytes processed at a time by the reader. Defaults to pyarrow's default.
+
+        Returns:
+            tuple[csv.ReadOptions, csv.ParseOptions, csv.ConvertOptions]: The options of the plan.
+        """
+        if block_size is None:
+            return self.read_options, self.parse_options, self.convert_options
+        read_options = csv.ReadOptions(
+            column_names=self.read_options.column_names, encoding=CSV_ENCODING, block_size=block_size
+        )
+        return read_options, self.parse_options, self.convert_options
+
+
+def match_table_type(filename: str) -> Optional[str]:
+    """
+    Extracts the table type prefix from the filename of an IMGW CSV file (e.g. "s_t" from "s_t_01_2001.csv").
+
+    Args:
+        filename (str): The filename.
+
+    Returns:
+        Optional[str]: The table type, or None if the filename has no non-digit prefix.
+    """
+    table_type_match = TABLE_TYPE_PATTERN.match(filename)
+    if not table_type_match:
+        return None
+    return table_type_match.group().rstrip("_")
+
+
+def build_parse_plans(
+    schemas: Mapping[str, dict], include_columns: Optional[TIncludeColumns] = None
+) -> dict[str, ParsePlan]:
+    """
+    Builds a parse plan for every table type.
+
+    Args:
+        schemas (Mapping[str, dict]): A mapping of table types to their column schemas.
+        include_columns (Optional[TIncludeColumns]): Columns to convert per table type. Other columns are skipped
+            by the CSV reader. Primary key columns are always included. Table types not listed keep all columns.
+            Defaults to None.
+
+    Returns:
+        dict[str, ParsePlan]: Parse plans by table type.
+
+    Raises:
+        ValueError: If a projection names a column that the table type does not have.
+    """
+    include_columns = include_columns or {}
+    plans = {}
+    for table_type, column_types in schemas.items():
+        projection: tuple[str, ...] = ()
+        if table_type in include_columns:
+            selected = [*PRIMARY_KEYS.get(table_type, []), *include_columns[table_type]]
+            unknown = [column for column in selected if column not in column_types]
+            if unknown:
+                raise ValueError(f"Unknown columns for table type {table_type}: {unknown}")  # noqa: TRY003
+            projection = tuple(dict.fromkeys(selected))
+        plans[table_type] = ParsePlan(table_type, column_types, projection, ARROW_DERIVED_COLUMNS.get(table_type, {}))
+    return plans
+
+
+_plans: dict[tuple[int, tuple], tuple[Mapping, dict[str, ParsePlan]]] = {}
+_plans_lock = threading.Lock()
+
+
+def get_parse_plans(
+    schemas: Mapping[str, dict] = ARROW_COLUMNS_SCHEMA,
+    include_columns: Optional[TIncludeColumns] = None,
+) -> dict[str, ParsePlan]:
+    """
+    Returns the parse plans for a schema mapping and projection, building them on first use.
+
+    Args:
+        schemas (Mapping[str, dict]): A mapping of table types to their column schemas.
+            Defaults to ARROW_COLUMNS_SCHEMA.
+        include_columns (Optional[TIncludeColumns]): Columns to convert per table type. Defaults to None.
+
+    Returns:
+        dict[str, ParsePlan]: Parse plans by table type.
+    """
+    projection = tuple(sorted((table_type, tuple(columns)) for table_type, columns in (include_columns or {}).items()))
+    key = (id(schemas), projection)
+    with _plans_lock:
+        cached = _plans.get(key)
+        if cached is None:
+            # the schemas are kept alongside the plans, so their id cannot be reused while cached
+            cached = _plans[key] = (schemas, build_parse_plans(schemas, include_columns))
+        return cached[1]
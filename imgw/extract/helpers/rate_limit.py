@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the rate of operations.
+
+    Args:
+        rate (float): Number of tokens added per second.
+        capacity (Optional[float]): Maximum number of tokens in the bucket. Defaults to `rate` (one second of burst).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("Rate must be positive")  # noqa: TRY003
+        self.rate = rate
+        self.capacity = max(capacity if capacity is not None else rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the requested number of tokens is available and takes them from the bucket.
+
+        Args:
+            tokens (float): Number of tokens to take. Defaults to 1.
+            timeout (Optional[float]): Longest time to wait in seconds. Defaults to None (wait as long as needed).
+
+        Returns:
+            bool: True if the tokens were taken, False if they would not be available within `timeout`.
+        """
+        give_up = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait_time = (tokens - self._tokens) / self.rate
+            if give_up is not None and time.monotonic() + wait_time > give_up:
+                return False
+            time.sleep(wait_time)
+
+
+class HostRateLimiter:
+    """
+    Keeps a separate token bucket for every host, so that requests to one server are capped independently.
+
+    Args:
+        max_requests_per_second (Optional[float]): Request cap per host. None disables limiting.
+    """
+
+    def __init__(self, max_requests_per_second: Optional[float] = None) -> None:
+        self.max_requests_per_second = max_requests_per_second
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        """
+        Blocks until a request to the host of the given URL is allowed.
+
+        Args:
+            url (str): The URL that is about to be requested.
+        """
+        if not self.max_requests_per_second:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.max_requests_per_second)
+        bucket.acquire()
@@ -0,0 +1,479 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import cache
+from typing import Any, Optional
+
+import pyarrow as pa
+from dlt.sources import TDataItem
+from dlt.sources.helpers import requests
+
+from imgw.common import REAL_TIME_ARROW_SCHEMA, REAL_TIME_PRIMARY_KEYS, get_logger, get_run_metrics
+
+from .config import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_MAX_REQUESTS_PER_SECOND,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_STATION_BATCH_SIZE,
+    DEFAULT_STATION_WORKERS,
+)
+from .rate_limit import TokenBucket
+
+logger = get_logger(__name__)
+
+API_URL = "https://danepubliczne.imgw.pl/api/data"
+
+# responses worth another attempt; anything else is final
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_BACKOFF_SECONDS = 0.5
+
+# meteo reports the time of every measurement in a field with this suffix
+MEASUREMENT_TIME_SUFFIX = "_data"
+
+
+class SlaExceededError(TimeoutError):
+    """Raised when an endpoint cannot be fetched before the deadline of the poll."""
+
+    def __init__(self, url: str) -> None:
+        super().__init__(f"Deadline passed before {url} was fetched")
+        self.url = url
+
+
+@cache
+def get_api_session() -> requests.Session:
+    """
+    Returns the keep-alive session shared by all real-time requests of the process.
+
+    The session keeps a pool of connections to the API host, so concurrent and repeated polls reuse open
+    TLS connections instead of opening one per request. Only GET requests are sent, which are safe to share
+    across threads.
+
+    Returns:
+        requests.Session: The session.
+    """
+    session = requests.Session(timeout=DEFAULT_REQUEST_TIMEOUT, raise_for_status=False)
+    session.headers["Accept"] = "application/json"
+    return session
+
+
+def _is_no_products(response: requests.Response) -> bool:
+    """Checks if a 404 response is the API's answer for an endpoint without current data."""
+    try:
+        error_body = response.json()
+    except ValueError:
+        return False
+    return (
+        isinstance(error_body, dict)
+        and error_body.get("status") is False
+        and error_body.get("message") == "No products were found"
+    )
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _get_with_retries(
+    session: requests.Session,
+    url: str,
+    request_timeout: float,
+    max_attempts: int,
+    deadline: Optional[float],
+) -> requests.Response:
+    """
+    Sends a GET request, retrying connection errors, timeouts and retryable statuses with jittered exponential
+    backoff. A `Retry-After` header in seconds is honoured.
+
+    No attempt is started, and no backoff is slept, past the deadline; the timeout of every attempt is cut to
+    the time left.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        response = None
+        remaining = _remaining(deadline)
+        if remaining is not None and remaining <= 0:
+            raise SlaExceededError(url)
+        timeout = request_timeout if remaining is None else min(request_timeout, remaining)
+        try:
+            response = session.get(url, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            remaining = _remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                raise SlaExceededError(url) from exc
+            if attempt >= max_attempts:
+                raise
+            logger.debug("Attempt %d of %s failed", attempt, url, exc_info=True)
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= max_attempts:
+                return response
+            logger.debug("Attempt %d of %s returned %d", attempt, url, response.status_code)
+        # jitter spreads the retries of concurrent requests that failed together
+        delay = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.0)  # noqa: S311
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            delay = max(delay, float(response.headers["Retry-After"]))
+        remaining = _remaining(deadline)
+        if remaining is not None and remaining <= delay:
+            raise SlaExceededError(url)
+        time.sleep(delay)
+
+
+def fetch_endpoint(
+    path: str,
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    deadline: Optional[float] = None,
+    session: Optional[requests.Session] = None,
+) -> TDataItem:
+    """
+    Fetches the JSON document of an IMGW API endpoint. Requests are recorded in the "download" stage of the
+    run metrics, under the first segment of the endpoint path.
+
+    Args:
+        path (str): The API endpoint path, e.g. "synop" or "synop/id/12295".
+        request_timeout (float): Timeout of a single attempt in seconds. Defaults to DEFAULT_REQUEST_TIMEOUT.
+        max_attempts (int): Attempts per request, including the first one. Defaults to DEFAULT_MAX_ATTEMPTS.
+        deadline (Optional[float]): `time.monotonic()` value by which the request must finish, retries included.
+            Defaults to None (no deadline).
+        session (Optional[requests.Session]): Session to send the request with. Defaults to the shared
+            session returned by `get_api_session`.
+
+    Returns:
+        TDataItem: The JSON document, or {} if the endpoint has no current data.
+
+    Raises:
+        requests.HTTPError: If the final response has an unsuccessful status code.
+        requests.RequestException: If the request still fails after `max_attempts` attempts.
+        SlaExceededError: If the deadline passes before the request succeeds.
+    """
+    url = f"{API_URL}/{path}"
+    with get_run_metrics().measure("download", path.split("/", 1)[0]) as sample:
+        response = _get_with_retries(session or get_api_session(), url, request_timeout, max_attempts, deadline)
+        if response.status_code == 404 and _is_no_products(response):
+            logger.warning("No data for endpoint %s, skipping", path)
+            return {}
+        response.raise_for_status()
+        result = response.json()
+        sample.bytes_in = len(response.content)
+        sample.rows = len(result) if isinstance(result, list) else 1
+        sample.files = 1
+    return result
+
+
+def _records(document: TDataItem) -> list[TDataItem]:
+    """Returns the records of a document: a list of records, a single record, or {} for no data."""
+    if isinstance(document, list):
+        return document
+    return [document] if document else []
+
+
+@cache
+def get_api_rate_limiter(max_requests_per_second: float) -> TokenBucket:
+    """
+    Returns the token bucket shared by all per-station requests of the process with the given rate.
+
+    Args:
+        max_requests_per_second (float): The request cap.
+
+    Returns:
+        TokenBucket: The token bucket.
+    """
+    return TokenBucket(max_requests_per_second)
+
+
+_in_flight: dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+def fetch_coalesced(
+    path: str,
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    deadline: Optional[float] = None,
+) -> TDataItem:
+    """
+    Fetches an endpoint like `fetch_endpoint`, sharing the request with concurrent callers of the same path.
+
+    Only the first caller sends the request; callers arriving while it is in flight wait for its result or
+    exception instead of sending their own.
+
+    Args:
+        path (str): The API endpoint path.
+        request_timeout (float): Timeout of a single attempt in seconds. Defaults to DEFAULT_REQUEST_TIMEOUT.
+        max_attempts (int): Attempts per request, including the first one. Defaults to DEFAULT_MAX_ATTEMPTS.
+        deadline (Optional[float]): `time.monotonic()` value by which the request must finish. Defaults to None.
+
+    Returns:
+        TDataItem: The JSON document, or {} if the endpoint has no current data.
+    """
+    with _in_flight_lock:
+        future = _in_flight.get(path)
+        owner = future is None
+        if future is None:
+            future = _in_flight[path] = Future()
+    if not owner:
+        logger.debug("Coalesced request of %s", path)
+        try:
+            return future.result(timeout=_remaining(deadline))
+        except SlaExceededError:
+            raise
+        # Future.result raises concurrent.futures.TimeoutError, an alias of TimeoutError only from Python 3.11
+        except (TimeoutError, FutureTimeoutError) as exc:
+            raise SlaExceededError(path) from exc
+    try:
+        result = fetch_endpoint(path, request_timeout, max_attempts, deadline)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            del _in_flight[path]
+
+
+def _warn_if_sweep_exceeds_sla(path: str, stations: int, rate: float, sla_seconds: float) -> None:
+    if stations / rate > sla_seconds:
+        logger.warning(
+            "Sweep of %d %s stations at %.1f requests/s cannot finish within the %.1fs SLA",
+            stations,
+            path,
+            rate,
+            sla_seconds,
+        )
+
+
+def _fetch_station(
+    path: str,
+    station: str,
+    rate_limiter: Optional[TokenBucket],
+    request_timeout: float,
+    max_attempts: int,
+    deadline: Optional[float],
+) -> tuple[str, list[TDataItem]]:
+    """Fetches the records of a station, returning the outcome of the request with them."""
+    remaining = _remaining(deadline)
+    if rate_limiter is not None and not rate_limiter.acquire(timeout=None if remaining is None else max(remaining, 0)):
+        return "missed the SLA", []
+    try:
+        return "fetched", _records(fetch_coalesced(f"{path}/id/{station}", request_timeout, max_attempts, deadline))
+    except SlaExceededError:
+        return "missed the SLA", []
+    except requests.RequestException:
+        logger.debug("Fetching station %s of %s failed", station, path, exc_info=True)
+        return "failed", []
+
+
+def fetch_stations(
+    path: str,
+    stations: Sequence[str],
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    sla_seconds: Optional[float] = None,
+    max_requests_per_second: Optional[float] = DEFAULT_MAX_REQUESTS_PER_SECOND,
+    max_workers: int = DEFAULT_STATION_WORKERS,
+    batch_size: int = DEFAULT_STATION_BATCH_SIZE,
+) -> Iterator[list[TDataItem]]:
+    """
+    Fetches the per-station variant of an endpoint (`<path>/id/<station>`) for a list of stations.
+
+    Stations are fetched concurrently by a pool of worker threads. All requests of the process wait on one
+    token bucket per rate, so several endpoints swept at the same time share the cap. Duplicate stations are
+    requested once, and requests already in flight are shared (see `fetch_coalesced`). Records are yielded in
+    batches as the responses arrive. Stations that fail or miss the SLA are logged and skipped, so a sweep
+    always finishes within `sla_seconds`.
+
+    Args:
+        path (str): The API endpoint path, e.g. "synop".
+        stations (Sequence[str]): Station ids.
+        request_timeout (float): Timeout of a single attempt in seconds. Defaults to DEFAULT_REQUEST_TIMEOUT.
+        max_attempts (int): Attempts per station, including the first one. Defaults to DEFAULT_MAX_ATTEMPTS.
+        sla_seconds (Optional[float]): Time allowed for the whole sweep. Defaults to None (no limit).
+        max_requests_per_second (Optional[float]): Request cap of the process. Defaults to
+            DEFAULT_MAX_REQUESTS_PER_SECOND; None disables the cap.
+        max_workers (int): Number of stations fetched at the same time. Defaults to DEFAULT_STATION_WORKERS.
+        batch_size (int): Number of records per yielded batch. Defaults to DEFAULT_STATION_BATCH_SIZE.
+
+    Yields:
+        list[TDataItem]: Batches of station records.
+    """
+    unique_stations = list(dict.fromkeys(stations))
+    if not unique_stations:
+        return
+    deadline = None if sla_seconds is None else time.monotonic() + sla_seconds
+    rate_limiter = get_api_rate_limiter(max_requests_per_second) if max_requests_per_second else None
+    if rate_limiter is not None and sla_seconds is not None:
+        _warn_if_sweep_exceeds_sla(path, len(unique_stations), rate_limiter.rate, sla_seconds)
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(unique_stations)), thread_name_prefix="imgw-stations"
+    )
+    futures = [
+        executor.submit(_fetch_station, path, station, rate_limiter, request_timeout, max_attempts, deadline)
+        for station in unique_stations
+    ]
+    outcomes: Counter[str] = Counter()
+    batch: list[TDataItem] = []
+    try:
+        for future in as_completed(futures):
+            outcome, records = future.result()
+            outcomes[outcome] += 1
+            batch.extend(records)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    if outcomes["fetched"] < len(unique_stations):
+        logger.warning("Fetched %s stations: %s", path, dict(outcomes))
+
+
+def get_json_data(
+    path: str,
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    sla_seconds: Optional[float] = None,
+) -> Iterator[TDataItem]:
+    """
+    Fetches JSON data from the specified IMGW API endpoint over the shared session.
+
+    Args:
+        path (str): The API endpoint path.
+        request_timeout (float): Timeout of a single attempt in seconds. Defaults to DEFAULT_REQUEST_TIMEOUT.
+        max_attempts (int): Attempts per request, including the first one. Defaults to DEFAULT_MAX_ATTEMPTS.
+        sla_seconds (Optional[float]): Time allowed for the endpoint, retries included, counted from the first
+            request. An endpoint that misses it is skipped with a warning. Defaults to None (no limit).
+
+    Yields:
+        TDataItem: The JSON data items.
+
+    Raises:
+        requests.HTTPError: If the HTTP request returns an unsuccessful status code.
+    """
+    deadline = None if sla_seconds is None else time.monotonic() + sla_seconds
+    try:
+        result = fetch_endpoint(path, request_timeout, max_attempts, deadline)
+    except SlaExceededError:
+        logger.warning("Endpoint %s missed the %.1fs SLA, skipping", path, sla_seconds)
+        return
+    yield result
+
+
+def _add_measurement_time(record: dict, key: str) -> None:
+    """Sets `key` of a meteo record to the time of its latest measurement (timestamps compare as strings)."""
+    times = [value for field, value in record.items() if field.endswith(MEASUREMENT_TIME_SUFFIX) and value is not None]
+    record[key] = max(times, default=None)
+
+
+def json_digest(document: TDataItem) -> str:
+    """Returns a digest of a JSON document that does not depend on the order of its keys."""
+    return hashlib.blake2b(
+        json.dumps(document, sort_keys=True, ensure_ascii=False).encode(), digest_size=16
+    ).hexdigest()
+
+
+def filter_unchanged(path: str, records: Iterable[dict], digests: dict[str, str]) -> Iterator[dict]:
+    """
+    Drops the records of a measurement endpoint that did not change since the last poll.
+
+    The API returns the latest measurement of every station until the station reports again, so most records
+    of a frequent poll repeat the previous one. A digest of the last record of every station is kept in
+    `digests`; records matching it are dropped before they reach normalize. Records missing a field of the
+    natural key cannot be merged and are dropped as well.
+
+    Args:
+        path (str): The API endpoint path, a key of REAL_TIME_PRIMARY_KEYS.
+        records (Iterable[dict]): Records of the endpoint.
+        digests (dict[str, str]): Digest of the last record by station id, updated in place. Keep it in the
+            resource state to filter across runs.
+
+    Yields:
+        dict: The new or changed records.
+    """
+    primary_key = REAL_TIME_PRIMARY_KEYS[path]
+    station_key = primary_key[0]
+    unchanged = incomplete = 0
+    for record in records:
+        if path == "meteo":
+            _add_measurement_time(record, primary_key[-1])
+        if any(record.get(key) is None for key in primary_key):
+            incomplete += 1
+            continue
+        digest = json_digest(record)
+        station = str(record[station_key])
+        if digests.get(station) == digest:
+            unchanged += 1
+            continue
+        digests[station] = digest
+        yield record
+    if incomplete:
+        logger.warning("Dropped %d records of %s without %s", incomplete, path, ", ".join(primary_key))
+    logger.debug("Dropped %d unchanged records of %s", unchanged, path)
+
+
+def _string_array(records: Sequence[dict], name: str) -> pa.Array:
+    """Gathers a field of the records as strings; empty strings are missing values."""
+    return pa.array(
+        [None if (value := record.get(name)) is None or value == "" else str(value) for record in records],
+        pa.string(),
+    )
+
+
+def _cast(strings: pa.Array, data_type: pa.DataType, name: str) -> pa.Array:
+    """Casts strings to a column type, setting values that do not parse to null if the vectorized cast fails."""
+    if pa.types.is_dictionary(data_type):
+        return strings.dictionary_encode()
+    if pa.types.is_string(data_type):
+        return strings
+    # integers are cast through doubles, so that "12.0" parses as well
+    via = pa.float64() if pa.types.is_integer(data_type) else data_type
+    try:
+        return strings.cast(via).cast(data_type)
+    except pa.ArrowInvalid:
+        logger.warning("Column %s has values that are not %s, setting them to null", name, data_type)
+    values: list[Any] = []
+    for value in strings.to_pylist():
+        if value is None:
+            values.append(None)
+            continue
+        try:
+            values.append(pa.scalar(value).cast(via).cast(data_type).as_py())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            values.append(None)
+    return pa.array(values, data_type)
+
+
+def records_to_table(path: str, records: Sequence[dict]) -> pa.Table:
+    """
+    Decodes records of a measurement endpoint into an Arrow table typed by REAL_TIME_ARROW_SCHEMA.
+
+    The API quotes numbers and times, so every column is gathered as strings and converted with one vectorized
+    cast, instead of dlt inferring the type of every value. Columns of the schema missing from the records are
+    null, and fields the schema does not know are kept as strings. Key columns are not nullable.
+
+    Args:
+        path (str): The API endpoint path, a key of REAL_TIME_ARROW_SCHEMA.
+        records (Sequence[dict]): Records of the endpoint.
+
+    Returns:
+        pa.Table: The typed table.
+    """
+    columns = REAL_TIME_ARROW_SCHEMA[path]
+    primary_key = REAL_TIME_PRIMARY_KEYS[path]
+    extra_fields = {name for record in records for name in record}.difference(columns)
+    names = [*columns, *sorted(extra_fields)]
+    arrays = [_cast(_string_array(records, name), columns.get(name, pa.string()), name) for name in names]
+    # filter_unchanged drops records without a key, so key columns match the non-nullable dlt hints
+    schema = pa.schema(
+        pa.field(name, array.type, nullable=name not in primary_key) for name, array in zip(names, arrays)
+    )
+    return pa.Table.from_arrays(arrays, schema=schema)
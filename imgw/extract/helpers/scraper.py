@@ -1,12 +1,16 @@
-from collections.abc import Iterable
-from typing import Union
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import NamedTuple, Optional
 from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup
 from bs4.element import AttributeValueList, Tag
 from dlt.sources.helpers import requests
 
-from imgw.common import get_logger
+from imgw.common import get_logger, get_run_metrics
+
+from .crawl_index import CrawlIndex, conditional_headers
+from .rate_limit import HostRateLimiter
 
 logger = get_logger(__name__)
 
@@ -32,26 +36,32 @@ def _is_visited(current_url: str, visited_dirs: set) -> bool:
     return False
 
 
-def _fetch_and_parse(current_url: str) -> Union[BeautifulSoup, None]:
+def _fetch_listing(
+    current_url: str,
+    rate_limiter: Optional[HostRateLimiter] = None,
+    headers: Optional[dict[str, str]] = None,
+) -> Optional[requests.Response]:
     """
-    Fetches the content of a given URL and parses it using BeautifulSoup.
+    Sends a GET request for a directory listing.
 
     Args:
-        current_url (str): The URL to fetch and parse.
+        current_url (str): The URL to fetch.
+        rate_limiter (Optional[HostRateLimiter]): Limiter to wait on before sending the request. Defaults to None.
+        headers (Optional[dict[str, str]]): Extra request headers, e.g. conditional request validators. Defaults to None.
 
     Returns:
-        Union[BeautifulSoup, None]: A BeautifulSoup object containing the parsed HTML, or None if the request fails.
-
-    Raises:
-        requests.RequestException: Logs the exception if the request fails.
+        Optional[requests.Response]: The response (including 304 Not Modified), or None if the request fails.
     """
     try:
-        response = requests.get(current_url)
+        if rate_limiter is not None:
+            rate_limiter.wait(current_url)
+        response = requests.get(current_url, headers=headers)
         response.raise_for_status()
-        return BeautifulSoup(response.content, "html.parser")
     except requests.RequestException:
         logger.exception("Error fetching %s", current_url)
         return None
+    else:
+        return response
 
 
 def _extract_links(soup: BeautifulSoup) -> list:
@@ -74,95 +84,174 @@ def _extract_links(soup: BeautifulSoup) -> list:
         return []
 
 
-def _process_link(
-    link: Tag,
-    current_url: str,
-    found_zip_links: set,
-    visited_dirs: set,
-) -> None:
+def _resolve_link(link: Tag, current_url: str) -> Optional[str]:
     """
-    Process a link found on a webpage, extracting zip links and recursively scraping directories.
+    Resolves a link found on a directory listing into an absolute URL.
 
     Args:
-        link (Tag): The HTML link element to process.
+        link (Tag): The HTML link element to resolve.
         current_url (str): The URL of the current webpage.
-        found_zip_links (set): A set of zip links found so far.
-        visited_dirs (set): A set of directories that have been visited.
 
     Returns:
-        None
+        Optional[str]: The absolute URL of the link, or None if the link should not be followed
+        (sorting links, anchors, parent directory).
     """
-    try:
-        href = link.get("href")
-        link_text = link.text.strip()
-        if (
-            not href
-            or isinstance(href, AttributeValueList)
-            or href.startswith("?")
-            or href.startswith("#")
-            or link_text == "Parent Directory"
-        ):
-            return
-        absolute_link = urljoin(current_url, href)
-        if href.lower().endswith(".zip"):
-            if absolute_link not in found_zip_links:
-                logger.debug("Found zip: %s", absolute_link)
-                found_zip_links.add(absolute_link)
-        elif href.endswith("/") and absolute_link != current_url:
-            logger.debug("Going into directory: %s", href)
-            scrape_directory_recursive(absolute_link, visited_dirs, found_zip_links)
-        else:
-            logger.debug("Ignoring link: %s (absolute: %s)", href, absolute_link)
-    except Exception:
-        logger.exception("Encountered an error while processing link")
+    href = link.get("href")
+    link_text = link.text.strip()
+    if (
+        not href
+        or isinstance(href, AttributeValueList)
+        or href.startswith("?")
+        or href.startswith("#")
+        or link_text == "Parent Directory"
+    ):
+        return None
+    return urljoin(current_url, href)
+
 
+class DirectoryListing(NamedTuple):
+    """Links found on a single directory listing."""
 
-def scrape_directory_recursive(
+    zip_links: list[str]
+    subdirs: list[str]
+    unchanged: bool = False
+
+
+def _parse_listing(soup: BeautifulSoup, current_url: str) -> tuple[list[str], list[str]]:
+    """
+    Splits the links of a parsed directory listing into zip links and subdirectories.
+
+    Args:
+        soup (BeautifulSoup): The parsed listing.
+        current_url (str): The URL of the listing.
+
+    Returns:
+        tuple[list[str], list[str]]: Absolute zip links and absolute subdirectory links.
+    """
+    zip_links: list[str] = []
+    subdirs: list[str] = []
+    for link in _extract_links(soup):
+        try:
+            absolute_link = _resolve_link(link, current_url)
+        except Exception:
+            logger.exception("Encountered an error while processing link")
+            continue
+        if absolute_link is None:
+            continue
+        if absolute_link.lower().endswith(".zip"):
+            zip_links.append(absolute_link)
+        elif absolute_link.endswith("/") and absolute_link != current_url:
+            subdirs.append(absolute_link)
+    return zip_links, subdirs
+
+
+def _scrape_directory(
     current_url: str,
-    visited_dirs: set[str],
-    found_zip_links: set[str],
-) -> None:
+    rate_limiter: Optional[HostRateLimiter] = None,
+    crawl_index: Optional[CrawlIndex] = None,
+) -> DirectoryListing:
     """
-    Recursively scrapes a directory and its subdirectories for zip links.
+    Scrapes a single directory listing without descending into subdirectories.
+
+    If a crawl index is given, the request is sent with the validators stored for the directory. When the
+    server answers 304 Not Modified, the links stored in the index are returned and the listing is marked as unchanged.
 
     Args:
         current_url (str): The URL of the directory to scrape.
-        visited_dirs (set[str]): A set of URLs that have already been visited.
-        found_zip_links (set[str]): A set of zip links found during the scraping process.
+        rate_limiter (Optional[HostRateLimiter]): Limiter to wait on before sending the request. Defaults to None.
+        crawl_index (Optional[CrawlIndex]): Persistent index of previously crawled listings. Defaults to None.
 
     Returns:
-        None
+        DirectoryListing: Absolute zip links and absolute subdirectory links found in the listing.
     """
-    if _is_visited(current_url, visited_dirs):
-        return
     logger.debug("Scraping: %s", current_url)
-    soup = _fetch_and_parse(current_url)
-    if soup is None:
-        return
-    links = _extract_links(soup)
-    for link in links:
-        _process_link(link, current_url, found_zip_links, visited_dirs)
-
-
-def find_zip_links(start_url: str) -> Iterable[str]:
+    entry = crawl_index.get(current_url) if crawl_index is not None else None
+    with get_run_metrics().measure("crawl") as sample:
+        response = _fetch_listing(current_url, rate_limiter, conditional_headers(entry))
+        if response is None:
+            sample.failures += 1
+            return DirectoryListing([], [])
+        sample.files = 1
+        if entry is not None and response.status_code == 304:
+            logger.debug("Listing not modified: %s", current_url)
+            return DirectoryListing(entry.zip_links, entry.subdirs, unchanged=True)
+
+        sample.bytes_in = len(response.content)
+        zip_links, subdirs = _parse_listing(BeautifulSoup(response.content, "html.parser"), current_url)
+        sample.rows = len(zip_links)
+    if crawl_index is not None:
+        crawl_index.put(
+            current_url,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            zip_links,
+            subdirs,
+        )
+    return DirectoryListing(zip_links, subdirs)
+
+
+def find_zip_links(
+    start_url: str,
+    max_workers: int = 8,
+    max_requests_per_second: Optional[float] = None,
+    crawl_index: Optional[CrawlIndex] = None,
+    skip_unchanged_subtrees: bool = False,
+) -> Iterator[str]:
     """
-    Recursively scrapes the given directory URL to find all ZIP links.
+    Crawls the given directory URL breadth-first to find all ZIP links.
+
+    Directory listings are fetched concurrently by a pool of worker threads. ZIP links are yielded as soon as
+    the listing containing them is parsed, while the rest of the tree is still being crawled.
 
     Args:
         start_url (str): The URL of the directory to start the search from.
+        max_workers (int): Maximum number of directory listings fetched at the same time. Defaults to 8.
+        max_requests_per_second (Optional[float]): Request cap per host. Defaults to None (no cap).
+        crawl_index (Optional[CrawlIndex]): Persistent index used for conditional requests. Defaults to None.
+        skip_unchanged_subtrees (bool): If True, a listing answered with 304 Not Modified is not descended into;
+            the zip links of its whole subtree are replayed from the crawl index instead. Defaults to False: every
+            listing is revalidated with a conditional request, and only the bodies of unchanged listings are skipped.
 
     Yields:
         str: The URLs of the ZIP files found.
 
     Notes:
         The function modifies the URL to end with a '/' if it doesn't already.
+        Apache only updates a directory's validators when its direct children change, so skipping unchanged
+        subtrees misses archives added deeper in the tree. Only enable it when the tree is known not to change below
+        unchanged directories.
     """
     if not start_url.endswith("/"):
         start_url += "/"
 
     local_found_zip_links: set[str] = set()
     local_visited_dirs: set[str] = set()
+    rate_limiter = HostRateLimiter(max_requests_per_second)
 
-    scrape_directory_recursive(start_url, local_visited_dirs, local_found_zip_links)
-
-    yield from list(local_found_zip_links)
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="imgw-crawler")
+    pending: set[Future] = set()
+    try:
+        _is_visited(start_url, local_visited_dirs)
+        pending.add(executor.submit(_scrape_directory, start_url, rate_limiter, crawl_index))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                listing = future.result()
+                zip_links = listing.zip_links
+                subdirs = [subdir for subdir in listing.subdirs if not _is_visited(subdir, local_visited_dirs)]
+                if listing.unchanged and skip_unchanged_subtrees and crawl_index is not None:
+                    zip_links = [*zip_links]
+                    missing: list[str] = []
+                    for subdir in subdirs:
+                        zip_links.extend(crawl_index.walk(subdir, local_visited_dirs, missing))
+                    subdirs = missing
+                for subdir in subdirs:
+                    logger.debug("Going into directory: %s", subdir)
+                    pending.add(executor.submit(_scrape_directory, subdir, rate_limiter, crawl_index))
+                for zip_link in zip_links:
+                    if zip_link not in local_found_zip_links:
+                        logger.debug("Found zip: %s", zip_link)
+                        local_found_zip_links.add(zip_link)
+                        yield zip_link
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
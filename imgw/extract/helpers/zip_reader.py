@@ -0,0 +1,200 @@
+import struct
+import zlib
+from collections.abc import Iterator
+from typing import BinaryIO, NamedTuple, Optional
+
+from imgw.common import get_logger
+
+logger = get_logger(__name__)
+
+LOCAL_FILE_HEADER_SIGNATURE = b"PK\x03\x04"
+CENTRAL_DIRECTORY_SIGNATURE = b"PK\x01\x02"
+END_OF_CENTRAL_DIRECTORY_SIGNATURE = b"PK\x05\x06"
+DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+
+LOCAL_FILE_HEADER = struct.Struct("<4sHHHHHIIIHH")
+ZIP64_EXTRA_ID = 0x0001
+
+FLAG_ENCRYPTED = 0x01
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class LocalMember(NamedTuple):
+    """A member recovered from the local file headers of a zip archive."""
+
+    filename: str
+    content: bytes
+
+
+def _find_signature(stream: BinaryIO, signatures: tuple[bytes, ...]) -> tuple[bytes, Optional[bytes]]:
+    """
+    Reads the stream until one of the given 4-byte signatures, leaving the stream positioned at the signature.
+
+    Args:
+        stream (BinaryIO): Seekable stream to scan.
+        signatures (tuple[bytes, ...]): Signatures to look for.
+
+    Returns:
+        tuple[bytes, Optional[bytes]]: The bytes read before the signature and the signature found,
+        or all remaining bytes and None if the end of the stream was reached.
+    """
+    skipped = bytearray()
+    start = stream.tell()
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        search_from = max(len(skipped) - 3, 0)
+        skipped += chunk
+        positions = [(skipped.find(signature, search_from), signature) for signature in signatures]
+        found = [(position, signature) for position, signature in positions if position >= 0]
+        if found:
+            position, signature = min(found)
+            stream.seek(start + position)
+            return bytes(skipped[:position]), signature
+        if not chunk:
+            return bytes(skipped), None
+
+
+def _zip64_sizes(extra: bytes, compressed_size: int, uncompressed_size: int) -> tuple[int, int]:
+    """
+    Reads 64-bit sizes from the zip64 extended information extra field, if present.
+
+    Args:
+        extra (bytes): The extra field of the local file header.
+        compressed_size (int): Compressed size from the header.
+        uncompressed_size (int): Uncompressed size from the header.
+
+    Returns:
+        tuple[int, int]: Compressed and uncompressed size.
+    """
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<HH", extra, offset)
+        if header_id == ZIP64_EXTRA_ID:
+            values = extra[offset + 4 : offset + 4 + size]
+            # the zip64 field only holds the sizes that overflowed in the header, uncompressed first
+            if uncompressed_size == 0xFFFFFFFF and len(values) >= 8:
+                uncompressed_size = struct.unpack_from("<Q", values)[0]
+                values = values[8:]
+            if compressed_size == 0xFFFFFFFF and len(values) >= 8:
+                compressed_size = struct.unpack_from("<Q", values)[0]
+            break
+        offset += 4 + size
+    return compressed_size, uncompressed_size
+
+
+def _inflate_until_end(stream: BinaryIO) -> bytes:
+    """
+    Decompresses a raw deflate stream of unknown length, leaving the stream positioned right after it.
+
+    Args:
+        stream (BinaryIO): Seekable stream positioned at the start of the compressed data.
+
+    Returns:
+        bytes: The decompressed data.
+
+    Raises:
+        zlib.error: If the deflate stream is corrupt or truncated.
+    """
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    parts = []
+    while not decompressor.eof:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            raise zlib.error("Truncated deflate stream")  # noqa: TRY003
+        parts.append(decompressor.decompress(chunk))
+    if decompressor.unused_data:
+        stream.seek(-len(decompressor.unused_data), 1)
+    return b"".join(parts)
+
+
+def _read_member(stream: BinaryIO) -> Optional[LocalMember]:
+    """
+    Reads a single member from a stream positioned at a local file header.
+
+    Args:
+        stream (BinaryIO): Seekable stream positioned at a local file header signature.
+
+    Returns:
+        Optional[LocalMember]: The recovered member, or None if it cannot be recovered
+        (encrypted, unsupported compression method).
+
+    Raises:
+        zlib.error: If the compressed data is corrupt or its CRC does not match.
+        struct.error: If the header is truncated.
+    """
+    (
+        _,
+        _,
+        flags,
+        method,
+        _,
+        _,
+        crc,
+        compressed_size,
+        uncompressed_size,
+        filename_length,
+        extra_length,
+    ) = LOCAL_FILE_HEADER.unpack(stream.read(LOCAL_FILE_HEADER.size))
+    raw_filename = stream.read(filename_length)
+    extra = stream.read(extra_length)
+    filename = raw_filename.decode("utf-8" if flags & FLAG_UTF8 else "cp437")
+    compressed_size, uncompressed_size = _zip64_sizes(extra, compressed_size, uncompressed_size)
+    sizes_known = not flags & FLAG_DATA_DESCRIPTOR and compressed_size != 0xFFFFFFFF
+
+    if flags & FLAG_ENCRYPTED or method not in (METHOD_STORED, METHOD_DEFLATED):
+        logger.warning("Skipping member %s: unsupported flags %#x or compression method %d", filename, flags, method)
+        if sizes_known:
+            stream.seek(compressed_size, 1)
+        return None
+
+    if sizes_known:
+        data = stream.read(compressed_size)
+        content = zlib.decompress(data, -zlib.MAX_WBITS) if method == METHOD_DEFLATED else data
+        if zlib.crc32(content) != crc:
+            raise zlib.error(f"CRC mismatch of member {filename}")  # noqa: TRY003
+    elif method == METHOD_DEFLATED:
+        content = _inflate_until_end(stream)
+    else:
+        content, _ = _find_signature(
+            stream, (DATA_DESCRIPTOR_SIGNATURE, LOCAL_FILE_HEADER_SIGNATURE, CENTRAL_DIRECTORY_SIGNATURE)
+        )
+    return LocalMember(filename, content)
+
+
+def iter_local_members(stream: BinaryIO, damaged: Optional[list[int]] = None) -> Iterator[LocalMember]:
+    """
+    Recovers the members of a zip archive by scanning its local file headers, ignoring the central directory.
+
+    Used as a fallback for archives whose central directory is missing or damaged. Members are read
+    sequentially from the stream, so only one decompressed member is held in memory at a time.
+    Garbage between members (e.g. data descriptors) is skipped by searching for the next header.
+
+    Args:
+        stream (BinaryIO): Seekable stream with the archive, positioned at its start.
+        damaged (Optional[list[int]]): If given, the offsets of damaged members that were skipped are appended to it.
+            Defaults to None.
+
+    Yields:
+        LocalMember: Filenames and decompressed contents of the recovered members (directories excluded).
+    """
+    while True:
+        _, signature = _find_signature(stream, (LOCAL_FILE_HEADER_SIGNATURE, CENTRAL_DIRECTORY_SIGNATURE))
+        if signature != LOCAL_FILE_HEADER_SIGNATURE:
+            return
+        header_position = stream.tell()
+        try:
+            member = _read_member(stream)
+        except (zlib.error, struct.error, UnicodeDecodeError):
+            logger.warning("Skipping damaged member at offset %d", header_position, exc_info=True)
+            if damaged is not None:
+                damaged.append(header_position)
+            stream.seek(header_position + len(LOCAL_FILE_HEADER_SIGNATURE))
+            continue
+        if member is not None and not member.filename.endswith("/"):
+            yield member
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Optional
+
+import dlt
+
+from imgw.common import get_logger, get_run_metrics
+
+from . import DEFAULT_ENDPOINTS, imgw_real_time
+
+logger = get_logger(__name__)
+
+DEFAULT_MIN_INTERVAL = 10.0
+DEFAULT_MAX_INTERVAL = 900.0
+DEFAULT_INITIAL_INTERVAL = 60.0
+# polls per observed update period; more polls pick up a new observation sooner after it is published
+DEFAULT_POLLS_PER_UPDATE = 4.0
+# endpoints due within this many seconds of each other are loaded together
+DEFAULT_BATCH_WINDOW = 5.0
+BACKOFF_FACTOR = 1.5
+
+
+@dataclass
+class EndpointSchedule:
+    """
+    Poll schedule of an endpoint that adapts to how often the endpoint publishes new data.
+
+    The update period is an exponential moving average of the time between polls that loaded new records.
+    After a poll with new records, the next poll comes after the period divided by `polls_per_update`. Polls
+    without new records back off by BACKOFF_FACTOR, up to half of the period, so an overdue update is still
+    picked up soon. Intervals stay within `min_interval` and `max_interval`.
+    """
+
+    min_interval: float = DEFAULT_MIN_INTERVAL
+    max_interval: float = DEFAULT_MAX_INTERVAL
+    interval: float = DEFAULT_INITIAL_INTERVAL
+    polls_per_update: float = DEFAULT_POLLS_PER_UPDATE
+    next_poll: float = 0.0
+    period: Optional[float] = None
+    last_change: Optional[float] = field(default=None, repr=False)
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def observe(self, changed: bool, polled_at: float) -> None:
+        """
+        Updates the schedule with the outcome of a poll.
+
+        Args:
+            changed (bool): The poll loaded new records.
+            polled_at (float): `time.monotonic()` value of the poll.
+        """
+        if changed:
+            if self.last_change is not None:
+                gap = polled_at - self.last_change
+                self.period = gap if self.period is None else (self.period + gap) / 2
+            self.last_change = polled_at
+            if self.period is not None:
+                self.interval = self._clamp(self.period / self.polls_per_update)
+        else:
+            interval = self.interval * BACKOFF_FACTOR
+            if self.period is not None:
+                interval = min(interval, self.period / 2)
+            self.interval = self._clamp(max(interval, self.interval))
+        self.next_poll = polled_at + self.interval
+
+
+def _due_endpoints(schedules: dict[str, EndpointSchedule], now: float, batch_window: float) -> list[str]:
+    return [name for name, schedule in schedules.items() if schedule.next_poll <= now + batch_window]
+
+
+def serve_real_time(
+    pipeline: dlt.Pipeline,
+    endpoints: Sequence[dict[str, str]] = DEFAULT_ENDPOINTS,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    batch_window: float = DEFAULT_BATCH_WINDOW,
+    stop: Optional[threading.Event] = None,
+    max_polls: Optional[int] = None,
+) -> dict[str, EndpointSchedule]:
+    """
+    Polls the real-time endpoints on adaptive schedules and loads them with a long-lived pipeline.
+
+    The pipeline, its destination connection and the HTTP session stay open between polls, so a poll only
+    costs the requests and a small load. Endpoints due within `batch_window` seconds of each other are
+    extracted and loaded together in one micro-batch. Between polls the loop sleeps until the next endpoint
+    is due, so shorter intervals do not add idle CPU. A failed poll is logged and backs off like a poll
+    without new records.
+
+    Args:
+        pipeline (dlt.Pipeline): The pipeline loading the imgw_real_time source.
+        endpoints (Sequence[dict[str, str]]): Endpoints to poll. Defaults to DEFAULT_ENDPOINTS.
+        min_interval (float): Shortest interval between polls of an endpoint in seconds.
+            Defaults to DEFAULT_MIN_INTERVAL.
+        max_interval (float): Longest interval between polls of an endpoint in seconds.
+            Defaults to DEFAULT_MAX_INTERVAL.
+        batch_window (float): Endpoints due within this many seconds are polled together.
+            Defaults to DEFAULT_BATCH_WINDOW.
+        stop (Optional[threading.Event]): Event ending the loop, e.g. set by a signal handler. Defaults to None.
+        max_polls (Optional[int]): Number of micro-batches after which the loop ends. Defaults to None (no limit).
+
+    Returns:
+        dict[str, EndpointSchedule]: The schedules by resource name, as they were when the loop ended.
+    """
+    stop = stop or threading.Event()
+    initial_interval = min(max(DEFAULT_INITIAL_INTERVAL, min_interval), max_interval)
+    schedules = {
+        endpoint["endpoint_name"]: EndpointSchedule(min_interval, max_interval, initial_interval)
+        for endpoint in endpoints
+    }
+    metrics = get_run_metrics()
+    polls = 0
+    while not stop.is_set() and (max_polls is None or polls < max_polls):
+        now = time.monotonic()
+        due = _due_endpoints(schedules, now, batch_window)
+        if not due:
+            stop.wait(min(schedule.next_poll for schedule in schedules.values()) - now)
+            continue
+
+        metrics.reset()
+        row_counts: dict[str, int] = {}
+        try:
+            pipeline.run(imgw_real_time().with_resources(*due))
+            trace = pipeline.last_trace
+            if trace is not None:
+                metrics.record_trace(trace)
+                if trace.last_normalize_info is not None:
+                    row_counts = trace.last_normalize_info.row_counts
+        except Exception:
+            logger.exception("Real-time poll of %s failed", ", ".join(due))
+        polls += 1
+
+        for name in due:
+            schedules[name].observe(row_counts.get(name, 0) > 0, now)
+        logger.info(
+            "Polled %s: %s",
+            ", ".join(due),
+            ", ".join(
+                f"{name} {row_counts.get(name, 0)} rows, next in {schedules[name].interval:.0f}s" for name in due
+            ),
+            extra={"metrics": metrics.summary()},
+        )
+    return schedules
@@ -0,0 +1,30 @@
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .config import DEFAULT_MEMORY_LIMIT, duckdb_config
+    from .duckdb_bulk import BulkLoadInfo, DuckDbBulkLoader, bulk_load_historic
+
+# submodules are imported on first access, so `imgw.load.config` does not pull in duckdb and the extract helpers
+_LAZY_IMPORTS = {
+    "DEFAULT_MEMORY_LIMIT": ".config",
+    "duckdb_config": ".config",
+    "BulkLoadInfo": ".duckdb_bulk",
+    "DuckDbBulkLoader": ".duckdb_bulk",
+    "bulk_load_historic": ".duckdb_bulk",
+}
+
+__all__ = ["DEFAULT_MEMORY_LIMIT", "BulkLoadInfo", "DuckDbBulkLoader", "bulk_load_historic", "duckdb_config"]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")  # noqa: TRY003
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,30 @@
+from typing import Optional, Union
+
+TDuckDbConfig = dict[str, Union[str, bool, int, float, list[str]]]
+
+DEFAULT_MEMORY_LIMIT = "2GB"
+
+
+def duckdb_config(
+    memory_limit: str = DEFAULT_MEMORY_LIMIT,
+    threads: Optional[int] = None,
+    temp_directory: Optional[str] = None,
+) -> TDuckDbConfig:
+    """
+    Builds the DuckDB connection config shared by the local pipelines.
+
+    Args:
+        memory_limit (str): Memory limit of DuckDB, e.g. "2GB". Defaults to DEFAULT_MEMORY_LIMIT.
+        threads (Optional[int]): Number of DuckDB threads. Defaults to None (number of cores).
+        temp_directory (Optional[str]): Directory where DuckDB spills data that exceeds the memory limit.
+            Defaults to None (next to the database file).
+
+    Returns:
+        TDuckDbConfig: The config passed to `duckdb.connect`.
+    """
+    config: TDuckDbConfig = {"memory_limit": memory_limit, "preserve_insertion_order": "false"}
+    if threads is not None:
+        config["threads"] = threads
+    if temp_directory is not None:
+        config["temp_directory"] = temp_directory
+    return config
@@ -0,0 +1,257 @@
+import threading
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import NamedTuple, Optional, Union
+
+import duckdb
+import pyarrow as pa
+
+from imgw.common import PRIMARY_KEYS, SORT_KEYS, get_logger, get_run_metrics
+from imgw.extract.helpers import TIncludeColumns, fetch_zip_data, find_zip_links, parse_table_batches, unzip
+from imgw.extract.helpers.extract import DEFAULT_BLOCK_SIZE, _save_failed_file
+
+from .config import DEFAULT_MEMORY_LIMIT, duckdb_config
+
+logger = get_logger(__name__)
+
+
+class BulkLoadInfo(NamedTuple):
+    """Summary of a bulk load."""
+
+    archives: int
+    rows: dict[str, int]
+    elapsed: float
+    failed: list[str]
+
+
+class DuckDbBulkLoader:
+    """
+    Writes Arrow data straight into DuckDB tables, bypassing dlt normalization.
+
+    Data is inserted through DuckDB's Arrow scan, which reads the Arrow buffers without converting rows.
+    Tables of the dataset are replaced on the first write of a load; sorting and indexes are applied in
+    `finalize`, after all data has been inserted. Every thread writes through its own cursor and writes are
+    serialized per table only, so different tables are loaded concurrently.
+
+    Args:
+        db_file (str): Path to the DuckDB database file.
+        dataset_name (str): Schema the tables are written to.
+        memory_limit (str): Memory limit of DuckDB. Defaults to DEFAULT_MEMORY_LIMIT.
+        threads (Optional[int]): Number of DuckDB threads. Defaults to None.
+        temp_directory (Optional[str]): Spill directory of DuckDB. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        db_file: str,
+        dataset_name: str,
+        memory_limit: str = DEFAULT_MEMORY_LIMIT,
+        threads: Optional[int] = None,
+        temp_directory: Optional[str] = None,
+    ) -> None:
+        self.dataset_name = dataset_name
+        self.rows: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._table_locks: dict[str, threading.Lock] = {}
+        self._local = threading.local()
+        self._cursors: list[duckdb.DuckDBPyConnection] = []
+        self._connection = duckdb.connect(db_file, config=duckdb_config(memory_limit, threads, temp_directory))
+        self._connection.execute(f'CREATE SCHEMA IF NOT EXISTS "{dataset_name}"')
+
+    def _table(self, table_type: str) -> str:
+        return f'"{self.dataset_name}"."{table_type}"'
+
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        """Returns the cursor of the calling thread, a DuckDB connection must not be shared between threads."""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            with self._lock:
+                cursor = self._connection.cursor()
+                self._cursors.append(cursor)
+            self._local.cursor = cursor
+        return cursor
+
+    def _table_lock(self, table_type: str) -> threading.Lock:
+        with self._lock:
+            return self._table_locks.setdefault(table_type, threading.Lock())
+
+    def write(self, table_type: str, data: Union[pa.Table, pa.RecordBatch]) -> None:
+        """
+        Inserts Arrow data into the table of its table type, replacing the table on its first write.
+
+        Args:
+            table_type (str): The table type, used as the table name.
+            data (Union[pa.Table, pa.RecordBatch]): Parsed data.
+        """
+        view_name = f"arrow_{uuid.uuid4().hex}"
+        cursor = self._cursor()
+        with self._table_lock(table_type), get_run_metrics().measure("load", table_type) as sample:
+            cursor.register(view_name, data)
+            try:
+                if table_type not in self.rows:
+                    cursor.execute(
+                        f"CREATE OR REPLACE TABLE {self._table(table_type)} AS SELECT * FROM {view_name} LIMIT 0"  # noqa: S608
+                    )
+                    self.rows[table_type] = 0
+                cursor.execute(
+                    f"INSERT INTO {self._table(table_type)} BY NAME SELECT * FROM {view_name}"  # noqa: S608
+                )
+                self.rows[table_type] += data.num_rows
+                sample.rows = data.num_rows
+                sample.bytes_in = data.nbytes
+            finally:
+                cursor.unregister(view_name)
+
+    def finalize(self, sort: bool = True, create_indexes: bool = False) -> None:
+        """
+        Sorts the loaded tables and builds their indexes.
+
+        Args:
+            sort (bool): Rewrite every table ordered by its SORT_KEYS, so DuckDB's zonemaps can skip row groups.
+                Defaults to True.
+            create_indexes (bool): Build an index over the primary key of every table. Defaults to False.
+        """
+        with self._lock:
+            for table_type in self.rows:
+                table = self._table(table_type)
+                columns = {row[0] for row in self._connection.execute(f"DESCRIBE {table}").fetchall()}
+                sort_key = [column for column in SORT_KEYS.get(table_type, []) if column in columns]
+                if sort and sort_key:
+                    logger.info("Sorting %s by %s", table, sort_key)
+                    order_by = ", ".join(f'"{column}"' for column in sort_key)
+                    self._connection.execute(
+                        f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {table} ORDER BY {order_by}"  # noqa: S608
+                    )
+                primary_key = PRIMARY_KEYS.get(table_type, [])
+                if create_indexes and primary_key:
+                    logger.info("Indexing %s on %s", table, primary_key)
+                    key_columns = ", ".join(f'"{column}"' for column in primary_key)
+                    self._connection.execute(f'CREATE INDEX IF NOT EXISTS "{table_type}_pk" ON {table} ({key_columns})')
+            self._connection.execute("CHECKPOINT")
+
+    def close(self) -> None:
+        """Closes the cursors of the writing threads and the DuckDB connection."""
+        with self._lock:
+            for cursor in self._cursors:
+                cursor.close()
+            self._cursors.clear()
+            self._connection.close()
+
+
+def _load_archive(
+    loader: DuckDbBulkLoader,
+    zip_link: str,
+    block_size: int,
+    include_columns: Optional[TIncludeColumns],
+) -> bool:
+    """
+    Downloads an archive and streams its CSV files into DuckDB as record batches.
+
+    Errors are logged and the archive is saved to the failed files instead of being raised, so that one broken
+    archive does not abort the load. Rows written before the error stay in the tables.
+
+    Args:
+        loader (DuckDbBulkLoader): The bulk loader.
+        zip_link (str): The URL of the archive.
+        block_size (int): Number of bytes of CSV parsed into a single batch.
+        include_columns (Optional[TIncludeColumns]): Columns to parse per table type.
+
+    Returns:
+        bool: True if the archive was loaded in full.
+    """
+    zip_file = fetch_zip_data(zip_link, stream=True)
+    if zip_file is None:
+        return False
+    try:
+        for csv_file in unzip(zip_file):
+            for batch, table_type in parse_table_batches(
+                csv_file, block_size=block_size, include_columns=include_columns
+            ):
+                loader.write(table_type, batch)
+    except Exception:
+        logger.exception("Failed to bulk load archive %s", zip_link)
+        get_run_metrics().record("load", failures=1)
+        _save_failed_file(zip_file)
+        return False
+    finally:
+        zip_file.close()
+    return not zip_file.failed
+
+
+def _pop_failed(pending: dict[Future, str], done: Iterable[Future]) -> list[str]:
+    """Removes finished archive loads from `pending` and returns the links of those that failed."""
+    failed = []
+    for future in done:
+        zip_link = pending.pop(future)
+        if not future.result():
+            failed.append(zip_link)
+    return failed
+
+
+def _zip_links(root_urls: Iterable[str], crawler_workers: int) -> Iterator[str]:
+    for root_url in root_urls:
+        yield from find_zip_links(root_url, max_workers=crawler_workers)
+
+
+def bulk_load_historic(
+    root_urls: Iterable[str],
+    db_file: str = "output/imgw.db",
+    dataset_name: str = "imgw_historic",
+    workers: int = 4,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    memory_limit: str = DEFAULT_MEMORY_LIMIT,
+    threads: Optional[int] = None,
+    temp_directory: Optional[str] = None,
+    include_columns: Optional[TIncludeColumns] = None,
+    crawler_workers: int = 8,
+    sort: bool = True,
+    create_indexes: bool = False,
+) -> BulkLoadInfo:
+    """
+    Loads the historic IMGW archives into a local DuckDB database without going through dlt.
+
+    At most `2 * workers` archives are in flight at once and CSV files are streamed in batches of
+    `block_size` bytes, so memory stays bounded by the number of workers and DuckDB's memory limit.
+    The weather tables are replaced.
+
+    Args:
+        root_urls (Iterable[str]): Root URLs of the archive directories.
+        db_file (str): Path to the DuckDB database file. Defaults to "output/imgw.db".
+        dataset_name (str): Schema the tables are written to. Defaults to "imgw_historic".
+        workers (int): Number of archives downloaded and parsed concurrently. Defaults to 4.
+        block_size (int): Number of bytes of CSV parsed into a single batch. Defaults to DEFAULT_BLOCK_SIZE.
+        memory_limit (str): Memory limit of DuckDB. Defaults to DEFAULT_MEMORY_LIMIT.
+        threads (Optional[int]): Number of DuckDB threads. Defaults to None (number of cores).
+        temp_directory (Optional[str]): Spill directory of DuckDB. Defaults to None.
+        include_columns (Optional[TIncludeColumns]): Columns to load per table type. Defaults to None.
+        crawler_workers (int): Number of directory listings fetched concurrently. Defaults to 8.
+        sort (bool): Sort the tables by station and date after the load. Defaults to True.
+        create_indexes (bool): Index the tables on their primary key after the load. Defaults to False.
+
+    Returns:
+        BulkLoadInfo: Number of archives, rows per table, elapsed seconds and the links of archives that could
+            not be loaded in full.
+    """
+    started = time.monotonic()
+    loader = DuckDbBulkLoader(db_file, dataset_name, memory_limit, threads, temp_directory)
+    archives = 0
+    failed: list[str] = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-load") as pool:
+            pending: dict[Future, str] = {}
+            for zip_link in _zip_links(root_urls, crawler_workers):
+                if len(pending) >= 2 * workers:
+                    failed += _pop_failed(pending, wait(pending, return_when=FIRST_COMPLETED).done)
+                pending[pool.submit(_load_archive, loader, zip_link, block_size, include_columns)] = zip_link
+                archives += 1
+            failed += _pop_failed(pending, list(pending))
+        loader.finalize(sort=sort, create_indexes=create_indexes)
+    finally:
+        loader.close()
+    info = BulkLoadInfo(archives, dict(loader.rows), time.monotonic() - started, sorted(failed))
+    logger.info("Bulk loaded %d archives in %.1fs: %s", info.archives, info.elapsed, info.rows)
+    if info.failed:
+        logger.warning("%d archives failed to load: %s", len(info.failed), ", ".join(info.failed))
+    return info
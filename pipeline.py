@@ -1,10 +1,17 @@
 import argparse
 import logging
 import os
+import signal
+import sys
+import threading
 from typing import Optional
 
-from imgw.common import setup_logging
+import dlt
+
+from imgw.common import MIB, get_memory_budget, get_run_metrics, setup_logging
 from imgw.extract import get_dlt_datalake_pipeline, get_dlt_local_pipeline, imgw_historic, imgw_real_time
+from imgw.extract.serve import DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL, serve_real_time
+from imgw.load import DEFAULT_MEMORY_LIMIT, bulk_load_historic
 
 
 def check_directory(path: str, create: Optional[bool] = False) -> None:
@@ -38,13 +45,74 @@ def check_directory(path: str, create: Optional[bool] = False) -> None:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="")
     parser.add_argument("--historic", action="store_true", help="Run historic pipeline")
+    parser.add_argument(
+        "--incremental", action="store_true", help="Only load new or changed archives in historic pipeline"
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Unzip and parse historic archives in this many worker processes (0 parses in threads)",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Write historic tables to the datalake as Delta tables partitioned by year instead of plain Parquet files",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        help="MiB of archives, CSV files and parsed tables the historic pipeline keeps in flight before downloads wait",
+    )
     parser.add_argument("--local", action="store_true", help="Run pipeline locally (using duckdb)")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep running and poll the real-time endpoints on schedules adapted to their update cadence",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=DEFAULT_MIN_INTERVAL,
+        help="With --serve, shortest interval between polls of an endpoint in seconds",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=DEFAULT_MAX_INTERVAL,
+        help="With --serve, longest interval between polls of an endpoint in seconds",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="With --local, load historic data straight into duckdb from Arrow, bypassing dlt normalization",
+    )
+    parser.add_argument("--duckdb-memory-limit", default=DEFAULT_MEMORY_LIMIT, help="Memory limit of local duckdb")
+    parser.add_argument("--duckdb-threads", type=int, help="Number of threads of local duckdb")
+    parser.add_argument("--duckdb-temp-dir", help="Directory where local duckdb spills data over the memory limit")
     parser.add_argument("--verbose", action="store_true", help="Set logging level to DEBUG")
+    parser.add_argument("--log-json", action="store_true", help="Log single-line JSON records instead of text")
     parser.add_argument("--failed-output", help="Directory to store failed files")
     parser.add_argument("--local-output", help="Path to duckdb database where data will be loaded")
     args = parser.parse_args()
+    if args.bulk:
+        # the bulk load replaces the tables and bounds memory by its worker count, see bulk_load_historic
+        unsupported = [
+            flag
+            for flag, value in (
+                ("--incremental", args.incremental),
+                ("--parse-workers", args.parse_workers),
+                ("--memory-budget", args.memory_budget),
+                ("--delta", args.delta),
+            )
+            if value
+        ]
+        if not args.local:
+            parser.error("--bulk requires --local")
+        if unsupported:
+            parser.error(f"--bulk cannot be combined with {', '.join(unsupported)}")
 
-    setup_logging()
+    setup_logging(json_format=args.log_json)
 
     logger = logging.getLogger()
     logger.setLevel("DEBUG") if args.verbose else logger.setLevel("INFO")
@@ -55,21 +123,83 @@ if __name__ == "__main__":
 
     logger.info("Starting pipeline run...")
 
+    local_output = args.local_output if args.local_output else "output/imgw.db"
+    duckdb_options = {
+        "memory_limit": args.duckdb_memory_limit,
+        "threads": args.duckdb_threads,
+        "temp_directory": args.duckdb_temp_dir,
+    }
+
+    memory_budget = args.memory_budget * MIB if args.memory_budget else None
+
+    metrics = get_run_metrics()
+
     if args.historic:
+        metrics.reset()
         try:
-            if args.local:
-                load_info_imgw_historic = get_dlt_local_pipeline(dataset_name="imgw_historic").run(imgw_historic())
+            if args.local and args.bulk:
+                load_info_imgw_historic = bulk_load_historic(
+                    dlt.config["sources.imgw.root_urls"], db_file=local_output, **duckdb_options
+                )
+            elif args.local:
+                historic_pipeline = get_dlt_local_pipeline(
+                    dataset_name="imgw_historic", db_file=local_output, **duckdb_options
+                )
+                load_info_imgw_historic = historic_pipeline.run(
+                    imgw_historic(
+                        incremental=args.incremental,
+                        parse_workers=args.parse_workers,
+                        memory_budget=memory_budget,
+                    )
+                )
+                metrics.record_trace(historic_pipeline.last_trace)
             else:
-                load_info_imgw_historic = get_dlt_datalake_pipeline().run(imgw_historic())
+                historic_pipeline = get_dlt_datalake_pipeline()
+                load_info_imgw_historic = historic_pipeline.run(
+                    imgw_historic(
+                        incremental=args.incremental,
+                        parse_workers=args.parse_workers,
+                        table_format="delta" if args.delta else None,
+                        # plain Parquet files are pruned by year through the statistics of sorted row groups
+                        sort_rows=True,
+                        memory_budget=memory_budget,
+                    )
+                )
+                metrics.record_trace(historic_pipeline.last_trace)
             logger.info("IMGW historic run finished. Load info:\n%s", load_info_imgw_historic)
+            if memory_budget:
+                budget = get_memory_budget(memory_budget)
+                logger.info("Memory budget peak: %d of %d MiB", budget.peak // MIB, budget.max_bytes // MIB)
         except Exception:
             logger.exception("Historic pipeline run failed.")
+        metrics.log_summary()
+
+    if args.serve:
+        if args.local:
+            real_time_pipeline = get_dlt_local_pipeline(
+                dataset_name="imgw_real_time", db_file=local_output, **duckdb_options
+            )
+        else:
+            real_time_pipeline = get_dlt_datalake_pipeline()
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        logger.info("Serving real-time endpoints, polling every %.0f to %.0fs", args.min_interval, args.max_interval)
+        serve_real_time(real_time_pipeline, min_interval=args.min_interval, max_interval=args.max_interval, stop=stop)
+        logger.info("Stopped serving real-time endpoints.")
+        sys.exit(0)
 
+    metrics.reset()
     try:
         if args.local:
-            load_info_imgw_real_time = get_dlt_local_pipeline(dataset_name="imgw_real_time").run(imgw_real_time())
+            real_time_pipeline = get_dlt_local_pipeline(
+                dataset_name="imgw_real_time", db_file=local_output, **duckdb_options
+            )
         else:
-            load_info_imgw_real_time = get_dlt_datalake_pipeline().run(imgw_real_time())
+            real_time_pipeline = get_dlt_datalake_pipeline()
+        load_info_imgw_real_time = real_time_pipeline.run(imgw_real_time())
+        metrics.record_trace(real_time_pipeline.last_trace)
         logger.info("IMGW real-time run finished. Load info:\n%s", load_info_imgw_real_time)
     except Exception:
         logger.exception("Pipeline run failed.")
+    metrics.log_summary()
@@ -0,0 +1,70 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from benchmarks.run import BenchmarkResult, compare, main
+from benchmarks.server import serve_tree
+from benchmarks.synthetic import generate_tree, load_tree
+from imgw.extract.helpers import find_zip_links, parse_table, unzip
+from imgw.extract.helpers.extract import ImgwZip
+
+
+class TestSyntheticTree(unittest.TestCase):
+    def setUp(self):
+        self.tree_dir = tempfile.TemporaryDirectory()
+        self.tree = generate_tree(self.tree_dir.name, months=(2,), stations=2)
+
+    def tearDown(self):
+        self.tree_dir.cleanup()
+
+    def test_manifest_round_trip(self):
+        self.assertEqual(load_tree(self.tree_dir.name), self.tree)
+        self.assertEqual(len(self.tree.malformed), 3)
+
+    def test_crawl_served_tree(self):
+        with serve_tree(self.tree_dir.name) as base_url:
+            links = {link for root_url in self.tree.root_urls for link in find_zip_links(base_url + root_url)}
+        self.assertEqual(links, {f"{base_url}/{path}" for path in self.tree.archives})
+
+    def test_archives_parse(self):
+        path = next(path for path in self.tree.archives if path.endswith("2001_02_s.zip") and "terminowe" in path)
+        with open(f"{self.tree_dir.name}/{path}", "rb") as f:
+            zip_file = ImgwZip(filename="2001_02_s.zip", content=f.read())
+        (csv_file,) = unzip(zip_file)
+        table, table_type = parse_table(csv_file)
+        self.assertEqual(table_type, "s_t")
+        self.assertEqual(table.num_rows, 2 * 28 * 24)
+        self.assertIn("ŁÓDŹ-LUBLINEK", table.column("station_name").to_pylist())
+
+
+class TestCompare(unittest.TestCase):
+    def test_flags_regressions(self):
+        baseline = {"parse_table": {"mb_per_s": 100.0, "rows_per_s": 1000.0, "peak_rss_mb": 100.0}}
+        result = BenchmarkResult("parse_table", seconds=1.0, nbytes=50 * 1024 * 1024, rows=1000, peak_rss=0)
+        regressions = compare([result], baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("mb_per_s", regressions[0])
+
+    def test_flags_budget_overruns(self):
+        result = BenchmarkResult("import_extract", seconds=2.5, nbytes=0, rows=1, peak_rss=0)
+        self.assertEqual(compare([result], {}, tolerance=0.25, budgets={"import_extract": 3.0}), [])
+        regressions = compare([result], {}, tolerance=0.25, budgets={"import_extract": 2.0})
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("budget", regressions[0])
+
+    @patch("benchmarks.run.generate_tree")
+    @patch("benchmarks.run.run_benchmarks")
+    def test_quick_run_skips_baseline(self, mock_run_benchmarks, mock_generate_tree):
+        # far below the stored throughput of parse_table
+        mock_run_benchmarks.return_value = [
+            BenchmarkResult("parse_table", seconds=1.0, nbytes=1024, rows=1, peak_rss=0)
+        ]
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main(["parse_table", "--quick", "--check"]), 0)
+            self.assertEqual(main(["parse_table", "--check"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
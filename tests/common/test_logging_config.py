@@ -0,0 +1,50 @@
+import json
+import logging
+import unittest
+from unittest.mock import patch
+
+from imgw.common.logging_config import DebugRateLimitFilter, JsonFormatter
+
+
+def _record(msg, level=logging.DEBUG, **extra):
+    record = logging.makeLogRecord({"name": "imgw.test", "msg": msg, "args": ("x",), "levelno": level})
+    record.levelname = logging.getLevelName(level)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter(unittest.TestCase):
+    def test_includes_extra_fields(self):
+        entry = json.loads(JsonFormatter().format(_record("Parsed %s", stage="parse", metrics={"rows": 3})))
+        self.assertEqual(entry["message"], "Parsed x")
+        self.assertEqual(entry["level"], "DEBUG")
+        self.assertEqual(entry["stage"], "parse")
+        self.assertEqual(entry["metrics"], {"rows": 3})
+        self.assertNotIn("msg", entry)
+
+
+class TestDebugRateLimitFilter(unittest.TestCase):
+    @patch("imgw.common.logging_config.time.monotonic")
+    def test_limits_debug_records_per_template(self, monotonic):
+        monotonic.return_value = 0.0
+        rate_limit = DebugRateLimitFilter(rate=2)
+        passed = [rate_limit.filter(_record("Found zip: %s")) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(rate_limit.filter(_record("Scraping: %s")))
+        self.assertTrue(rate_limit.filter(_record("Found zip: %s", level=logging.INFO)))
+
+        monotonic.return_value = 1.5
+        record = _record("Found zip: %s")
+        self.assertTrue(rate_limit.filter(record))
+        self.assertIn("3 similar messages suppressed", record.getMessage())
+
+    def test_decides_once_per_record(self):
+        rate_limit = DebugRateLimitFilter(rate=1)
+        record = _record("Found zip: %s")
+        self.assertTrue(rate_limit.filter(record))
+        self.assertTrue(rate_limit.filter(record))
+        self.assertFalse(rate_limit.filter(_record("Found zip: %s")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import threading
+import unittest
+
+from imgw.common.memory_budget import MemoryBudget, Reservation
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def test_acquire_and_release(self):
+        budget = MemoryBudget(100)
+        budget.acquire(60)
+        budget.acquire(60)
+        self.assertEqual(budget.used, 120)
+        self.assertEqual(budget.peak, 120)
+        budget.release(60)
+        self.assertEqual(budget.used, 60)
+        self.assertEqual(budget.peak, 120)
+
+    def test_release_never_goes_negative(self):
+        budget = MemoryBudget(100)
+        budget.release(10)
+        self.assertEqual(budget.used, 0)
+
+    def test_hold(self):
+        budget = MemoryBudget(100)
+        with budget.hold(30):
+            self.assertEqual(budget.used, 30)
+        self.assertEqual(budget.used, 0)
+
+    def test_reserve_times_out(self):
+        budget = MemoryBudget(100)
+        budget.acquire(60)
+        self.assertFalse(budget.reserve(50, timeout=0.01))
+        self.assertEqual(budget.used, 60)
+
+    def test_reserve_wakes_up_on_release(self):
+        budget = MemoryBudget(100)
+        budget.acquire(150)
+        timer = threading.Timer(0.05, budget.release, args=(100,))
+        timer.start()
+        try:
+            self.assertTrue(budget.reserve(50, timeout=5))
+        finally:
+            timer.cancel()
+        self.assertEqual(budget.used, 100)
+
+    def test_oversized_reservation_is_admitted_alone(self):
+        budget = MemoryBudget(100)
+        self.assertTrue(budget.reserve(150, timeout=0.01))
+        self.assertFalse(budget.reserve(1, timeout=0.01))
+        self.assertEqual(budget.used, 150)
+
+
+class TestReservation(unittest.TestCase):
+    def test_resize_hand_over_and_release(self):
+        budget = MemoryBudget(100)
+        reservation = Reservation(budget)
+        self.assertTrue(reservation.reserve(80))
+        reservation.resize(30)
+        self.assertEqual(budget.used, 30)
+        reservation.hand_over(10)
+        self.assertEqual((reservation.nbytes, budget.used), (20, 30))
+        reservation.release()
+        # the handed over bytes stay accounted until the receiving stage releases them
+        self.assertEqual((reservation.nbytes, budget.used), (0, 10))
+
+    def test_resize_and_hand_over_beyond_the_estimate(self):
+        budget = MemoryBudget(100)
+        reservation = Reservation(budget)
+        reservation.reserve(10)
+        reservation.resize(120)
+        self.assertEqual(budget.used, 120)
+        reservation.hand_over(150)
+        self.assertEqual((reservation.nbytes, budget.used), (0, 150))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from imgw.common.metrics import RunMetrics, StageMetrics
+
+
+class TestRunMetrics(unittest.TestCase):
+    def test_measure_records_sample(self):
+        metrics = RunMetrics()
+        with metrics.measure("parse", "s_t") as sample:
+            sample.rows = 10
+            sample.bytes_in = 100
+        totals = metrics.stages()["parse"]
+        self.assertEqual(totals.rows, 10)
+        self.assertEqual(totals.bytes_in, 100)
+        self.assertGreater(totals.seconds, 0)
+        self.assertIsNotNone(totals.started)
+
+    def test_measure_counts_exceptions_as_failures(self):
+        metrics = RunMetrics()
+        with self.assertRaises(ValueError), metrics.measure("download"):
+            raise ValueError
+        self.assertEqual(metrics.stages()["download"].failures, 1)
+
+    def test_summary_per_table_type(self):
+        metrics = RunMetrics()
+        metrics.record("parse", "s_t", rows=10, seconds=1.0, started=0.0, finished=2.0)
+        metrics.record("parse", "k_d", rows=5, failures=1, seconds=1.0, started=1.0, finished=4.0)
+        summary = metrics.summary()
+        self.assertEqual(summary["parse/rows"], 15)
+        self.assertEqual(summary["parse/seconds"], 2.0)
+        self.assertEqual(summary["parse/wall_seconds"], 4.0)
+        self.assertEqual(summary["parse/rows_per_s"], 3.8)
+        self.assertEqual(summary["parse/k_d/failures"], 1)
+        self.assertEqual(summary["parse/s_t/rows"], 10)
+
+    def test_merge_snapshot(self):
+        worker = RunMetrics()
+        worker.record("unzip", "s_t", files=2, bytes_out=50)
+        metrics = RunMetrics()
+        metrics.record("unzip", "s_t", files=1)
+        metrics.merge(worker.snapshot())
+        self.assertEqual(metrics.stages()["unzip"].files, 3)
+        self.assertEqual(metrics.stages()["unzip"].bytes_out, 50)
+
+    def test_reset(self):
+        metrics = RunMetrics()
+        metrics.add("crawl", StageMetrics(files=1))
+        metrics.reset()
+        self.assertEqual(metrics.summary(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from imgw.extract.helpers.crawl_index import CrawlIndex, conditional_headers
+
+
+class TestCrawlIndex(unittest.TestCase):
+    def setUp(self):
+        self.crawl_index = CrawlIndex(":memory:")
+
+    def tearDown(self):
+        self.crawl_index.close()
+
+    def test_get_missing(self):
+        self.assertIsNone(self.crawl_index.get("https://example.com/"))
+
+    def test_put_and_get(self):
+        self.crawl_index.put("https://example.com/", '"etag"', "Mon, 01 Jan 2024 00:00:00 GMT", ["a.zip"], ["b/"])
+        entry = self.crawl_index.get("https://example.com/")
+        self.assertEqual(entry.etag, '"etag"')
+        self.assertEqual(entry.zip_links, ["a.zip"])
+        self.assertEqual(entry.subdirs, ["b/"])
+
+    def test_walk(self):
+        self.crawl_index.put(
+            "https://example.com/", None, None, ["https://example.com/1.zip"], ["https://example.com/a/"]
+        )
+        self.crawl_index.put("https://example.com/a/", None, None, [], ["https://example.com/a/b/"])
+        visited, missing = set(), []
+        links = list(self.crawl_index.walk("https://example.com/", visited, missing))
+        self.assertEqual(links, ["https://example.com/1.zip"])
+        self.assertEqual(missing, ["https://example.com/a/b/"])
+        self.assertIn("https://example.com/a/", visited)
+
+    def test_conditional_headers(self):
+        self.assertEqual(conditional_headers(None), {})
+        self.crawl_index.put("https://example.com/", '"etag"', "yesterday", [], [])
+        headers = conditional_headers(self.crawl_index.get("https://example.com/"))
+        self.assertEqual(headers, {"If-None-Match": '"etag"', "If-Modified-Since": "yesterday"})
+
+
+if __name__ == "__main__":
+    unittest.main()
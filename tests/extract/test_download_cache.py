@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+import unittest
+
+from imgw.extract.helpers.download_cache import ORPHAN_MIN_AGE_SECONDS, DownloadCache
+
+
+class TestDownloadCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache = DownloadCache(self.cache_dir.name, max_bytes=10)
+
+    def tearDown(self):
+        self.cache.close()
+        self.cache_dir.cleanup()
+
+    def _store(self, url, content):
+        sha256, size = self.cache.write_blob([content[:2], content[2:]])
+        return self.cache.put(url, sha256, size, {"etag": url})
+
+    def test_lookup_missing(self):
+        self.assertIsNone(self.cache.lookup("https://example.com/a.zip"))
+
+    def test_write_and_read(self):
+        self._store("https://example.com/a.zip", b"abcd")
+        entry = self.cache.lookup("https://example.com/a.zip")
+        self.assertEqual(entry.size, 4)
+        self.assertEqual(entry.fingerprint, {"etag": "https://example.com/a.zip"})
+        self.assertEqual(self.cache.read(entry).to_pybytes(), b"abcd")
+
+    def test_identical_content_stored_once(self):
+        first = self._store("https://example.com/a.zip", b"abcd")
+        second = self._store("https://example.com/b.zip", b"abcd")
+        self.assertEqual(first.sha256, second.sha256)
+        blobs = [name for _, _, names in os.walk(os.path.join(self.cache_dir.name, "blobs")) for name in names]
+        self.assertEqual(len(blobs), 1)
+
+    def test_evicts_least_recently_used(self):
+        self._store("https://example.com/a.zip", b"aaaa")
+        self._store("https://example.com/b.zip", b"bbbb")
+        self.cache.read(self.cache.lookup("https://example.com/a.zip"))
+        self._store("https://example.com/c.zip", b"cccc")
+        self.assertIsNone(self.cache.lookup("https://example.com/b.zip"))
+        self.assertIsNotNone(self.cache.lookup("https://example.com/a.zip"))
+        self.assertIsNotNone(self.cache.lookup("https://example.com/c.zip"))
+
+    def test_read_evicted_blob(self):
+        entry = self._store("https://example.com/a.zip", b"abcd")
+        os.remove(self.cache.blob_path(entry.sha256))
+        self.assertIsNone(self.cache.read(entry))
+
+    def test_orphans_are_swept_on_open(self):
+        indexed = self._store("https://example.com/a.zip", b"abcd")
+        old_orphan, _ = self.cache.write_blob([b"old"])
+        new_orphan, _ = self.cache.write_blob([b"new"])
+        part_path = os.path.join(self.cache_dir.name, "interrupted.part")
+        with open(part_path, "wb") as f:
+            f.write(b"partial")
+        expired = time.time() - ORPHAN_MIN_AGE_SECONDS - 1
+        for path in (self.cache.blob_path(indexed.sha256), self.cache.blob_path(old_orphan), part_path):
+            os.utime(path, (expired, expired))
+
+        DownloadCache(self.cache_dir.name, max_bytes=10).close()
+        self.assertTrue(os.path.exists(self.cache.blob_path(indexed.sha256)))
+        self.assertFalse(os.path.exists(self.cache.blob_path(old_orphan)))
+        self.assertFalse(os.path.exists(part_path))
+        # may still be registered by another process
+        self.assertTrue(os.path.exists(self.cache.blob_path(new_orphan)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,36 @@
+import os
+import tempfile
 import unittest
+from collections.abc import Iterator
+from unittest.mock import MagicMock, patch
 
 import pyarrow as pa
 
-from imgw.extract.helpers.extract import ImgwCsv, ImgwZip, _save_failed_file, parse_table, unzip
+from imgw.extract.helpers.download_cache import DownloadCache
+from imgw.extract.helpers.extract import (
+    ArchiveProgress,
+    ImgwCsv,
+    ImgwZip,
+    _archive_fingerprint,
+    _save_failed_file,
+    fetch_zip_data,
+    parse_table,
+    parse_table_batches,
+    unzip,
+)
 
 TEST_VALID_SCHEMA = {"test_table": {"column1": pa.int64(), "column2": pa.string()}}
 
 TEST_VALID_ZIP = b'PK\x03\x04\n\x00\x00\x00\x00\x00\x9a\xa0\x96Za\xe4\x84"\x0c\x00\x00\x00\x0c\x00\x00\x00\x08\x00\x1c\x00test.csvUT\t\x00\x03D\xda\x07hD\xda\x07hux\x0b\x00\x01\x04\xe8\x03\x00\x00\x04\xe8\x03\x00\x00test_contentPK\x01\x02\x1e\x03\n\x00\x00\x00\x00\x00\x9a\xa0\x96Za\xe4\x84"\x0c\x00\x00\x00\x0c\x00\x00\x00\x08\x00\x18\x00\x00\x00\x00\x00\x01\x00\x00\x00\xa4\x81\x00\x00\x00\x00test.csvUT\x05\x00\x03D\xda\x07hux\x0b\x00\x01\x04\xe8\x03\x00\x00\x04\xe8\x03\x00\x00PK\x05\x06\x00\x00\x00\x00\x01\x00\x01\x00N\x00\x00\x00N\x00\x00\x00\x00\x00'  # zip with empty test.csv file
 
 
+def _mock_response(**kwargs):
+    """Mocks a response of requests.get, which is used as a context manager."""
+    response = MagicMock(**kwargs)
+    response.__enter__.return_value = response
+    return response
+
+
 class TestHelpers(unittest.TestCase):
     def test_imgw_csv_model(self):
         imgw_csv = ImgwCsv(filename="test.csv", content=b"test_content")
@@ -20,6 +42,20 @@ class TestHelpers(unittest.TestCase):
         self.assertEqual(imgw_zip.filename, "test.zip")
         self.assertEqual(imgw_zip.content, b"test_content")
 
+    def test_imgw_csv_invalid_filename(self):
+        with self.assertRaises(ValueError):
+            ImgwCsv(filename="test.txt", content=b"test_content")
+
+    def test_imgw_zip_invalid_filename(self):
+        with self.assertRaises(ValueError):
+            ImgwZip(filename="test.csv", content=b"test_content")
+
+    def test_file_resource_open_zero_copy(self):
+        content = memoryview(b"1,test 1\n2,test 2")
+        imgw_csv = ImgwCsv(filename="test_table_1.csv", content=content)
+        self.assertIs(imgw_csv.content, content)
+        self.assertEqual(imgw_csv.open().read(), b"1,test 1\n2,test 2")
+
     def test_save_failed_file(self):
         imgw_csv = ImgwCsv(filename="test.csv", content=b"test_content")
         _save_failed_file(imgw_csv)
@@ -33,6 +69,15 @@ class TestHelpers(unittest.TestCase):
         self.assertIsNotNone(table)
         self.assertEqual(table_type, "test_table")  # Assuming "table" is a valid table type
 
+    def test_read_table_dictionary_columns(self):
+        csv_content = '"249180010","NAME","2001","01","01","1.5","8","80","","2","","3",""\n'.encode("windows-1250")
+        imgw_csv = ImgwCsv(filename="k_d_t_01_2001.csv", content=csv_content)
+        table, table_type = parse_table(imgw_csv)
+        self.assertEqual(table_type, "k_d_t")
+        self.assertTrue(pa.types.is_dictionary(table.schema.field("station_name").type))
+        self.assertTrue(pa.types.is_dictionary(table.schema.field("temp_average_status").type))
+        self.assertEqual(table.column("temp_average_status").to_pylist(), ["8"])
+
     def test_read_table_invalid_csv(self):
         csv_content = b"invalid csv content"
         imgw_csv = ImgwCsv(filename="test_table.csv", content=csv_content)
@@ -47,19 +92,164 @@ class TestHelpers(unittest.TestCase):
         self.assertIsNone(table)
         self.assertEqual(table_type, "")
 
+    def test_parse_table_batches(self):
+        csv_content = "".join(f"{i},test {i}\n" for i in range(1000)).encode()
+        imgw_csv = ImgwCsv(filename="test_table_92734.csv", content=csv_content)
+        batches = list(parse_table_batches(imgw_csv, schemas=TEST_VALID_SCHEMA, block_size=1024))
+        self.assertGreater(len(batches), 1)
+        self.assertTrue(all(table_type == "test_table" for _, table_type in batches))
+        self.assertEqual(sum(batch.num_rows for batch, _ in batches), 1000)
+        self.assertEqual(batches[0][0].schema.field("column1").type, pa.int64())
+
+    def test_parse_table_batches_invalid_table_type(self):
+        imgw_csv = ImgwCsv(filename="invalid_table.csv", content=b"1,2")
+        self.assertEqual(list(parse_table_batches(imgw_csv, schemas=TEST_VALID_SCHEMA)), [])
+
     def test_unzip_valid_zip(self):
         zip_content = TEST_VALID_ZIP
         imgw_zip = ImgwZip(filename="test.zip", content=zip_content)
         csv_files = unzip(imgw_zip)
-        self.assertIsInstance(csv_files, list)
-        self.assertIsInstance(csv_files[0], ImgwCsv)
+        self.assertIsInstance(csv_files, Iterator)
+        self.assertIsInstance(next(csv_files), ImgwCsv)
+        self.assertEqual(list(csv_files), [])
 
     def test_unzip_invalid_zip(self):
         zip_content = b"invalid zip content"
         imgw_zip = ImgwZip(filename="test.zip", content=zip_content)
-        csv_files = unzip(imgw_zip)
+        csv_files = list(unzip(imgw_zip))
         self.assertEqual(csv_files, [])
 
+    def test_archive_progress(self):
+        completed = []
+        progress = ArchiveProgress(lambda: completed.append(True))
+        first = progress.add(ImgwCsv(filename="a.csv"))
+        second = progress.add(ImgwCsv(filename="b.csv"))
+        progress.parsed(False)
+        progress.unzipped(False)
+        self.assertEqual(completed, [])
+        progress.parsed(False)
+        self.assertEqual(completed, [True])
+        self.assertIs(first.archive, second.archive)
+
+        for failed_stage in ("unzip", "parse"):
+            with self.subTest(failed_stage=failed_stage):
+                completed.clear()
+                progress = ArchiveProgress(lambda: completed.append(True))
+                progress.add(ImgwCsv(filename="a.csv"))
+                progress.parsed(failed_stage == "parse")
+                progress.unzipped(failed_stage == "unzip")
+                self.assertEqual(completed, [])
+
+    def test_unzip_marks_unreadable_archive_failed(self):
+        imgw_zip = ImgwZip(filename="test.zip", content=b"<html>503 Service Unavailable</html>")
+        self.assertEqual(list(unzip(imgw_zip)), [])
+        self.assertTrue(imgw_zip.failed)
+
+    def test_archive_fingerprint_validators(self):
+        response = MagicMock(headers={"ETag": '"abc"', "Content-Length": "12"}, content=b"test_content")
+        self.assertEqual(_archive_fingerprint(response), {"etag": '"abc"', "content_length": "12"})
+
+    def test_archive_fingerprint_content_hash(self):
+        response = MagicMock(headers={}, content=b"test_content")
+        self.assertIn("sha256", _archive_fingerprint(response))
+
+    @patch("imgw.extract.helpers.extract.requests.get")
+    def test_fetch_zip_data(self, mock_get):
+        mock_get.return_value = _mock_response(status_code=200, content=b"test_content", headers={"ETag": '"abc"'})
+        imgw_zip = fetch_zip_data("https://example.com/subdir/test.zip")
+        self.assertEqual(imgw_zip.filename, "test.zip")
+        self.assertEqual(imgw_zip.fingerprint, {"etag": '"abc"'})
+
+    @patch("imgw.extract.helpers.extract.requests.get")
+    def test_fetch_zip_data_not_modified(self, mock_get):
+        mock_get.return_value = _mock_response(status_code=304, content=b"", headers={})
+        imgw_zip = fetch_zip_data("https://example.com/subdir/test.zip", {"etag": '"abc"'})
+        self.assertIsNone(imgw_zip)
+        mock_get.assert_called_once_with(
+            "https://example.com/subdir/test.zip", headers={"If-None-Match": '"abc"'}, stream=False
+        )
+        mock_get.return_value.__exit__.assert_called_once()
+
+    @patch("imgw.extract.helpers.extract.requests.get")
+    def test_fetch_zip_data_stream(self, mock_get):
+        mock_response = _mock_response(status_code=200, headers={})
+        mock_response.iter_content.return_value = [TEST_VALID_ZIP[:50], TEST_VALID_ZIP[50:]]
+        mock_get.return_value = mock_response
+        imgw_zip = fetch_zip_data("https://example.com/subdir/test.zip", stream=True, spool_max_size=16)
+        self.assertIsNotNone(imgw_zip.spool)
+        self.assertIn("sha256", imgw_zip.fingerprint)
+        self.assertEqual(imgw_zip.open().read(), TEST_VALID_ZIP)
+        csv_files = list(unzip(imgw_zip))
+        self.assertEqual(csv_files[0].content, b"test_content")
+        # a spool past spool_max_size is a named file that a worker process can open
+        disk_path = imgw_zip.disk_path()
+        self.assertTrue(os.path.isfile(disk_path))
+        imgw_zip.close()
+        self.assertFalse(os.path.exists(disk_path))
+
+    @patch("imgw.extract.helpers.extract.requests.get")
+    def test_fetch_zip_data_stream_in_memory(self, mock_get):
+        mock_response = _mock_response(status_code=200, headers={})
+        mock_response.iter_content.return_value = [TEST_VALID_ZIP[:50], TEST_VALID_ZIP[50:]]
+        mock_get.return_value = mock_response
+        imgw_zip = fetch_zip_data(
+            "https://example.com/subdir/test.zip", stream=True, spool_max_size=len(TEST_VALID_ZIP)
+        )
+        self.assertIsNone(imgw_zip.disk_path())
+        self.assertEqual(imgw_zip.nbytes, len(TEST_VALID_ZIP))
+        self.assertEqual(imgw_zip.open().read(), TEST_VALID_ZIP)
+
+    @patch("imgw.extract.helpers.extract.requests.get")
+    def test_fetch_zip_data_same_fingerprint(self, mock_get):
+        mock_get.return_value = _mock_response(status_code=200, content=b"test_content", headers={"ETag": '"abc"'})
+        self.assertIsNone(fetch_zip_data("https://example.com/subdir/test.zip", {"etag": '"abc"'}))
+
+    @patch("imgw.extract.helpers.extract.requests.get")
+    def test_fetch_zip_data_cache(self, mock_get):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = DownloadCache(cache_dir)
+            mock_response = _mock_response(status_code=200, headers={"ETag": '"abc"'})
+            mock_response.iter_content.return_value = [TEST_VALID_ZIP]
+            mock_get.return_value = mock_response
+            imgw_zip = fetch_zip_data("https://example.com/subdir/test.zip", cache=cache)
+            self.assertEqual(imgw_zip.open().read(), TEST_VALID_ZIP)
+            cached_path = imgw_zip.disk_path()
+            with open(cached_path, "rb") as f:
+                self.assertEqual(f.read(), TEST_VALID_ZIP)
+
+            mock_get.return_value = _mock_response(status_code=304, headers={})
+            imgw_zip = fetch_zip_data("https://example.com/subdir/test.zip", cache=cache)
+            mock_get.assert_called_with(
+                "https://example.com/subdir/test.zip", headers={"If-None-Match": '"abc"'}, stream=True
+            )
+            self.assertEqual(imgw_zip.fingerprint, {"etag": '"abc"'})
+            self.assertEqual(imgw_zip.disk_path(), cached_path)
+            self.assertEqual(next(unzip(imgw_zip)).content, b"test_content")
+            cache.close()
+
+    @patch("imgw.extract.helpers.extract.requests.get")
+    def test_fetch_zip_data_cache_evicted_after_lookup(self, mock_get):
+        url = "https://example.com/subdir/test.zip"
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = DownloadCache(cache_dir)
+            self.addCleanup(cache.close)
+            sha256, size = cache.write_blob([TEST_VALID_ZIP])
+            cache.put(url, sha256, size, {"etag": '"abc"'})
+            mock_response = _mock_response(status_code=200, headers={"ETag": '"abc"'})
+            mock_response.iter_content.return_value = [TEST_VALID_ZIP]
+
+            def evict_and_revalidate(*args, **kwargs):
+                # the blob is evicted while the archive is revalidated
+                os.remove(cache.blob_path(sha256))
+                mock_get.side_effect = [mock_response]
+                return _mock_response(status_code=304, headers={})
+
+            mock_get.side_effect = evict_and_revalidate
+            imgw_zip = fetch_zip_data(url, cache=cache)
+            mock_get.assert_called_with(url, stream=True)
+            self.assertEqual(imgw_zip.open().read(), TEST_VALID_ZIP)
+            self.assertTrue(os.path.exists(cache.blob_path(sha256)))
+
     # dont know how to mock dlt.sources.helpers.requests
     # @patch("requests.get")
     # def test_fetch_data_valid_url(self, mock_get):
@@ -0,0 +1,60 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+import pyarrow as pa
+
+from imgw.extract.helpers.extract import ImgwZip
+from imgw.extract.helpers.parallel import parse_archive_in_pool
+
+K_D_T_ROWS = '"249180010","NAME","2001","01","{day:02d}","1.5","","80","","2","","3",""\n'
+
+
+def _make_archive():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr("k_d_t_01_2001.csv", "".join(K_D_T_ROWS.format(day=day) for day in range(1, 29)))
+        zip_ref.writestr("unknown_2001.csv", "1,2,3\n")
+    return buffer.getvalue()
+
+
+class TestParallel(unittest.TestCase):
+    def test_parse_archive_in_pool(self):
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            zip_file = ImgwZip(filename="2001_k.zip", content=_make_archive())
+            results = list(parse_archive_in_pool(zip_file, workers=1, scratch_dir=scratch_dir))
+            self.assertEqual(len(results), 1)
+            table, table_type = results[0]
+            self.assertEqual(table_type, "k_d_t")
+            self.assertIsInstance(table, pa.Table)
+            self.assertEqual(table.num_rows, 28)
+            self.assertEqual(os.listdir(scratch_dir), [])
+
+    def test_parse_archive_in_pool_reads_archives_on_disk_in_place(self):
+        content = _make_archive()
+        with tempfile.TemporaryDirectory() as scratch_dir, tempfile.TemporaryDirectory() as cache_dir:
+            spool = tempfile.NamedTemporaryFile(dir=scratch_dir)  # noqa: SIM115
+            spool.write(content)
+            cached_path = os.path.join(cache_dir, "blob")
+            with open(cached_path, "wb") as f:
+                f.write(content)
+            archives = {
+                "spool": ImgwZip(filename="2001_k.zip", spool=spool),
+                "cache": ImgwZip(filename="2001_k.zip", content=content, path=cached_path),
+            }
+            for name, zip_file in archives.items():
+                with self.subTest(name), patch("imgw.extract.helpers.parallel.shutil.copyfileobj") as mock_copy:
+                    results = list(parse_archive_in_pool(zip_file, workers=1, scratch_dir=scratch_dir))
+                    mock_copy.assert_not_called()
+                    self.assertEqual([table.num_rows for table, _ in results], [28])
+                    self.assertFalse(zip_file.failed)
+            # the spool is removed when the archive is closed, the cached file is not owned by the pool
+            self.assertEqual(os.listdir(scratch_dir), [])
+            self.assertTrue(os.path.exists(cached_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import datetime
+import unittest
+
+import pyarrow as pa
+
+from imgw.extract.helpers.extract import ImgwCsv, parse_table
+from imgw.extract.helpers.parse_plan import build_parse_plans, get_parse_plans, match_table_type
+
+TEST_SCHEMA = {
+    "k_d": {"station_code": pa.int64(), "year": pa.int64(), "month": pa.int64(), "day": pa.int64(), "t": pa.float64()},
+    "test_table": {"column1": pa.int64(), "column2": pa.string()},
+}
+
+
+class TestParsePlan(unittest.TestCase):
+    def test_match_table_type(self):
+        self.assertEqual(match_table_type("s_t_01_2001.csv"), "s_t")
+        self.assertIsNone(match_table_type("2001.csv"))
+
+    def test_plans_are_cached(self):
+        self.assertIs(get_parse_plans(TEST_SCHEMA), get_parse_plans(TEST_SCHEMA))
+        self.assertIsNot(get_parse_plans(TEST_SCHEMA), get_parse_plans(TEST_SCHEMA, {"test_table": ["column2"]}))
+
+    def test_projection_includes_primary_key(self):
+        plans = build_parse_plans(TEST_SCHEMA, {"k_d": ["t"]})
+        self.assertEqual(plans["k_d"].columns, ("station_code", "year", "month", "day", "t", "measurement_date"))
+        self.assertEqual(plans["test_table"].columns, ("column1", "column2"))
+
+    def test_derive_date(self):
+        plan = build_parse_plans(TEST_SCHEMA)["k_d"]
+        table = pa.table({
+            "year": pa.array([1951, 2000, 2024], pa.int16()),
+            "month": pa.array([1, 2, 12], pa.int8()),
+            "day": pa.array([1, 29, 31], pa.int8()),
+        })
+        dates = plan.derive(table).column("measurement_date").to_pylist()
+        self.assertEqual(dates, [datetime.date(1951, 1, 1), datetime.date(2000, 2, 29), datetime.date(2024, 12, 31)])
+
+    def test_derive_timestamp(self):
+        plan = build_parse_plans({
+            "k_t": {"year": pa.int16(), "month": pa.int8(), "day": pa.int8(), "hour": pa.int8()}
+        })["k_t"]
+        batch = pa.record_batch({
+            "year": pa.array([2001], pa.int16()),
+            "month": pa.array([3], pa.int8()),
+            "day": pa.array([1], pa.int8()),
+            "hour": pa.array([18], pa.int8()),
+        })
+        timestamps = plan.derive(batch).column("measurement_timestamp").to_pylist()
+        self.assertEqual(timestamps, [datetime.datetime(2001, 3, 1, 18, tzinfo=datetime.timezone.utc)])
+
+    def test_unknown_column(self):
+        with self.assertRaises(ValueError):
+            build_parse_plans(TEST_SCHEMA, {"test_table": ["missing"]})
+
+    def test_parse_table_projection(self):
+        imgw_csv = ImgwCsv(filename="test_table_1.csv", content=b"1,a\n2,b\n")
+        table, table_type = parse_table(imgw_csv, schemas=TEST_SCHEMA, include_columns={"test_table": ["column2"]})
+        self.assertEqual(table_type, "test_table")
+        self.assertEqual(table.column_names, ["column2"])
+        self.assertEqual(table.column("column2").to_pylist(), ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
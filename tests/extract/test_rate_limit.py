@@ -0,0 +1,42 @@
+import time
+import unittest
+
+from imgw.extract.helpers.rate_limit import HostRateLimiter, TokenBucket
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_token_bucket_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_token_bucket_timeout(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+        self.assertTrue(bucket.acquire(timeout=0))
+        start = time.monotonic()
+        self.assertFalse(bucket.acquire(timeout=0.1))
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_host_rate_limiter_disabled(self):
+        limiter = HostRateLimiter(None)
+        start = time.monotonic()
+        for _ in range(100):
+            limiter.wait("https://example.com/a")
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_host_rate_limiter_separate_hosts(self):
+        limiter = HostRateLimiter(1)
+        start = time.monotonic()
+        limiter.wait("https://example.com/a")
+        limiter.wait("https://example.org/a")
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
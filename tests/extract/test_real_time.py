@@ -0,0 +1,311 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import dlt
+import pyarrow as pa
+from dlt.sources.helpers import requests
+
+from imgw.extract import DEFAULT_ENDPOINTS, imgw_real_time
+from imgw.extract.helpers.real_time import (
+    SlaExceededError,
+    fetch_coalesced,
+    fetch_endpoint,
+    fetch_stations,
+    filter_unchanged,
+    get_json_data,
+    records_to_table,
+)
+
+ENDPOINT_DELAY = 0.5
+
+SYNOP_RECORD = {"id_stacji": "12295", "data_pomiaru": "2024-06-01", "godzina_pomiaru": "12", "temperatura": "21.3"}
+METEO_RECORD = {
+    "kod_stacji": "253160090",
+    "temperatura_gruntu": "18.2",
+    "temperatura_gruntu_data": "2024-06-01 12:00:00",
+    "opad_10min": None,
+    "opad_10min_data": "2024-06-01 12:10:00",
+}
+
+HYDRO_RECORD = {"id_stacji": "150160180", "stan_wody": "230", "stan_wody_data_pomiaru": "2024-06-01 12:00:00"}
+API_RECORDS = {"synop": SYNOP_RECORD, "hydro": HYDRO_RECORD, "meteo": METEO_RECORD}
+
+
+def _response(status_code, body):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = body
+    response.content = json.dumps(body).encode()
+    response.headers = {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    return response
+
+
+class _SlowApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(ENDPOINT_DELAY)
+        path = self.path.rsplit("/", 1)[-1]
+        body = json.dumps([{**API_RECORDS.get(path, {}), "endpoint": path}]).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client gave up on the request
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFetchEndpoint(unittest.TestCase):
+    @patch("imgw.extract.helpers.real_time.RETRY_BACKOFF_SECONDS", 0)
+    def test_retries_server_errors(self):
+        session = MagicMock()
+        session.get.side_effect = [_response(503, {}), requests.ConnectionError(), _response(200, [{"id": 1}])]
+        self.assertEqual(fetch_endpoint("synop", max_attempts=3, session=session), [{"id": 1}])
+        self.assertEqual(session.get.call_count, 3)
+
+    @patch("imgw.extract.helpers.real_time.RETRY_BACKOFF_SECONDS", 0)
+    def test_retry_budget(self):
+        session = MagicMock()
+        session.get.side_effect = requests.ConnectionError()
+        with self.assertRaises(requests.ConnectionError):
+            fetch_endpoint("synop", max_attempts=2, session=session)
+        self.assertEqual(session.get.call_count, 2)
+
+    def test_no_products(self):
+        session = MagicMock()
+        session.get.return_value = _response(404, {"status": False, "message": "No products were found"})
+        self.assertEqual(fetch_endpoint("warningshydro", session=session), {})
+
+    def test_not_found(self):
+        session = MagicMock()
+        session.get.return_value = _response(404, {"status": False, "message": "Unknown endpoint"})
+        with self.assertRaises(requests.HTTPError):
+            fetch_endpoint("unknown", session=session)
+
+    def test_timeout_is_cut_to_deadline(self):
+        session = MagicMock()
+        session.get.return_value = _response(200, [])
+        fetch_endpoint("synop", request_timeout=10, deadline=time.monotonic() + 1, session=session)
+        self.assertLessEqual(session.get.call_args.kwargs["timeout"], 1)
+
+    def test_deadline_passed(self):
+        session = MagicMock()
+        with self.assertRaises(SlaExceededError):
+            fetch_endpoint("synop", deadline=time.monotonic() - 1, session=session)
+        session.get.assert_not_called()
+
+    @patch("imgw.extract.helpers.real_time.fetch_endpoint", side_effect=SlaExceededError("synop"))
+    def test_get_json_data_skips_missed_sla(self, _):
+        self.assertEqual(list(get_json_data("synop", sla_seconds=1)), [])
+
+
+STATION_REQUESTS = []
+
+
+class _StationApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        STATION_REQUESTS.append(self.path)
+        time.sleep(0.05)
+        station = self.path.rsplit("/", 1)[-1]
+        if station == "broken":
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({**SYNOP_RECORD, "id_stacji": station}).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFetchStations(unittest.TestCase):
+    def setUp(self):
+        STATION_REQUESTS.clear()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StationApiHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        patcher = patch(
+            "imgw.extract.helpers.real_time.API_URL", f"http://127.0.0.1:{self.server.server_address[1]}/api/data"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batches(self):
+        stations = [str(station) for station in range(10)]
+        batches = list(fetch_stations("synop", [*stations, "3"], max_requests_per_second=None, batch_size=4))
+        self.assertEqual([len(batch) for batch in batches], [4, 4, 2])
+        self.assertCountEqual([record["id_stacji"] for batch in batches for record in batch], stations)
+        self.assertEqual(len(STATION_REQUESTS), 10)
+        self.assertIn("/api/data/synop/id/3", STATION_REQUESTS)
+
+    def test_failed_stations_are_skipped(self):
+        batches = list(fetch_stations("synop", ["1", "broken", "2"], max_attempts=1, max_requests_per_second=None))
+        self.assertCountEqual([record["id_stacji"] for batch in batches for record in batch], ["1", "2"])
+
+    def test_rate_limit(self):
+        started = time.perf_counter()
+        list(fetch_stations("synop", [str(station) for station in range(30)], max_requests_per_second=20))
+        # the bucket starts with one second of requests
+        self.assertGreaterEqual(time.perf_counter() - started, 0.4)
+
+    def test_sla(self):
+        started = time.perf_counter()
+        batches = list(
+            fetch_stations(
+                "synop", [str(station) for station in range(100)], sla_seconds=0.3, max_requests_per_second=40
+            )
+        )
+        # without the SLA, the rate limit alone would stretch the sweep to at least 1.5s
+        self.assertLess(time.perf_counter() - started, 1.25)
+        self.assertLess(sum(len(batch) for batch in batches), 100)
+
+    def test_coalescing(self):
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda _: fetch_coalesced("synop/id/7"), range(4)))
+        self.assertEqual([result["id_stacji"] for result in results], ["7"] * 4)
+        self.assertLess(len(STATION_REQUESTS), 4)
+
+    def test_coalesced_waiter_timeout(self):
+        path = "synop/id/8"
+        with patch.dict("imgw.extract.helpers.real_time._in_flight", {path: Future()}):
+            with self.assertRaises(SlaExceededError):
+                fetch_coalesced(path, deadline=time.monotonic() + 0.05)
+            # a late waiter skips its station instead of failing the sweep
+            batches = list(fetch_stations("synop", ["8", "9"], sla_seconds=0.2, max_requests_per_second=None))
+        self.assertEqual([record["id_stacji"] for batch in batches for record in batch], ["9"])
+
+    def test_unknown_endpoint(self):
+        with self.assertRaises(ValueError):
+            imgw_real_time(stations={"warningsmeteo": ["1"]})
+
+
+class TestFilterUnchanged(unittest.TestCase):
+    def test_drops_repeated_records(self):
+        digests = {}
+        self.assertEqual(list(filter_unchanged("synop", [dict(SYNOP_RECORD)], digests)), [SYNOP_RECORD])
+        self.assertEqual(list(filter_unchanged("synop", [dict(SYNOP_RECORD)], digests)), [])
+        changed = {**SYNOP_RECORD, "temperatura": "21.4"}
+        self.assertEqual(list(filter_unchanged("synop", [dict(changed)], digests)), [changed])
+        self.assertEqual(list(digests), ["12295"])
+
+    def test_drops_records_without_key(self):
+        record = {**SYNOP_RECORD, "godzina_pomiaru": None}
+        self.assertEqual(list(filter_unchanged("synop", [record], {})), [])
+
+    def test_meteo_measurement_time(self):
+        (record,) = filter_unchanged("meteo", [dict(METEO_RECORD)], {})
+        self.assertEqual(record["data_pomiaru"], "2024-06-01 12:10:00")
+
+
+class TestRecordsToTable(unittest.TestCase):
+    def test_types(self):
+        hydro = {**HYDRO_RECORD, "temperatura_wody": None, "zjawisko_lodowe": "0", "lon": "21.0"}
+        table = records_to_table("hydro", [hydro])
+        self.assertEqual(table.schema.field("id_stacji").type, pa.int64())
+        self.assertFalse(table.schema.field("id_stacji").nullable)
+        self.assertEqual(table.schema.field("stan_wody_data_pomiaru").type, pa.timestamp("us"))
+        (row,) = table.to_pylist()
+        self.assertEqual(row["id_stacji"], 150160180)
+        self.assertEqual(row["stan_wody"], 230.0)
+        self.assertEqual(row["stan_wody_data_pomiaru"], datetime(2024, 6, 1, 12))
+        self.assertIsNone(row["temperatura_wody"])
+        self.assertEqual(row["zjawisko_lodowe"], 0)
+        # missing columns are null, unknown fields are kept as strings
+        self.assertIsNone(row["rzeka"])
+        self.assertEqual(row["lon"], "21.0")
+
+    def test_synop_date_and_hour(self):
+        table = records_to_table("synop", [SYNOP_RECORD])
+        self.assertEqual(table.column("data_pomiaru").type, pa.date32())
+        self.assertEqual(table.column("godzina_pomiaru").to_pylist(), [12])
+        self.assertEqual(table.column("temperatura").to_pylist(), [21.3])
+
+    def test_unparsable_values_are_null(self):
+        table = records_to_table("synop", [SYNOP_RECORD, {**SYNOP_RECORD, "temperatura": "n/a"}])
+        self.assertEqual(table.column("temperatura").to_pylist(), [21.3, None])
+
+
+class TestRealTimeSource(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowApiHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        api_url = f"http://127.0.0.1:{self.server.server_address[1]}/api/data"
+        patcher = patch("imgw.extract.helpers.real_time.API_URL", api_url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def test_endpoints_are_fetched_concurrently(self):
+        started = time.perf_counter()
+        items = list(imgw_real_time())
+        elapsed = time.perf_counter() - started
+        self.assertCountEqual(
+            [item["endpoint"][0].as_py() if isinstance(item, pa.Table) else item["endpoint"] for item in items],
+            [endpoint["api_path"] for endpoint in DEFAULT_ENDPOINTS],
+        )
+        self.assertLess(elapsed, ENDPOINT_DELAY * len(DEFAULT_ENDPOINTS) / 2)
+
+    def test_sla(self):
+        started = time.perf_counter()
+        items = list(imgw_real_time(sla_seconds=ENDPOINT_DELAY / 5))
+        self.assertEqual(items, [])
+        self.assertLess(time.perf_counter() - started, ENDPOINT_DELAY * 2)
+
+    def test_measurements_that_are_not_records_are_skipped(self):
+        def get_json_data(path, *args):
+            yield {"status": "error"} if path == "synop" else []
+
+        with (
+            patch("imgw.extract.helpers.get_json_data", side_effect=get_json_data),
+            self.assertLogs("imgw.extract", "WARNING") as logs,
+        ):
+            items = list(imgw_real_time().with_resources("synoptyczne"))
+        self.assertEqual(items, [])
+        self.assertIn("Expected a list of records from synop", logs.output[0])
+
+    def test_merge_loads_only_new_observations(self):
+        pipeline = dlt.pipeline(
+            pipeline_name="test_imgw_real_time",
+            destination=dlt.destinations.duckdb(os.path.join(self.tmp_dir, "imgw.db")),
+            dataset_name="imgw_real_time",
+            pipelines_dir=self.tmp_dir,
+        )
+        pipeline.run(imgw_real_time())
+        pipeline.run(imgw_real_time())
+        self.assertEqual(pipeline.last_trace.last_normalize_info.row_counts.get("synoptyczne", 0), 0)
+        with patch.dict(API_RECORDS, synop={**SYNOP_RECORD, "temperatura": "21.4"}):
+            pipeline.run(imgw_real_time())
+        with pipeline.sql_client() as client:
+            rows = client.execute_sql("SELECT id_stacji, temperatura FROM synoptyczne")
+        self.assertEqual(rows, [(12295, 21.4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,13 +3,13 @@ from unittest.mock import MagicMock, patch
 
 from bs4 import BeautifulSoup
 
+from imgw.extract.helpers.crawl_index import CrawlIndex
 from imgw.extract.helpers.scraper import (
+    DirectoryListing,
     _extract_links,
-    _fetch_and_parse,
     _is_visited,
-    _process_link,
+    _scrape_directory,
     find_zip_links,
-    scrape_directory_recursive,
 )
 
 
@@ -20,56 +20,110 @@ class TestScraper(unittest.TestCase):
         self.assertTrue(_is_visited("https://example.com", visited_dirs))
 
     @patch("imgw.extract.helpers.scraper.requests.get")
-    def test_fetch_and_parse(self, mock_get):
+    def test_scrape_directory(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b"<html></html>"
+        mock_response.content = b"<html><a href='file.zip'>File</a><a href='dir/'>Directory</a></html>"
         mock_get.return_value = mock_response
-        soup = _fetch_and_parse("https://example.com")
-        self.assertIsInstance(soup, BeautifulSoup)
-
-    # dont know how to mock dlt.sources.helpers.requests
-    # @patch("imgw.helpers.scraper.requests.get")
-    # def test_fetch_and_parse_exception(self, mock_get):
-    #     mock_get.side_effect = Exception("Mocked exception")
-    #     soup = fetch_and_parse("https://example.com", {}, 0)
-    #     self.assertIsNone(soup)
+        listing = _scrape_directory("https://example.com/")
+        self.assertEqual(listing.zip_links, ["https://example.com/file.zip"])
+        self.assertEqual(listing.subdirs, ["https://example.com/dir/"])
 
     def test_extract_links(self):
         soup = BeautifulSoup("<html><a href='#'>Link</a></html>", "html.parser")
         links = _extract_links(soup)
         self.assertEqual(len(links), 1)
 
-    def test_process_link_zip(self):
-        link = MagicMock()
-        link.get.return_value = "file.zip"
-        link.text.strip.return_value = "File"
-        found_zip_links = set()
-        _process_link(link, "https://example.com", found_zip_links, set())
-        self.assertEqual(len(found_zip_links), 1)
-
-    def test_process_link_directory(self):
-        link = MagicMock()
-        link.get.return_value = "dir/"
-        link.text.strip.return_value = "Directory"
-        visited_dirs = set()
-        found_zip_links = set()
-        with patch("imgw.extract.helpers.scraper.scrape_directory_recursive") as mock_scrape:
-            _process_link(link, "https://example.com", found_zip_links, visited_dirs)
-            mock_scrape.assert_called_once()
-
-    @patch("imgw.extract.helpers.scraper._fetch_and_parse")
-    @patch("imgw.extract.helpers.scraper._extract_links")
-    def test_scrape_directory_recursive(self, mock_extract_links, mock_fetch_and_parse):
-        mock_fetch_and_parse.return_value = BeautifulSoup("<html></html>", "html.parser")
-        mock_extract_links.return_value = []
-        scrape_directory_recursive("https://example.com", set(), set())
-        mock_fetch_and_parse.assert_called_once()
+    def test_scrape_directory_ignores_navigation_links(self):
+        content = (
+            b"<a href='../'>Parent Directory</a><a href='?C=N;O=D'>Name</a><a href='#top'>Top</a><a href='./'>.</a>"
+        )
+        response = MagicMock(status_code=200, content=content, headers={})
+        with patch("imgw.extract.helpers.scraper._fetch_listing", return_value=response):
+            listing = _scrape_directory("https://example.com/")
+        self.assertEqual(listing, DirectoryListing([], []))
+
+    def test_scrape_directory_failed_request(self):
+        with patch("imgw.extract.helpers.scraper._fetch_listing", return_value=None):
+            listing = _scrape_directory("https://example.com/")
+        self.assertEqual(listing, DirectoryListing([], []))
 
     def test_find_zip_links(self):
-        with patch("imgw.extract.helpers.scraper.scrape_directory_recursive") as mock_scrape:
-            list(find_zip_links("https://example.com"))
-            mock_scrape.assert_called_once()
+        pages = {
+            "https://example.com/": "<a href='a/'>a</a><a href='b/'>b</a><a href='root.zip'>root</a>",
+            "https://example.com/a/": "<a href='../'>Parent Directory</a><a href='1.zip'>1</a><a href='c/'>c</a>",
+            "https://example.com/b/": "<a href='2.zip'>2</a><a href='../a/'>a</a>",
+            "https://example.com/a/c/": "<a href='3.zip'>3</a><a href='1.zip'>dup</a>",
+        }
+
+        def fake_fetch(url, rate_limiter=None, headers=None):
+            return MagicMock(status_code=200, content=pages[url].encode(), headers={})
+
+        with patch("imgw.extract.helpers.scraper._fetch_listing", side_effect=fake_fetch) as mock_fetch:
+            links = list(find_zip_links("https://example.com", max_workers=2))
+
+        self.assertEqual(len(links), len(set(links)))
+        self.assertEqual(
+            set(links),
+            {
+                "https://example.com/root.zip",
+                "https://example.com/a/1.zip",
+                "https://example.com/b/2.zip",
+                "https://example.com/a/c/1.zip",
+                "https://example.com/a/c/3.zip",
+            },
+        )
+        self.assertEqual(mock_fetch.call_count, len(pages))
+
+    def test_find_zip_links_yields_before_crawl_finishes(self):
+        with patch("imgw.extract.helpers.scraper._scrape_directory") as mock_scrape:
+            mock_scrape.return_value = DirectoryListing(["https://example.com/first.zip"], [])
+            links = find_zip_links("https://example.com")
+            self.assertEqual(next(links), "https://example.com/first.zip")
+            links.close()
+
+    def test_find_zip_links_skips_unchanged_subtrees(self):
+        crawl_index = CrawlIndex(":memory:")
+        crawl_index.put("https://example.com/", '"root"', None, [], ["https://example.com/a/"])
+        crawl_index.put("https://example.com/a/", '"a"', None, ["https://example.com/a/1.zip"], [])
+
+        def fake_fetch(url, rate_limiter=None, headers=None):
+            self.assertEqual(headers, {"If-None-Match": '"root"'})
+            return MagicMock(status_code=304, content=b"", headers={})
+
+        with patch("imgw.extract.helpers.scraper._fetch_listing", side_effect=fake_fetch) as mock_fetch:
+            links = list(find_zip_links("https://example.com", crawl_index=crawl_index, skip_unchanged_subtrees=True))
+
+        self.assertEqual(links, ["https://example.com/a/1.zip"])
+        mock_fetch.assert_called_once()
+
+    def test_find_zip_links_revalidates_unchanged_subtrees(self):
+        crawl_index = CrawlIndex(":memory:")
+        crawl_index.put("https://example.com/", '"root"', None, [], ["https://example.com/a/"])
+        crawl_index.put("https://example.com/a/", '"a"', None, ["https://example.com/a/1.zip"], [])
+        listing = b"<a href='1.zip'>1</a><a href='2.zip'>2</a>"
+
+        def fake_fetch(url, rate_limiter=None, headers=None):
+            if url == "https://example.com/":
+                return MagicMock(status_code=304, content=b"", headers={})
+            self.assertEqual(headers, {"If-None-Match": '"a"'})
+            return MagicMock(status_code=200, content=listing, headers={"ETag": '"a2"'})
+
+        with patch("imgw.extract.helpers.scraper._fetch_listing", side_effect=fake_fetch):
+            links = list(find_zip_links("https://example.com", crawl_index=crawl_index))
+
+        # an archive added below an unchanged listing is found
+        self.assertEqual(links, ["https://example.com/a/1.zip", "https://example.com/a/2.zip"])
+
+    def test_scrape_directory_stores_validators(self):
+        crawl_index = CrawlIndex(":memory:")
+        response = MagicMock(status_code=200, content=b"<a href='1.zip'>1</a>", headers={"ETag": '"v1"'})
+        with patch("imgw.extract.helpers.scraper._fetch_listing", return_value=response):
+            listing = _scrape_directory("https://example.com/", crawl_index=crawl_index)
+        self.assertFalse(listing.unchanged)
+        entry = crawl_index.get("https://example.com/")
+        self.assertEqual(entry.etag, '"v1"')
+        self.assertEqual(entry.zip_links, ["https://example.com/1.zip"])
 
 
 if __name__ == "__main__":
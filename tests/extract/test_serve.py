@@ -0,0 +1,80 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from imgw.extract.serve import EndpointSchedule, serve_real_time
+
+ENDPOINTS = [
+    {"endpoint_name": "synoptyczne", "api_path": "synop"},
+    {"endpoint_name": "hydrologiczne", "api_path": "hydro"},
+]
+
+
+def _pipeline(row_counts):
+    pipeline = MagicMock()
+    pipeline.last_trace.last_normalize_info.row_counts = row_counts
+    pipeline.last_trace.steps = []
+    return pipeline
+
+
+class TestEndpointSchedule(unittest.TestCase):
+    def test_follows_update_period(self):
+        schedule = EndpointSchedule(min_interval=10, max_interval=3600, interval=60, polls_per_update=4)
+        schedule.observe(True, 0)
+        self.assertEqual(schedule.interval, 60)
+        schedule.observe(True, 600)
+        self.assertEqual(schedule.period, 600)
+        self.assertEqual(schedule.interval, 150)
+        self.assertEqual(schedule.next_poll, 750)
+
+    def test_backs_off_without_changes(self):
+        schedule = EndpointSchedule(min_interval=10, max_interval=100, interval=60)
+        schedule.observe(False, 0)
+        self.assertEqual(schedule.interval, 90)
+        schedule.observe(False, 90)
+        self.assertEqual(schedule.interval, 100)
+
+    def test_backoff_is_capped_by_period(self):
+        schedule = EndpointSchedule(min_interval=10, max_interval=3600, interval=60, polls_per_update=4)
+        schedule.observe(True, 0)
+        schedule.observe(True, 400)
+        for polled_at in range(500, 2000, 100):
+            schedule.observe(False, polled_at)
+        self.assertEqual(schedule.interval, 200)
+
+    def test_min_interval(self):
+        schedule = EndpointSchedule(min_interval=10, max_interval=3600, interval=10, polls_per_update=4)
+        schedule.observe(True, 0)
+        schedule.observe(True, 10)
+        self.assertEqual(schedule.interval, 10)
+
+
+class TestServeRealTime(unittest.TestCase):
+    @patch("imgw.extract.serve.imgw_real_time")
+    def test_micro_batches_due_endpoints(self, source):
+        pipeline = _pipeline({"synoptyczne": 3})
+        schedules = serve_real_time(pipeline, ENDPOINTS, min_interval=10, max_interval=100, max_polls=1)
+        source.return_value.with_resources.assert_called_once_with("synoptyczne", "hydrologiczne")
+        pipeline.run.assert_called_once()
+        # no update period is known yet: the changed endpoint keeps its interval, the other backs off
+        self.assertEqual(schedules["synoptyczne"].interval, 60)
+        self.assertEqual(schedules["hydrologiczne"].interval, 90)
+
+    @patch("imgw.extract.serve.imgw_real_time")
+    def test_failed_poll_backs_off(self, _):
+        pipeline = _pipeline({})
+        pipeline.run.side_effect = RuntimeError("destination unavailable")
+        schedules = serve_real_time(pipeline, ENDPOINTS, min_interval=10, max_interval=100, max_polls=1)
+        self.assertEqual(schedules["synoptyczne"].interval, 90)
+
+    @patch("imgw.extract.serve.imgw_real_time")
+    def test_stop(self, _):
+        stop = threading.Event()
+        pipeline = _pipeline({})
+        pipeline.run.side_effect = lambda *_: stop.set()
+        serve_real_time(pipeline, ENDPOINTS, stop=stop)
+        pipeline.run.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
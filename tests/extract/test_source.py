@@ -0,0 +1,230 @@
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import dlt
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dlt.common.data_writers.buffered import BufferedDataWriter
+from dlt.common.data_writers.writers import ArrowToParquetWriter
+
+from benchmarks.server import serve_tree
+from benchmarks.synthetic import generate_tree
+from imgw.common import get_memory_budget
+from imgw.extract import (
+    DEFAULT_ARCHIVE_RESERVATION,
+    _ParsedArchive,
+    _weather_table_item,
+    archive_tables,
+    csv_files,
+    get_dlt_datalake_pipeline,
+    imgw_historic,
+    weather_tables,
+)
+from imgw.extract.helpers import ImgwCsv, ImgwZip, fetch_zip_data
+
+K_D_T_ROW = '"249180010","NAME","2001","01","{day:02d}","1.5","","80","","2","","3",""\n'
+
+
+def _k_d_t_table():
+    return pa.table({
+        "station_code": pa.array([2, 1, 1]),
+        "year": pa.array([2001, 2001, 2000], pa.int16()),
+        "measurement_date": pa.array([11323, 11323, 10957], pa.int32()).cast(pa.date32()),
+    })
+
+
+class TestWeatherTableItem(unittest.TestCase):
+    def test_unknown_table_type(self):
+        self.assertIsNone(_weather_table_item(_k_d_t_table(), "unknown", "replace"))
+
+    def test_merge_primary_key(self):
+        item = _weather_table_item(_k_d_t_table(), "k_d_t", "merge")
+        self.assertEqual(item.meta.hints["primary_key"], ["station_code", "year", "month", "day"])
+
+    def test_table_format_partitions_by_year(self):
+        item = _weather_table_item(_k_d_t_table(), "k_d_t", "replace", table_format="delta")
+        self.assertEqual(item.meta.hints["table_format"], "delta")
+        self.assertTrue(item.meta.hints["columns"]["year"]["partition"])
+        self.assertNotIn("partition", item.meta.hints["columns"]["station_code"])
+
+    def test_sort_rows(self):
+        item = _weather_table_item(_k_d_t_table(), "k_d_t", "replace", sort_rows=True)
+        self.assertEqual(item.data.column("station_code").to_pylist(), [1, 1, 2])
+        self.assertEqual(item.data.column("year").to_pylist(), [2000, 2001, 2001])
+
+    def test_sort_rows_by_year_first(self):
+        table = pa.table({
+            "station_code": pa.array([1, 2]),
+            "year": pa.array([2001, 2000], pa.int16()),
+            "measurement_date": pa.array([11323, 10957], pa.int32()).cast(pa.date32()),
+        })
+        item = _weather_table_item(table, "k_d_t", "replace", sort_rows=True)
+        self.assertEqual(item.data.column("station_code").to_pylist(), [2, 1])
+
+
+class TestArchiveLedger(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.tree = generate_tree(os.path.join(self.tmp_dir.name, "tree"), months=(1,), stations=2)
+        server = serve_tree(self.tree.root)
+        base_url = server.__enter__()
+        self.addCleanup(server.__exit__, None, None, None)
+        root_urls = json.dumps([base_url + root_url for root_url in self.tree.root_urls])
+        patcher = patch.dict(os.environ, {"SOURCES__ROOT_URLS": root_urls})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pipeline = dlt.pipeline(
+            pipeline_name="test_imgw_ledger",
+            destination=dlt.destinations.duckdb(os.path.join(self.tmp_dir.name, "imgw.db")),
+            pipelines_dir=self.tmp_dir.name,
+        )
+
+    def _extract(self, **kwargs):
+        """Extracts the source and returns the archives it downloaded and the ledger."""
+        with patch("imgw.extract.helpers.fetch_zip_data", wraps=fetch_zip_data) as fetch:
+            self.pipeline.extract(imgw_historic(incremental=True, **kwargs))
+        downloaded = {call.args[0].split("/", 3)[-1] for call in fetch.call_args_list if call.args[1] is None}
+        ledger = self.pipeline.state["sources"]["imgw_historic"]["archives"]
+        return downloaded, {link.split("/", 3)[-1] for link in ledger}
+
+    def _assert_failed_archives_are_retried(self, **kwargs):
+        # an error page served as an archive, and an archive with an unparsable CSV file
+        failed = {path for path in self.tree.malformed if not path.endswith("_13_k.zip")}
+        _, ledger = self._extract(**kwargs)
+        # the archive with a damaged central directory is recovered in full and recorded
+        self.assertEqual(ledger, set(self.tree.archives) - failed)
+        downloaded, _ = self._extract(**kwargs)
+        self.assertEqual(downloaded, failed)
+
+    def test_failed_archives_are_retried(self):
+        self._assert_failed_archives_are_retried()
+
+    def test_failed_archives_are_retried_in_pool(self):
+        self._assert_failed_archives_are_retried(parse_workers=1)
+
+    def test_memory_budget_is_returned(self):
+        # budgets are shared per size, so every run uses its own
+        for memory_budget, parse_workers in (((1 << 40), 0), ((1 << 40) + 1, 1)):
+            with self.subTest(parse_workers=parse_workers):
+                self._extract(memory_budget=memory_budget, parse_workers=parse_workers)
+                budget = get_memory_budget(memory_budget)
+                self.assertGreater(budget.peak, 0)
+                self.assertEqual(budget.used, 0)
+
+
+class TestTablesHeldUntilWritten(unittest.TestCase):
+    """dlt writes an item of a step that is not parallelized before it resumes the step, see weather_tables."""
+
+    def test_weather_tables(self):
+        budget = get_memory_budget((1 << 40) + 2)
+        rows = "".join(K_D_T_ROW.format(day=day) for day in range(1, 29))
+        csv_file = ImgwCsv(filename="k_d_t_01_2001.csv", content=rows.encode("cp1250"))
+        # acquired by csv_files
+        budget.acquire(csv_file.nbytes)
+        used = []
+        for _ in dlt.resource([csv_file], name="csv") | weather_tables(memory_budget=budget.max_bytes):
+            used.append(budget.used)
+        self.assertEqual(len(used), 1)
+        self.assertGreater(used[0], csv_file.nbytes)
+        self.assertEqual(budget.used, 0)
+
+    def test_archive_tables(self):
+        budget = get_memory_budget((1 << 40) + 3)
+        table = _k_d_t_table()
+        archive = _ParsedArchive("https://example.com/1.zip", {"etag": '"1"'}, [(table, 100), (table, 50)], 2, False)
+        # acquired by parsed_archives
+        budget.acquire(150)
+        used = [
+            budget.used
+            for _ in dlt.resource([archive], name="archives") | archive_tables(memory_budget=budget.max_bytes)
+        ]
+        self.assertEqual(used, [150, 50])
+        self.assertEqual(budget.used, 0)
+
+
+class TestArchiveReservation(unittest.TestCase):
+    def test_download_is_reserved_before_fetching(self):
+        budget = get_memory_budget((1 << 40) + 4)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tree = generate_tree(tmp_dir, months=(1,), stations=2)
+            archive = next(path for path in tree.archives if path not in tree.malformed)
+            with open(os.path.join(tree.root, archive), "rb") as f:
+                zip_file = ImgwZip(filename=os.path.basename(archive), content=f.read())
+        unzipped = zip_file.unzipped_nbytes()
+        used_at_fetch = []
+
+        def fetch(*args, **kwargs):
+            used_at_fetch.append(budget.used)
+            return zip_file
+
+        with patch("imgw.extract.helpers.fetch_zip_data", side_effect=fetch):
+            links = dlt.resource(["https://example.com/" + archive], name="links")
+            used = [budget.used for _ in links | csv_files(memory_budget=budget.max_bytes)]
+        self.assertEqual(used_at_fetch, [DEFAULT_ARCHIVE_RESERVATION])
+        # reconciled with the archive and the CSV files listed in its central directory
+        self.assertEqual(used[0], zip_file.nbytes + unzipped)
+        # the CSV files are left to weather_tables, which releases them once parsed
+        self.assertEqual(budget.used, unzipped)
+
+
+class TestDatalakePipeline(unittest.TestCase):
+    def test_data_writer_config(self):
+        """The Parquet options of [imgw_pipeline_datalake.data_writer] in .dlt/config.toml reach the writers."""
+        parquet_formats, file_max_bytes = [], []
+        writer_init, buffered_init = ArrowToParquetWriter.__init__, BufferedDataWriter.__init__
+
+        def record_parquet_format(writer, *args, **kwargs):
+            writer_init(writer, *args, **kwargs)
+            parquet_formats.append(writer.parquet_format)
+
+        def record_file_max_bytes(writer, *args, **kwargs):
+            buffered_init(writer, *args, **kwargs)
+            file_max_bytes.append(writer.file_max_bytes)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bucket_url = pathlib.Path(tmp_dir, "bucket").as_uri()
+            with (
+                patch.dict(os.environ, {"DESTINATION__DATALAKE__BUCKET_URL": bucket_url, "DLT_DATA_DIR": tmp_dir}),
+                patch.object(ArrowToParquetWriter, "__init__", record_parquet_format),
+                patch.object(BufferedDataWriter, "__init__", record_file_max_bytes),
+            ):
+                pipeline = get_dlt_datalake_pipeline()
+                self.assertTrue(pipeline.working_dir.startswith(tmp_dir))
+                pipeline.run(dlt.resource([_k_d_t_table()], name="k_d_t"))
+            (parquet_file,) = pathlib.Path(tmp_dir, "bucket").rglob("k_d_t/*.parquet")
+            compression = pq.ParquetFile(parquet_file).metadata.row_group(0).column(0).compression
+        self.assertEqual(compression, "ZSTD")
+        self.assertTrue(parquet_formats)
+        for parquet_format in parquet_formats:
+            self.assertEqual((parquet_format.compression, parquet_format.row_group_size), ("zstd", 1048576))
+        self.assertEqual(set(file_max_bytes), {268435456})
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_sources_do_not_import_unused_dependencies(self):
+        # defining the sources needs dlt only: helpers, schemas and their HTTP and Arrow dependencies load on use
+        modules = ("duckdb", "bs4", "requests", "pyarrow", "imgw.common.schema", "imgw.extract.helpers.extract")
+        code = f"import sys, imgw.extract; print([m for m in {modules!r} if m in sys.modules])"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout  # noqa: S603
+        self.assertEqual(output.strip(), "[]")
+
+    def test_lazy_attributes(self):
+        from imgw import common, load
+        from imgw.extract import helpers
+
+        self.assertIn("duckdb_config", dir(load))
+        self.assertTrue(callable(helpers.records_to_table))
+        self.assertIn("s_t", common.PRIMARY_KEYS)
+        with self.assertRaises(AttributeError):
+            _ = helpers.missing
+
+
+if __name__ == "__main__":
+    unittest.main()
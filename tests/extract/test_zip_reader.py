@@ -0,0 +1,88 @@
+import io
+import unittest
+import zipfile
+
+from imgw.extract.helpers.extract import ImgwZip, unzip
+from imgw.extract.helpers.zip_reader import iter_local_members
+
+
+class _NonSeekable(io.RawIOBase):
+    """Write-only stream that makes zipfile emit data descriptors."""
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.buffer += b
+        return len(b)
+
+
+def _make_zip(members, compression=zipfile.ZIP_DEFLATED, seekable=True):
+    if seekable:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression) as zip_ref:
+            for name, content in members.items():
+                zip_ref.writestr(name, content)
+        return buffer.getvalue()
+    stream = _NonSeekable()
+    with zipfile.ZipFile(stream, "w", compression) as zip_ref:
+        for name, content in members.items():
+            with zip_ref.open(name, "w") as file:
+                file.write(content)
+    return bytes(stream.buffer)
+
+
+def _strip_central_directory(data):
+    return data[: data.rfind(b"PK\x01\x02", 0, data.find(b"PK\x05\x06") + 1) - 1]
+
+
+MEMBERS = {"s_d_t_1.csv": b"1,2,3\n" * 500, "s_d_t_2.csv": b"4,5,6\n" * 300}
+
+
+class TestZipReader(unittest.TestCase):
+    def test_iter_local_members_valid(self):
+        members = list(iter_local_members(io.BytesIO(_make_zip(MEMBERS))))
+        self.assertEqual({member.filename: member.content for member in members}, MEMBERS)
+
+    def test_iter_local_members_without_central_directory(self):
+        data = _make_zip(MEMBERS)
+        data = data[: data.find(b"PK\x01\x02")]
+        members = list(iter_local_members(io.BytesIO(data)))
+        self.assertEqual({member.filename: member.content for member in members}, MEMBERS)
+
+    def test_iter_local_members_data_descriptor(self):
+        for compression in (zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED):
+            with self.subTest(compression=compression):
+                data = _make_zip(MEMBERS, compression, seekable=False)
+                data = data[: data.find(b"PK\x01\x02")]
+                members = list(iter_local_members(io.BytesIO(data)))
+                self.assertEqual({member.filename: member.content for member in members}, MEMBERS)
+
+    def test_iter_local_members_skips_corrupt_member(self):
+        data = bytearray(_make_zip(MEMBERS, zipfile.ZIP_STORED))
+        data[60] ^= 0xFF  # flip a byte inside the first member's data
+        members = list(iter_local_members(io.BytesIO(bytes(data))))
+        self.assertEqual([member.filename for member in members], ["s_d_t_2.csv"])
+
+    def test_unzip_falls_back_to_local_headers(self):
+        data = _make_zip(MEMBERS)
+        data = data[: data.find(b"PK\x01\x02")]
+        zip_file = ImgwZip(filename="test.zip", content=data)
+        csv_files = list(unzip(zip_file))
+        self.assertEqual({csv_file.filename: csv_file.content for csv_file in csv_files}, MEMBERS)
+        self.assertFalse(zip_file.failed)
+
+    def test_unzip_marks_truncated_archive_failed(self):
+        data = _make_zip(MEMBERS)
+        # cut inside the compressed data of the second member, like an interrupted download
+        zip_file = ImgwZip(filename="test.zip", content=data[: data.find(b"s_d_t_2.csv") + 20])
+        csv_files = list(unzip(zip_file))
+        self.assertEqual([csv_file.filename for csv_file in csv_files], ["s_d_t_1.csv"])
+        self.assertTrue(zip_file.failed)
+
+
+if __name__ == "__main__":
+    unittest.main()
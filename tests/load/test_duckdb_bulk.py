@@ -0,0 +1,127 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import duckdb
+import pyarrow as pa
+
+from imgw.load import DuckDbBulkLoader, bulk_load_historic, duckdb_config
+
+K_D_T_ROW = '"{station}","NAME","2001","01","{day:02d}","1.5","","80","","2","","3",""\n'
+
+
+def _make_archive():
+    rows = [K_D_T_ROW.format(station=station, day=day) for station in (2, 1) for day in (2, 1)]
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr("k_d_t_01_2001.csv", "".join(rows).encode("windows-1250"))
+    return buffer.getvalue()
+
+
+def _mock_response(**kwargs):
+    """Mocks a response of requests.get, which is used as a context manager."""
+    response = MagicMock(**kwargs)
+    response.__enter__.return_value = response
+    return response
+
+
+class TestDuckDbBulk(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmp_dir.name, "imgw.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_duckdb_config(self):
+        self.assertEqual(duckdb_config("1GB"), {"memory_limit": "1GB", "preserve_insertion_order": "false"})
+        config = duckdb_config("1GB", threads=2, temp_directory="spill")
+        self.assertEqual(config["threads"], 2)
+        self.assertEqual(config["temp_directory"], "spill")
+
+    def test_write_replaces_table_on_first_write(self):
+        for _ in range(2):
+            loader = DuckDbBulkLoader(self.db_file, "imgw_historic")
+            loader.write("test_table", pa.table({"column1": [1, 2]}))
+            loader.write("test_table", pa.record_batch({"column1": [3]}))
+            loader.close()
+        with duckdb.connect(self.db_file) as connection:
+            count = connection.execute('SELECT count(*) FROM "imgw_historic"."test_table"').fetchone()[0]
+        self.assertEqual(count, 3)
+
+    def test_concurrent_writes(self):
+        loader = DuckDbBulkLoader(self.db_file, "imgw_historic")
+        self.addCleanup(loader.close)
+
+        def write(table_type):
+            for _ in range(10):
+                loader.write(table_type, pa.table({"column1": [1, 2]}))
+
+        threads = [threading.Thread(target=write, args=(f"table_{i % 3}",)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(loader.rows, {"table_0": 40, "table_1": 40, "table_2": 40})
+
+    def test_writes_wait_only_for_their_table(self):
+        loader = DuckDbBulkLoader(self.db_file, "imgw_historic")
+        self.addCleanup(loader.close)
+        with loader._table_lock("busy_table"):
+            thread = threading.Thread(target=loader.write, args=("other_table", pa.table({"column1": [1]})))
+            thread.start()
+            thread.join(timeout=10)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(loader.rows, {"other_table": 1})
+
+    @patch("imgw.load.duckdb_bulk.find_zip_links")
+    @patch("imgw.extract.helpers.extract.requests.get")
+    def test_bulk_load_historic(self, mock_get, mock_find_zip_links):
+        mock_find_zip_links.return_value = iter(["https://example.com/2001_k.zip"])
+        mock_response = _mock_response(status_code=200, headers={})
+        mock_response.iter_content.return_value = [_make_archive()]
+        mock_get.return_value = mock_response
+
+        info = bulk_load_historic(["https://example.com/"], db_file=self.db_file, workers=2, create_indexes=True)
+        self.assertEqual(info.archives, 1)
+        self.assertEqual(info.rows, {"k_d_t": 4})
+        with duckdb.connect(self.db_file) as connection:
+            rows = connection.execute(
+                'SELECT station_code, day, measurement_date FROM "imgw_historic"."k_d_t"'
+            ).fetchall()
+        self.assertEqual([(row[0], row[1]) for row in rows], [(1, 1), (1, 2), (2, 1), (2, 2)])
+        self.assertEqual(info.failed, [])
+
+    @patch("imgw.load.duckdb_bulk._save_failed_file")
+    @patch("imgw.load.duckdb_bulk.find_zip_links")
+    @patch("imgw.extract.helpers.extract.requests.get")
+    def test_bulk_load_continues_after_failed_archive(self, mock_get, mock_find_zip_links, mock_save_failed_file):
+        links = ["https://example.com/2001_k.zip", "https://example.com/2002_k.zip"]
+        mock_find_zip_links.return_value = iter(links)
+        mock_response = _mock_response(status_code=200, headers={})
+        mock_response.iter_content.side_effect = lambda **_: [_make_archive()]
+        mock_get.return_value = mock_response
+        write = DuckDbBulkLoader.write
+        calls = []
+
+        def fail_first_write(loader, table_type, data):
+            calls.append(table_type)
+            if len(calls) == 1:
+                raise duckdb.ConversionException("broken archive")  # noqa: TRY003
+            write(loader, table_type, data)
+
+        # a single worker loads the archives in order, so the first one fails
+        with patch.object(DuckDbBulkLoader, "write", fail_first_write):
+            info = bulk_load_historic(["https://example.com/"], db_file=self.db_file, workers=1)
+        self.assertEqual(info.archives, 2)
+        self.assertEqual(info.failed, links[:1])
+        self.assertEqual(info.rows, {"k_d_t": 4})
+        self.assertEqual(mock_save_failed_file.call_args.args[0].filename, "2001_k.zip")
+
+
+if __name__ == "__main__":
+    unittest.main()